@@ -1,103 +1,185 @@
-"""Flask API exposing the layered quant research platform."""
+"""Flask API exposing the layered quant research platform.
+
+``create_app`` builds the subsystems (see :mod:`quant_platform.serving`) and
+warms them up according to ``SERVING_WARMUP`` (``background`` by default, so
+importing this module does not block on model loading); the module-level
+``app`` keeps ``gunicorn app:app`` working and ``python app.py`` warms up
+synchronously before serving.
+Use ``gunicorn -c gunicorn.conf.py app:app`` to load the models once and
+share them with every worker.
+"""
 from __future__ import annotations
 
+import json
 import os
-from typing import Any, Dict, List
+from typing import Any, Iterator, Optional
 
 import pandas as pd
-from flask import Flask, jsonify, request
-
-from quant_platform import (
-    ArchitectureOptimiser,
-    AgenticRAGPipeline,
-    DataIngestionManager,
-    FrontendArchitecturePlanner,
-    HardwareAdapter,
-    PlatformConfig,
-    QuantBacktestManager,
-    ResearchCoordinator,
-    VirtualLoginSandbox,
-    create_client,
-)
+from flask import Blueprint, Flask, Response, current_app, jsonify, request, stream_with_context
+
 from quant_platform.agents import DEFAULT_AGENT_REGISTRY
-from quant_platform.llm import DummyLLMClient
-
-app = Flask(__name__)
-
-config = PlatformConfig()
-provider = os.getenv("LLM_PROVIDER", "openai")
-token = getattr(config.llm_tokens, provider, None)
-try:
-    llm_client = create_client(provider, token=token)
-    # If token missing the concrete client will raise when invoked.
-    # Replace with dummy proactively to keep API responsive.
-    if not token:
-        llm_client = DummyLLMClient(token=None)
-except Exception:  # pragma: no cover - fallback path
-    llm_client = DummyLLMClient(token=None)
-
-rag_pipeline = AgenticRAGPipeline(config=config, llm_client=llm_client)
-ingestion_manager = DataIngestionManager(config=config.data_sources, sink=rag_pipeline)
-backtest_manager = QuantBacktestManager(platform_config=config.backtest)
-research_coordinator = ResearchCoordinator()
-frontend_planner = FrontendArchitecturePlanner()
-virtual_sandbox = VirtualLoginSandbox()
-architecture_optimiser = ArchitectureOptimiser(frameworks=["FastAPI", "Ray", "Airflow"])
-hardware_adapter = HardwareAdapter(profile=config.hardware)
-
-
-@app.route("/recommend", methods=["POST"])
+from quant_platform.api_args import int_arg, recommend_args
+from quant_platform.llm import INTERACTIVE_PRIORITY, LLMRequestError
+from quant_platform.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, render_metrics
+from quant_platform.rag import ShardedRetriever, TieredRetriever
+from quant_platform.serving import PlatformServices, build_services
+
+api = Blueprint("platform", __name__)
+
+
+def _services() -> PlatformServices:
+    return current_app.extensions["quant_platform"]
+
+
+def create_app(services: Optional[PlatformServices] = None, warmup: Optional[str] = None) -> Flask:
+    """Flask app over ``services`` (built from the environment by default).
+
+    ``warmup`` overrides ``SERVING_WARMUP``: ``sync`` loads and runs the
+    models before returning, ``background`` does so on a thread while
+    ``/ready`` answers 503, ``preload`` only loads weights for a parent that
+    forks workers, ``off`` leaves loading to the first request.
+    """
+
+    services = services or build_services()
+    services.start_warm_up(warmup or services.config.serving.warmup)
+    flask_app = Flask(__name__)
+    flask_app.extensions["quant_platform"] = services
+    flask_app.register_blueprint(api)
+    return flask_app
+
+
+@api.route("/recommend", methods=["POST"])
 def recommend() -> Any:
+    services = _services()
     payload = request.get_json(force=True)
     query = payload.get("query", "")
-    rounds = int(payload.get("rounds", 2))
-    top_k = int(payload.get("top_k", 5))
-    result = rag_pipeline.run(query=query, rounds=rounds, top_k=top_k)
+    session_id = payload.get("session_id")
+    try:
+        rounds, top_k, filters = recommend_args(payload)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    try:
+        result = services.rag_pipeline.run(
+            query=query,
+            rounds=rounds,
+            top_k=top_k,
+            session_id=session_id,
+            filters=filters,
+            priority=INTERACTIVE_PRIORITY,
+        )
+    except LLMRequestError as exc:
+        return jsonify({"error": str(exc), "provider": exc.provider}), 502
     return jsonify(result)
 
 
-@app.route("/ingest", methods=["POST"])
+@api.route("/recommend/stream", methods=["POST"])
+def recommend_stream() -> Any:
+    services = _services()
+    payload = request.get_json(force=True)
+    query = payload.get("query", "")
+    session_id = payload.get("session_id")
+    try:
+        rounds, top_k, filters = recommend_args(payload)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    def events() -> Iterator[str]:
+        try:
+            for event, data in services.rag_pipeline.run_stream(
+                query=query,
+                rounds=rounds,
+                top_k=top_k,
+                session_id=session_id,
+                filters=filters,
+                priority=INTERACTIVE_PRIORITY,
+            ):
+                yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+        except LLMRequestError as exc:
+            error = {"error": str(exc), "provider": exc.provider}
+            yield f"event: error\ndata: {json.dumps(error, ensure_ascii=False)}\n\n"
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@api.route("/ingest", methods=["POST"])
 def ingest() -> Any:
+    services = _services()
     payload = request.get_json(force=True)
     snowball = payload.get("snowball", [])
     indices = payload.get("indices", [])
     topics = payload.get("topics", [])
-    ingestion_manager.ingest_all(snowball, indices, topics)
-    return jsonify({"status": "ok"})
+    result = services.submit_ingest(snowball, indices, topics)
+    return jsonify(result), 202 if "job_id" in result else 200
+
+
+@api.route("/ingest/jobs", methods=["GET"])
+def ingest_jobs() -> Any:
+    return jsonify(_services().ingest_report())
 
 
-@app.route("/backtest/local", methods=["POST"])
+@api.route("/ingest/jobs/<job_id>", methods=["GET"])
+def ingest_job(job_id: str) -> Any:
+    queue = _services().ingestion_queue
+    job = queue.get(job_id) if queue is not None else None
+    if job is None:
+        return jsonify({"error": "unknown job", "job_id": job_id}), 404
+    return jsonify(job)
+
+
+@api.route("/backtest/local", methods=["POST"])
 def backtest_local() -> Any:
+    services = _services()
     payload = request.get_json(force=True)
     market_data = pd.DataFrame(payload.get("market_data", []))
-    result = backtest_manager.backtest_local(market_data)
+    result = services.backtest_manager.backtest_local(market_data)
     return jsonify(result)
 
 
-@app.route("/backtest/remote", methods=["POST"])
+@api.route("/backtest/remote", methods=["POST"])
 def backtest_remote() -> Any:
+    services = _services()
     payload = request.get_json(force=True)
     platform = payload["platform"]
     strategy_code = payload["strategy_code"]
     params = payload.get("params", {})
-    result = backtest_manager.submit_remote(platform, strategy_code, params)
+    result = services.backtest_manager.submit_remote(platform, strategy_code, params)
     return jsonify(result)
 
 
-@app.route("/research", methods=["POST"])
+@api.route("/research", methods=["POST"])
 def research() -> Any:
+    services = _services()
     payload = request.get_json(force=True)
     query = payload.get("query", "")
     human_notes = payload.get("human_notes", [])
-    for note in human_notes:
-        research_coordinator.add_human_insight(note)
-    report = research_coordinator.compile_report(query)
+    services.research_coordinator.add_human_insights(human_notes)
+    report = services.research_coordinator.compile_report(query)
     return jsonify(report)
 
 
-@app.route("/frontend/login-blueprint", methods=["GET"])
+@api.route("/research/notes", methods=["GET"])
+def research_notes() -> Any:
+    services = _services()
+    try:
+        offset = int_arg(request.args, "offset", 0)
+        limit = int_arg(request.args, "limit", 50, 500)
+        top_k = int_arg(request.args, "top_k", services.research_coordinator.notes_top_k, 500)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    query = request.args.get("q")
+    if query:
+        return jsonify({"query": query, "notes": services.research_coordinator.notes_store.search(query, top_k=top_k)})
+    return jsonify(services.research_coordinator.notes_store.list_notes(offset=offset, limit=limit))
+
+
+@api.route("/frontend/login-blueprint", methods=["GET"])
 def frontend_blueprint() -> Any:
-    blueprint = frontend_planner.login_page_blueprint()
+    services = _services()
+    blueprint = services.frontend_planner.login_page_blueprint()
     serialised = {
         section: [module.__dict__ for module in modules]
         for section, modules in blueprint.items()
@@ -105,41 +187,104 @@ def frontend_blueprint() -> Any:
     return jsonify(serialised)
 
 
-@app.route("/agents", methods=["GET"])
+@api.route("/agents", methods=["GET"])
 def list_agents() -> Any:
     return jsonify(DEFAULT_AGENT_REGISTRY.list_agents())
 
 
-@app.route("/virtual/tasks", methods=["GET", "POST", "PUT"])
+@api.route("/virtual/tasks", methods=["GET", "POST", "PUT"])
 def virtual_tasks() -> Any:
+    services = _services()
     if request.method == "POST":
         payload = request.get_json(force=True)
-        virtual_sandbox.enqueue(payload["url"], payload.get("instructions", ""))
+        services.virtual_sandbox.enqueue(payload["url"], payload.get("instructions", ""))
         return jsonify({"status": "queued"})
     if request.method == "PUT":
         payload = request.get_json(force=True)
-        virtual_sandbox.mark_completed(payload["url"])
+        services.virtual_sandbox.mark_completed(payload["url"])
         return jsonify({"status": "completed"})
-    return jsonify(virtual_sandbox.list_pending())
+    return jsonify(services.virtual_sandbox.list_pending())
 
 
-@app.route("/architecture/reflect", methods=["POST"])
+@api.route("/architecture/reflect", methods=["POST"])
 def architecture_reflect() -> Any:
+    services = _services()
     payload = request.get_json(force=True)
     goals = payload.get("goals", [])
-    reflection = architecture_optimiser.run_reflection(goals)
+    reflection = services.architecture_optimiser.run_reflection(goals)
     return jsonify(reflection.__dict__)
 
 
-@app.route("/hardware/profile", methods=["GET"])
+@api.route("/hardware/profile", methods=["GET"])
 def hardware_profile() -> Any:
-    return jsonify(hardware_adapter.summary())
+    services = _services()
+    return jsonify(services.hardware_adapter.summary())
+
+
+@api.route("/llm/providers", methods=["GET"])
+def llm_providers() -> Any:
+    return jsonify(_services().llm_report())
+
+
+@api.route("/rag/cache", methods=["GET"])
+def rag_cache() -> Any:
+    services = _services()
+    cache = services.rag_pipeline.answer_cache
+    if cache is None:
+        return jsonify({"enabled": False})
+    return jsonify(dict(cache.stats(), enabled=True))
+
+
+@api.route("/rag/tiers", methods=["GET"])
+def rag_tiers() -> Any:
+    services = _services()
+    retriever = services.rag_pipeline.retriever
+    if not isinstance(retriever, TieredRetriever):
+        return jsonify({"enabled": False})
+    return jsonify(dict(retriever.stats(), enabled=True))
 
 
-@app.route("/health", methods=["GET"])
+@api.route("/rag/snapshot", methods=["GET"])
+def rag_snapshot() -> Any:
+    services = _services()
+    snapshots = services.rag_pipeline.snapshots
+    if snapshots is None:
+        return jsonify({"enabled": False})
+    return jsonify(dict(snapshots.stats(), enabled=True))
+
+
+@api.route("/rag/shards", methods=["GET", "POST"])
+def rag_shards() -> Any:
+    services = _services()
+    retriever = services.rag_pipeline.retriever
+    if not isinstance(retriever, ShardedRetriever):
+        return jsonify({"enabled": False})
+    if request.method == "POST":
+        moved = retriever.add_shard()
+        return jsonify(dict(retriever.stats(), enabled=True, moved=moved))
+    return jsonify(dict(retriever.stats(), enabled=True))
+
+
+@api.route("/metrics", methods=["GET"])
+def metrics() -> Any:
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+
+@api.route("/health", methods=["GET"])
 def health() -> Any:
     return jsonify({"status": "ok"})
 
 
+@api.route("/ready", methods=["GET"])
+def ready() -> Any:
+    """200 once this process finished warming up, 503 before (for load balancer readiness probes)."""
+
+    services = _services()
+    return jsonify(services.readiness()), 200 if services.ready else 503
+
+
 if __name__ == "__main__":
-    app.run(debug=True)
+    # The development server is the one entry point that warms up synchronously unless told otherwise.
+    create_app(warmup=os.environ.get("SERVING_WARMUP", "sync")).run(debug=True)
+else:
+    app = create_app()
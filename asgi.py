@@ -0,0 +1,303 @@
+"""ASGI (Starlette) variant of ``app.py`` serving the same routes from an event loop.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8000
+
+``/recommend`` awaits :meth:`AgenticRAGPipeline.arun`, so a request waiting
+on LLM providers holds no thread and one process keeps hundreds of
+recommendations in flight. CPU-bound work is offloaded to bounded pools:
+embedding, search and reranking to the pipeline's ``RAG_CPU_WORKERS``
+threads, local backtests to ``SERVING_BACKTEST_WORKERS`` threads, and the
+remaining blocking calls (research tools, the ingestion queue, sqlite) to
+Starlette's thread pool. ``scripts/load_test.py`` compares both modes.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Iterator, Optional
+
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from quant_platform.agents import DEFAULT_AGENT_REGISTRY
+from quant_platform.api_args import int_arg, recommend_args
+from quant_platform.llm import INTERACTIVE_PRIORITY, LLMRequestError
+from quant_platform.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, render_metrics
+from quant_platform.rag import ShardedRetriever, TieredRetriever
+from quant_platform.serving import PlatformServices, build_services
+
+
+def _services(request: Request) -> PlatformServices:
+    return request.app.state.services
+
+
+async def _payload(request: Request) -> dict:
+    """Request body as JSON regardless of content type (like Flask's ``get_json(force=True)``)."""
+
+    body = await request.body()
+    return json.loads(body) if body else {}
+
+
+async def recommend(request: Request) -> JSONResponse:
+    services = _services(request)
+    payload = await _payload(request)
+    try:
+        rounds, top_k, filters = recommend_args(payload)
+    except ValueError as exc:
+        return JSONResponse({"error": str(exc)}, status_code=400)
+    try:
+        result = await services.rag_pipeline.arun(
+            query=payload.get("query", ""),
+            rounds=rounds,
+            top_k=top_k,
+            session_id=payload.get("session_id"),
+            filters=filters,
+            priority=INTERACTIVE_PRIORITY,
+        )
+    except LLMRequestError as exc:
+        return JSONResponse({"error": str(exc), "provider": exc.provider}, status_code=502)
+    return JSONResponse(result)
+
+
+async def recommend_stream(request: Request) -> Response:
+    services = _services(request)
+    payload = await _payload(request)
+    query = payload.get("query", "")
+    session_id = payload.get("session_id")
+    try:
+        rounds, top_k, filters = recommend_args(payload)
+    except ValueError as exc:
+        return JSONResponse({"error": str(exc)}, status_code=400)
+
+    def events() -> Iterator[str]:
+        try:
+            for event, data in services.rag_pipeline.run_stream(
+                query=query,
+                rounds=rounds,
+                top_k=top_k,
+                session_id=session_id,
+                filters=filters,
+                priority=INTERACTIVE_PRIORITY,
+            ):
+                yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+        except LLMRequestError as exc:
+            error = {"error": str(exc), "provider": exc.provider}
+            yield f"event: error\ndata: {json.dumps(error, ensure_ascii=False)}\n\n"
+
+    # Provider streams are blocking iterators; each chunk is pulled on the thread pool.
+    return StreamingResponse(
+        iterate_in_threadpool(events()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def ingest(request: Request) -> JSONResponse:
+    services = _services(request)
+    payload = await _payload(request)
+    result = await run_in_threadpool(
+        services.submit_ingest,
+        payload.get("snowball", []),
+        payload.get("indices", []),
+        payload.get("topics", []),
+    )
+    return JSONResponse(result, status_code=202 if "job_id" in result else 200)
+
+
+async def ingest_jobs(request: Request) -> JSONResponse:
+    return JSONResponse(await run_in_threadpool(_services(request).ingest_report))
+
+
+async def ingest_job(request: Request) -> JSONResponse:
+    job_id = request.path_params["job_id"]
+    queue = _services(request).ingestion_queue
+    job = await run_in_threadpool(queue.get, job_id) if queue is not None else None
+    if job is None:
+        return JSONResponse({"error": "unknown job", "job_id": job_id}, status_code=404)
+    return JSONResponse(job)
+
+
+async def backtest_local(request: Request) -> JSONResponse:
+    services = _services(request)
+    payload = await _payload(request)
+
+    def run() -> Any:
+        return services.backtest_manager.backtest_local(pd.DataFrame(payload.get("market_data", [])))
+
+    executor: ThreadPoolExecutor = request.app.state.backtest_executor
+    return JSONResponse(await asyncio.get_running_loop().run_in_executor(executor, run))
+
+
+async def backtest_remote(request: Request) -> JSONResponse:
+    services = _services(request)
+    payload = await _payload(request)
+    result = await run_in_threadpool(
+        services.backtest_manager.submit_remote, payload["platform"], payload["strategy_code"], payload.get("params", {})
+    )
+    return JSONResponse(result)
+
+
+async def research(request: Request) -> JSONResponse:
+    coordinator = _services(request).research_coordinator
+    payload = await _payload(request)
+
+    def run() -> Any:
+        coordinator.add_human_insights(payload.get("human_notes", []))
+        return coordinator.compile_report(payload.get("query", ""))
+
+    return JSONResponse(await run_in_threadpool(run))
+
+
+async def research_notes(request: Request) -> JSONResponse:
+    coordinator = _services(request).research_coordinator
+    try:
+        offset = int_arg(request.query_params, "offset", 0)
+        limit = int_arg(request.query_params, "limit", 50, 500)
+        top_k = int_arg(request.query_params, "top_k", coordinator.notes_top_k, 500)
+    except ValueError as exc:
+        return JSONResponse({"error": str(exc)}, status_code=400)
+    query = request.query_params.get("q")
+    if query:
+        notes = await run_in_threadpool(coordinator.notes_store.search, query, top_k=top_k)
+        return JSONResponse({"query": query, "notes": notes})
+    return JSONResponse(await run_in_threadpool(coordinator.notes_store.list_notes, offset=offset, limit=limit))
+
+
+async def frontend_blueprint(request: Request) -> JSONResponse:
+    blueprint = _services(request).frontend_planner.login_page_blueprint()
+    return JSONResponse(
+        {section: [module.__dict__ for module in modules] for section, modules in blueprint.items()}
+    )
+
+
+async def list_agents(request: Request) -> JSONResponse:
+    return JSONResponse(DEFAULT_AGENT_REGISTRY.list_agents())
+
+
+async def virtual_tasks(request: Request) -> JSONResponse:
+    sandbox = _services(request).virtual_sandbox
+    if request.method == "POST":
+        payload = await _payload(request)
+        sandbox.enqueue(payload["url"], payload.get("instructions", ""))
+        return JSONResponse({"status": "queued"})
+    if request.method == "PUT":
+        payload = await _payload(request)
+        sandbox.mark_completed(payload["url"])
+        return JSONResponse({"status": "completed"})
+    return JSONResponse(sandbox.list_pending())
+
+
+async def architecture_reflect(request: Request) -> JSONResponse:
+    payload = await _payload(request)
+    reflection = await run_in_threadpool(
+        _services(request).architecture_optimiser.run_reflection, payload.get("goals", [])
+    )
+    return JSONResponse(reflection.__dict__)
+
+
+async def hardware_profile(request: Request) -> JSONResponse:
+    return JSONResponse(_services(request).hardware_adapter.summary())
+
+
+async def llm_providers(request: Request) -> JSONResponse:
+    return JSONResponse(_services(request).llm_report())
+
+
+async def rag_cache(request: Request) -> JSONResponse:
+    cache = _services(request).rag_pipeline.answer_cache
+    if cache is None:
+        return JSONResponse({"enabled": False})
+    return JSONResponse(dict(cache.stats(), enabled=True))
+
+
+async def rag_tiers(request: Request) -> JSONResponse:
+    retriever = _services(request).rag_pipeline.retriever
+    if not isinstance(retriever, TieredRetriever):
+        return JSONResponse({"enabled": False})
+    return JSONResponse(dict(retriever.stats(), enabled=True))
+
+
+async def rag_snapshot(request: Request) -> JSONResponse:
+    snapshots = _services(request).rag_pipeline.snapshots
+    if snapshots is None:
+        return JSONResponse({"enabled": False})
+    return JSONResponse(dict(snapshots.stats(), enabled=True))
+
+
+async def rag_shards(request: Request) -> JSONResponse:
+    retriever = _services(request).rag_pipeline.retriever
+    if not isinstance(retriever, ShardedRetriever):
+        return JSONResponse({"enabled": False})
+    if request.method == "POST":
+        moved = await run_in_threadpool(retriever.add_shard)
+        return JSONResponse(dict(retriever.stats(), enabled=True, moved=moved))
+    return JSONResponse(dict(retriever.stats(), enabled=True))
+
+
+async def metrics(request: Request) -> Response:
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+async def health(request: Request) -> JSONResponse:
+    return JSONResponse({"status": "ok"})
+
+
+async def ready(request: Request) -> JSONResponse:
+    services = _services(request)
+    return JSONResponse(services.readiness(), status_code=200 if services.ready else 503)
+
+
+ROUTES = [
+    Route("/recommend", recommend, methods=["POST"]),
+    Route("/recommend/stream", recommend_stream, methods=["POST"]),
+    Route("/ingest", ingest, methods=["POST"]),
+    Route("/ingest/jobs", ingest_jobs, methods=["GET"]),
+    Route("/ingest/jobs/{job_id}", ingest_job, methods=["GET"]),
+    Route("/backtest/local", backtest_local, methods=["POST"]),
+    Route("/backtest/remote", backtest_remote, methods=["POST"]),
+    Route("/research", research, methods=["POST"]),
+    Route("/research/notes", research_notes, methods=["GET"]),
+    Route("/frontend/login-blueprint", frontend_blueprint, methods=["GET"]),
+    Route("/agents", list_agents, methods=["GET"]),
+    Route("/virtual/tasks", virtual_tasks, methods=["GET", "POST", "PUT"]),
+    Route("/architecture/reflect", architecture_reflect, methods=["POST"]),
+    Route("/hardware/profile", hardware_profile, methods=["GET"]),
+    Route("/llm/providers", llm_providers, methods=["GET"]),
+    Route("/rag/cache", rag_cache, methods=["GET"]),
+    Route("/rag/tiers", rag_tiers, methods=["GET"]),
+    Route("/rag/snapshot", rag_snapshot, methods=["GET"]),
+    Route("/rag/shards", rag_shards, methods=["GET", "POST"]),
+    Route("/metrics", metrics, methods=["GET"]),
+    Route("/health", health, methods=["GET"]),
+    Route("/ready", ready, methods=["GET"]),
+]
+
+
+def create_asgi_app(services: Optional[PlatformServices] = None, warmup: Optional[str] = None) -> Starlette:
+    """Starlette app over ``services``; ``warmup`` as for :func:`app.create_app`."""
+
+    services = services or build_services()
+    services.start_warm_up(warmup or services.config.serving.warmup)
+    backtest_executor = ThreadPoolExecutor(
+        max_workers=services.config.serving.backtest_workers, thread_name_prefix="backtest"
+    )
+
+    @asynccontextmanager
+    async def lifespan(_: Starlette) -> AsyncIterator[None]:
+        yield
+        services.stop_background_tasks()
+        backtest_executor.shutdown(wait=False, cancel_futures=True)
+
+    asgi_app = Starlette(routes=ROUTES, lifespan=lifespan)
+    asgi_app.state.services = services
+    asgi_app.state.backtest_executor = backtest_executor
+    return asgi_app
+
+
+app = create_asgi_app()
@@ -0,0 +1,46 @@
+"""Gunicorn settings for the Flask API: load models once, fork workers that share them.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+With ``preload_app`` the master imports ``app.py`` and warms up in
+``preload`` mode: embedding and reranker weights, restored snapshots and
+BM25 weights are loaded once, then every worker is forked from that state
+and shares those pages copy-on-write. Each worker runs the models once in
+``post_fork`` before it accepts requests (inference thread pools do not
+survive a fork) and ``/ready`` reports the result. One worker at a time
+drains the ingestion queue and writes the retriever snapshot; the others
+follow it (see ``quant_platform.serving``). Settings come from the
+``SERVING_*`` variables (``ServingConfig``).
+"""
+from __future__ import annotations
+
+import os
+
+from quant_platform.config import PlatformConfig
+
+_config = PlatformConfig()
+_serving = _config.serving
+
+bind = _serving.bind
+workers = _serving.workers
+timeout = _serving.timeout
+# Shard worker processes are reached over pipes that forked API workers must not share.
+preload_app = _serving.preload and _config.rag.shards == 0
+
+if preload_app:
+    # Read by ``create_app`` in the master; an explicit SERVING_WARMUP still wins.
+    os.environ.setdefault("SERVING_WARMUP", "preload")
+
+
+def _services(server):
+    return server.app.wsgi().extensions["quant_platform"]
+
+
+def when_ready(server):
+    if preload_app:
+        _services(server).prepare_fork()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        _services(server).after_fork()
@@ -1,15 +1,42 @@
-"""Quant strategy platform package exposing layered architecture components."""
-from .config import PlatformConfig
-from .llm import create_client
-from .rag import AgenticRAGPipeline
-from .ingestion import DataIngestionManager
-from .backtesting import QuantBacktestManager
-from .research import ResearchCoordinator
-from .frontend import FrontendArchitecturePlanner
-from .agents import DEFAULT_AGENT_REGISTRY
-from .virtualization import VirtualLoginSandbox
-from .architecture_layer import ArchitectureOptimiser
-from .hardware import HardwareAdapter
+"""Quant strategy platform package exposing layered architecture components.
+
+Exports resolve lazily: ``from quant_platform import HardwareAdapter`` only
+imports the hardware layer, not the RAG, LLM or backtesting stacks.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from ._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .config import PlatformConfig
+    from .llm import create_client
+    from .rag import AgenticRAGPipeline
+    from .ingestion import DataIngestionManager
+    from .backtesting import QuantBacktestManager
+    from .research import ResearchCoordinator
+    from .frontend import FrontendArchitecturePlanner
+    from .agents import DEFAULT_AGENT_REGISTRY
+    from .virtualization import VirtualLoginSandbox
+    from .architecture_layer import ArchitectureOptimiser
+    from .hardware import HardwareAdapter
+
+_EXPORTS = {
+    "PlatformConfig": ".config",
+    "create_client": ".llm.router",
+    "AgenticRAGPipeline": ".rag.agentic",
+    "DataIngestionManager": ".ingestion.sources",
+    "QuantBacktestManager": ".backtesting.manager",
+    "ResearchCoordinator": ".research.pipeline",
+    "FrontendArchitecturePlanner": ".frontend.architecture",
+    "DEFAULT_AGENT_REGISTRY": ".agents.integration",
+    "VirtualLoginSandbox": ".virtualization.sandbox",
+    "ArchitectureOptimiser": ".architecture_layer.optimizer",
+    "HardwareAdapter": ".hardware.adapter",
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
 
 __all__ = [
     "PlatformConfig",
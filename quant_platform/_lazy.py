@@ -0,0 +1,30 @@
+"""Lazy package exports (PEP 562) so importing a layer does not import all of its modules."""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Tuple
+import importlib
+import sys
+
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """Module ``__getattr__`` / ``__dir__`` resolving ``exports`` (name -> relative module) on first access.
+
+    The resolved object is stored on the package, so later lookups are
+    plain attribute reads.
+    """
+
+    def __getattr__(name: str) -> Any:
+        module_name = exports.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module_name, package), name)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[package])) | set(exports))
+
+    return __getattr__, __dir__
+
+
+__all__ = ["lazy_exports"]
@@ -1,4 +1,19 @@
 """Agent integration exports."""
-from .integration import AgentRegistry, AgentCapability, DEFAULT_AGENT_REGISTRY
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .integration import AgentRegistry, AgentCapability, DEFAULT_AGENT_REGISTRY
+
+_EXPORTS = {
+    "AgentRegistry": ".integration",
+    "AgentCapability": ".integration",
+    "DEFAULT_AGENT_REGISTRY": ".integration",
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
 
 __all__ = ["AgentRegistry", "AgentCapability", "DEFAULT_AGENT_REGISTRY"]
@@ -0,0 +1,37 @@
+"""Request argument parsing shared by the Flask (``app.py``) and ASGI (``asgi.py``) front ends.
+
+Both take plain mappings (query parameters or a decoded JSON body) and raise
+``ValueError`` for malformed values, which the routes answer with a 400.
+"""
+from __future__ import annotations
+
+from typing import Any, Mapping, Optional, Tuple
+
+from .rag.filters import MetadataFilter
+
+
+def int_arg(params: Mapping[str, Any], name: str, default: int, maximum: Optional[int] = None) -> int:
+    """Integer parameter clamped to ``[0, maximum]``; ``ValueError`` if it is not an integer."""
+
+    raw = params.get(name, default)
+    try:
+        value = max(0, int(raw))
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer, got {raw!r}") from None
+    return value if maximum is None else min(value, maximum)
+
+
+def recommend_args(payload: Mapping[str, Any]) -> Tuple[int, int, Optional[MetadataFilter]]:
+    """``rounds``, ``top_k`` and ``filters`` of a recommend request; ``ValueError`` if any is malformed."""
+
+    values = []
+    for name, default in (("rounds", 2), ("top_k", 5)):
+        raw = payload.get(name, default)
+        try:
+            values.append(int(raw))
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be an integer, got {raw!r}") from None
+    return values[0], values[1], MetadataFilter.from_dict(payload.get("filters"))
+
+
+__all__ = ["int_arg", "recommend_args"]
@@ -1,4 +1,18 @@
 """Architecture optimisation layer."""
-from .optimizer import ArchitectureOptimiser, ArchitectureReflection
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .optimizer import ArchitectureOptimiser, ArchitectureReflection
+
+_EXPORTS = {
+    "ArchitectureOptimiser": ".optimizer",
+    "ArchitectureReflection": ".optimizer",
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
 
 __all__ = ["ArchitectureOptimiser", "ArchitectureReflection"]
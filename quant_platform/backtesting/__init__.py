@@ -1,6 +1,22 @@
 """Backtesting layer for Chan-lun strategies and platform integrations."""
-from .manager import QuantBacktestManager
-from .chan import ChanLunAnalyzer, ChanSegment
-from .platforms import BacktestPlatformRegistry
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .manager import QuantBacktestManager
+    from .chan import ChanLunAnalyzer, ChanSegment
+    from .platforms import BacktestPlatformRegistry
+
+_EXPORTS = {
+    "QuantBacktestManager": ".manager",
+    "ChanLunAnalyzer": ".chan",
+    "ChanSegment": ".chan",
+    "BacktestPlatformRegistry": ".platforms",
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
 
 __all__ = ["QuantBacktestManager", "ChanLunAnalyzer", "ChanSegment", "BacktestPlatformRegistry"]
@@ -7,9 +7,12 @@ from typing import Dict, Optional
 import pandas as pd
 
 from ..config import BacktestPlatformConfig
+from ..metrics import STAGE_SECONDS
 from .chan import ChanLunAnalyzer
 from .platforms import BacktestPlatformRegistry
 
+_BACKTEST_SECONDS = STAGE_SECONDS.labels("backtest_local")
+
 
 @dataclass
 class QuantBacktestManager:
@@ -26,15 +29,16 @@ class QuantBacktestManager:
     def backtest_local(self, market_data: pd.DataFrame, initial_capital: float = 1_000_000.0) -> Dict[str, float]:
         """Run a simple Chan-lun based backtest locally."""
 
-        signals = self.analyzer.generate_signals(market_data)
-        returns = market_data["close"].pct_change().fillna(0)
-        strategy_returns = returns * signals.shift(1).fillna(0)
-        equity_curve = (1 + strategy_returns).cumprod() * initial_capital
-        return {
-            "final_equity": float(equity_curve.iloc[-1]),
-            "cumulative_return": float(equity_curve.iloc[-1] / initial_capital - 1),
-            "max_drawdown": float((equity_curve.cummax() - equity_curve).max() / equity_curve.cummax().max()),
-        }
+        with _BACKTEST_SECONDS.time():
+            signals = self.analyzer.generate_signals(market_data)
+            returns = market_data["close"].pct_change().fillna(0)
+            strategy_returns = returns * signals.shift(1).fillna(0)
+            equity_curve = (1 + strategy_returns).cumprod() * initial_capital
+            return {
+                "final_equity": float(equity_curve.iloc[-1]),
+                "cumulative_return": float(equity_curve.iloc[-1] / initial_capital - 1),
+                "max_drawdown": float((equity_curve.cummax() - equity_curve).max() / equity_curve.cummax().max()),
+            }
 
     def submit_remote(self, platform: str, strategy_code: str, params: Optional[dict] = None) -> Dict[str, str]:
         if params is None:
@@ -28,6 +28,44 @@ class LLMProviderTokens:
     qwen: Optional[str] = field(default_factory=lambda: os.getenv("QWEN_API_KEY"))
 
 
+@dataclass
+class LLMTransportConfig:
+    """Connection pooling, timeout and retry settings for LLM provider calls."""
+
+    pool_size: int = field(default_factory=lambda: int(os.getenv("LLM_HTTP_POOL_SIZE", "20")))
+    async_pool_size: int = field(default_factory=lambda: int(os.getenv("LLM_ASYNC_POOL_SIZE", "200")))
+    connect_timeout: float = field(default_factory=lambda: float(os.getenv("LLM_CONNECT_TIMEOUT", "5")))
+    read_timeout: float = field(default_factory=lambda: float(os.getenv("LLM_READ_TIMEOUT", "60")))
+    max_retries: int = field(default_factory=lambda: int(os.getenv("LLM_MAX_RETRIES", "3")))
+    backoff_base: float = field(default_factory=lambda: float(os.getenv("LLM_BACKOFF_BASE", "0.5")))
+    backoff_max: float = field(default_factory=lambda: float(os.getenv("LLM_BACKOFF_MAX", "8")))
+    http2: bool = field(default_factory=lambda: os.getenv("LLM_HTTP2", "1") not in ("0", "false", "False"))
+
+
+@dataclass
+class LLMCacheConfig:
+    """Response cache placed in front of the configured LLM client."""
+
+    enabled: bool = field(default_factory=lambda: os.getenv("LLM_CACHE", "1") not in ("0", "false", "False"))
+    path: str = field(default_factory=lambda: os.getenv("LLM_CACHE_PATH", "data/llm_cache.db"))
+    max_entries: int = field(default_factory=lambda: int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024")))
+    ttl: float = field(default_factory=lambda: float(os.getenv("LLM_CACHE_TTL", str(24 * 3600))))
+    max_temperature: float = field(default_factory=lambda: float(os.getenv("LLM_CACHE_MAX_TEMPERATURE", "0.3")))
+
+
+def _provider_limits(prefix: str) -> Dict[str, int]:
+    providers = ("openai", "anthropic", "deepseek", "qwen")
+    return {name: int(os.getenv(f"{prefix}_{name.upper()}", "0")) for name in providers}
+
+
+@dataclass
+class LLMRateLimitConfig:
+    """Per-provider request/token budgets per minute for this process (0 = unlimited)."""
+
+    requests_per_minute: Dict[str, int] = field(default_factory=lambda: _provider_limits("LLM_RPM"))
+    tokens_per_minute: Dict[str, int] = field(default_factory=lambda: _provider_limits("LLM_TPM"))
+
+
 @dataclass
 class DataSourceConfig:
     """Configuration for external financial data sources."""
@@ -39,6 +77,20 @@ class DataSourceConfig:
     aws_secret_name: Optional[str] = field(default_factory=lambda: os.getenv("AWS_SECRET_NAME"))
 
 
+@dataclass
+class IngestionConfig:
+    """Durable background queue behind ``/ingest``."""
+
+    queue: bool = field(default_factory=lambda: os.getenv("INGEST_QUEUE", "1") not in ("0", "false", "False"))
+    queue_path: str = field(default_factory=lambda: os.getenv("INGEST_QUEUE_PATH", "data/ingest_queue.db"))
+    workers: int = field(default_factory=lambda: int(os.getenv("INGEST_WORKERS", "1")))
+    batch_jobs: int = field(default_factory=lambda: int(os.getenv("INGEST_BATCH_JOBS", "8")))
+    max_attempts: int = field(default_factory=lambda: int(os.getenv("INGEST_MAX_ATTEMPTS", "5")))
+    retry_backoff: float = field(default_factory=lambda: float(os.getenv("INGEST_RETRY_BACKOFF", "5")))
+    lease_seconds: float = field(default_factory=lambda: float(os.getenv("INGEST_LEASE_SECONDS", "600")))
+    poll_interval: float = field(default_factory=lambda: float(os.getenv("INGEST_POLL_INTERVAL", "1")))
+
+
 @dataclass
 class BacktestPlatformConfig:
     """Tokens for accessing third-party backtesting services."""
@@ -52,6 +104,66 @@ class BacktestPlatformConfig:
     )
 
 
+@dataclass
+class ResearchConfig:
+    """Settings for the research coordinator and its human notes store."""
+
+    notes_db_path: str = field(
+        default_factory=lambda: os.getenv("RESEARCH_NOTES_DB", "data/research_notes.db")
+    )
+    notes_top_k: int = field(default_factory=lambda: int(os.getenv("RESEARCH_NOTES_TOP_K", "5")))
+    tool_timeout: float = field(default_factory=lambda: float(os.getenv("RESEARCH_TOOL_TIMEOUT", "10")))
+    cache_ttl: float = field(default_factory=lambda: float(os.getenv("RESEARCH_CACHE_TTL", "300")))
+
+
+@dataclass
+class RAGConfig:
+    """Prompt construction settings for the agentic RAG pipeline."""
+
+    context_tokens: int = field(default_factory=lambda: int(os.getenv("RAG_CONTEXT_TOKENS", "0")))
+    passage_tokens: int = field(default_factory=lambda: int(os.getenv("RAG_PASSAGE_TOKENS", "600")))
+    chunk_tokens: int = field(default_factory=lambda: int(os.getenv("RAG_CHUNK_TOKENS", "384")))
+    chunk_overlap: int = field(default_factory=lambda: int(os.getenv("RAG_CHUNK_OVERLAP", "64")))
+    ingest_batch: int = field(default_factory=lambda: int(os.getenv("RAG_INGEST_BATCH", "256")))
+    memory_turns: int = field(default_factory=lambda: int(os.getenv("RAG_MEMORY_TURNS", "4")))
+    memory_summary_tokens: int = field(default_factory=lambda: int(os.getenv("RAG_MEMORY_SUMMARY_TOKENS", "400")))
+    memory_ttl: float = field(default_factory=lambda: float(os.getenv("RAG_MEMORY_TTL", "1800")))
+    memory_sessions: int = field(default_factory=lambda: int(os.getenv("RAG_MEMORY_SESSIONS", "1024")))
+    answer_cache: bool = field(default_factory=lambda: os.getenv("RAG_ANSWER_CACHE", "1") not in ("0", "false", "False"))
+    answer_cache_threshold: float = field(
+        default_factory=lambda: float(os.getenv("RAG_ANSWER_CACHE_THRESHOLD", "0.92"))
+    )
+    answer_cache_size: int = field(default_factory=lambda: int(os.getenv("RAG_ANSWER_CACHE_SIZE", "512")))
+    answer_cache_ttl: float = field(default_factory=lambda: float(os.getenv("RAG_ANSWER_CACHE_TTL", "3600")))
+    vector_backend: str = field(default_factory=lambda: os.getenv("RAG_VECTOR_BACKEND", "qdrant"))
+    local_index_path: str = field(default_factory=lambda: os.getenv("RAG_LOCAL_INDEX_PATH", "data/vector_index"))
+    local_index_rescore: bool = field(
+        default_factory=lambda: os.getenv("RAG_LOCAL_INDEX_RESCORE", "0") not in ("0", "false", "False")
+    )
+    tokenizer_dict: str = field(default_factory=lambda: os.getenv("RAG_TOKENIZER_DICT", ""))
+    snapshot_path: str = field(default_factory=lambda: os.getenv("RAG_SNAPSHOT_PATH", "data/retriever_snapshot"))
+    snapshot_interval: float = field(default_factory=lambda: float(os.getenv("RAG_SNAPSHOT_INTERVAL", "300")))
+    # How often processes that do not drain the ingestion queue pick up the writer's new snapshot segments.
+    snapshot_follow_interval: float = field(
+        default_factory=lambda: float(os.getenv("RAG_SNAPSHOT_FOLLOW_INTERVAL", "5"))
+    )
+    shards: int = field(default_factory=lambda: int(os.getenv("RAG_SHARDS", "0")))
+    # Threads for embedding, search and reranking when the pipeline is driven from an event loop.
+    cpu_workers: int = field(
+        default_factory=lambda: int(os.getenv("RAG_CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+    )
+    tiered: bool = field(default_factory=lambda: os.getenv("RAG_TIERED", "0") not in ("0", "false", "False"))
+    hot_window_days: float = field(default_factory=lambda: float(os.getenv("RAG_HOT_WINDOW_DAYS", "7")))
+    hot_max_docs: int = field(default_factory=lambda: int(os.getenv("RAG_HOT_MAX_DOCS", "50000")))
+    recency_half_life_days: float = field(
+        default_factory=lambda: float(os.getenv("RAG_RECENCY_HALF_LIFE_DAYS", "0"))
+    )
+    # Cosine similarity a hot-tier hit needs to count as relevant; bge-large-zh scores
+    # unrelated passages around 0.6-0.7, so fewer than top_k hits at 0.75 queries the cold tier.
+    hot_min_score: float = field(default_factory=lambda: float(os.getenv("RAG_HOT_MIN_SCORE", "0.75")))
+    compaction_interval: float = field(default_factory=lambda: float(os.getenv("RAG_COMPACTION_INTERVAL", "600")))
+
+
 @dataclass
 class HardwareProfile:
     """Hardware adaptation profile."""
@@ -65,22 +177,51 @@ class HardwareProfile:
     )
 
 
+@dataclass
+class ServingConfig:
+    """API process settings: warm-up before serving and the gunicorn worker layout."""
+
+    # sync: load and run models before serving; background: same on a thread while /ready reports 503;
+    # preload: load weights only, forked workers run them once (gunicorn.conf.py); off: load on first request.
+    # The default keeps importing app.py/asgi.py fast; ``python app.py`` asks for sync explicitly.
+    warmup: str = field(default_factory=lambda: os.getenv("SERVING_WARMUP", "background"))
+    bind: str = field(default_factory=lambda: os.getenv("SERVING_BIND", "0.0.0.0:8000"))
+    workers: int = field(default_factory=lambda: int(os.getenv("SERVING_WORKERS", "4")))
+    preload: bool = field(default_factory=lambda: os.getenv("SERVING_PRELOAD", "1") not in ("0", "false", "False"))
+    timeout: int = field(default_factory=lambda: int(os.getenv("SERVING_TIMEOUT", "120")))
+    backtest_workers: int = field(default_factory=lambda: int(os.getenv("SERVING_BACKTEST_WORKERS", "2")))
+
+
 @dataclass
 class PlatformConfig:
     """Master configuration object aggregating all subsystems."""
 
     llm_tokens: LLMProviderTokens = field(default_factory=LLMProviderTokens)
+    llm_transport: LLMTransportConfig = field(default_factory=LLMTransportConfig)
+    llm_cache: LLMCacheConfig = field(default_factory=LLMCacheConfig)
+    llm_rate_limits: LLMRateLimitConfig = field(default_factory=LLMRateLimitConfig)
     qdrant: QdrantConfig = field(default_factory=QdrantConfig)
     data_sources: DataSourceConfig = field(default_factory=DataSourceConfig)
+    ingestion: IngestionConfig = field(default_factory=IngestionConfig)
     backtest: BacktestPlatformConfig = field(default_factory=BacktestPlatformConfig)
     hardware: HardwareProfile = field(default_factory=HardwareProfile)
+    research: ResearchConfig = field(default_factory=ResearchConfig)
+    rag: RAGConfig = field(default_factory=RAGConfig)
+    serving: ServingConfig = field(default_factory=ServingConfig)
 
 
 __all__ = [
     "PlatformConfig",
     "LLMProviderTokens",
+    "LLMTransportConfig",
+    "LLMCacheConfig",
+    "LLMRateLimitConfig",
     "QdrantConfig",
     "DataSourceConfig",
+    "IngestionConfig",
     "BacktestPlatformConfig",
     "HardwareProfile",
+    "ResearchConfig",
+    "RAGConfig",
+    "ServingConfig",
 ]
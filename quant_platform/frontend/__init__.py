@@ -1,4 +1,18 @@
 """Frontend planning tools."""
-from .architecture import FrontendArchitecturePlanner, FrontendModule
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .architecture import FrontendArchitecturePlanner, FrontendModule
+
+_EXPORTS = {
+    "FrontendArchitecturePlanner": ".architecture",
+    "FrontendModule": ".architecture",
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
 
 __all__ = ["FrontendArchitecturePlanner", "FrontendModule"]
@@ -1,4 +1,17 @@
 """Hardware adaptation exports."""
-from .adapter import HardwareAdapter
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .adapter import HardwareAdapter
+
+_EXPORTS = {
+    "HardwareAdapter": ".adapter",
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
 
 __all__ = ["HardwareAdapter"]
@@ -1,9 +1,32 @@
 """New knowledge ingestion layer."""
-from .sources import DataIngestionManager, SnowballSource, AShareIndexSource, ResearchReportSource
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .queue import IngestionJob, IngestionJobQueue, IngestionWorker
+    from .sources import DataIngestionManager, SnowballSource, AShareIndexSource, ResearchReportSource
+
+_EXPORTS = {
+    "DataIngestionManager": ".sources",
+    "SnowballSource": ".sources",
+    "AShareIndexSource": ".sources",
+    "ResearchReportSource": ".sources",
+    "IngestionJob": ".queue",
+    "IngestionJobQueue": ".queue",
+    "IngestionWorker": ".queue",
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
 
 __all__ = [
     "DataIngestionManager",
     "SnowballSource",
     "AShareIndexSource",
     "ResearchReportSource",
+    "IngestionJob",
+    "IngestionJobQueue",
+    "IngestionWorker",
 ]
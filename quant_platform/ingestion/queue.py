@@ -0,0 +1,369 @@
+"""Durable SQLite job queue that moves ingestion off the request path.
+
+``/ingest`` appends a job and returns its id; :class:`IngestionWorker`
+threads claim jobs in batches, fetch their documents and index them with
+one ``sink.ingest`` call per batch. A claimed job holds a lease: a worker
+that dies mid-batch (process killed, restart) leaves leases that expire
+and the jobs are claimed again, so every job is delivered at least once.
+A job that succeeds is never re-run; one that fails is retried with
+exponential backoff until ``max_attempts``. The database file is shared
+by every worker process pointing at ``path``, but only one process drains
+it at a time (see :class:`IngestionWorker`).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: run a single API process
+    fcntl = None  # type: ignore[assignment]
+
+from .sources import DataIngestionManager
+
+LOGGER = logging.getLogger(__name__)
+
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+_JOB_COLUMNS = (
+    "id, status, stage, attempts, max_attempts, documents, error, created_at, updated_at, finished_at, payload"
+)
+
+
+@dataclass
+class IngestionJob:
+    """A claimed job: ``payload`` holds the keyword arguments of :meth:`DataIngestionManager.collect`."""
+
+    id: str
+    payload: Dict[str, Any]
+    attempts: int
+
+
+@dataclass
+class IngestionJobQueue:
+    """Persistent queue of ingestion jobs with leases, retries and progress."""
+
+    path: str = "data/ingest_queue.db"
+    max_attempts: int = 5
+    lease_seconds: float = 600.0
+    retry_backoff: float = 5.0
+    retry_backoff_max: float = 600.0
+    _local: threading.local = field(default_factory=threading.local, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS ingest_jobs ("
+            "id TEXT PRIMARY KEY, payload TEXT NOT NULL, status TEXT NOT NULL, stage TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, max_attempts INTEGER NOT NULL, "
+            "documents INTEGER NOT NULL DEFAULT 0, error TEXT, created_at REAL NOT NULL, "
+            "updated_at REAL NOT NULL, available_at REAL NOT NULL, lease_until REAL, finished_at REAL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ingest_jobs_status ON ingest_jobs(status, available_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # A connection inherited through fork() (preloaded app) must not be used by the child.
+        if conn is None or self._local.pid != os.getpid():
+            # Autocommit; multi-statement updates use explicit BEGIN IMMEDIATE transactions.
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # IMMEDIATE takes the write lock up front so two processes cannot claim the same job.
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def enqueue(self, payload: Dict[str, Any]) -> str:
+        """Persist a job and return its id; the job survives restarts from this point on."""
+
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._connection().execute(
+            "INSERT INTO ingest_jobs(id, payload, status, stage, max_attempts, created_at, updated_at, available_at) "
+            "VALUES (?, ?, 'queued', 'queued', ?, ?, ?, ?)",
+            (job_id, json.dumps(payload, ensure_ascii=False), self.max_attempts, now, now, now),
+        )
+        return job_id
+
+    def claim(self, limit: int) -> List[IngestionJob]:
+        """Lease up to ``limit`` runnable jobs, oldest first.
+
+        Runnable means queued and past its retry backoff, or running under a
+        lease that expired because its worker died. Expired jobs that have
+        used up their attempts are marked failed instead.
+        """
+
+        now = time.time()
+        jobs: List[IngestionJob] = []
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, payload, attempts, max_attempts, status FROM ingest_jobs "
+                "WHERE (status = 'queued' AND available_at <= ?) OR (status = 'running' AND lease_until < ?) "
+                "ORDER BY created_at LIMIT ?",
+                (now, now, max(1, limit)),
+            ).fetchall()
+            for job_id, payload, attempts, max_attempts, status in rows:
+                if status == "running" and attempts >= max_attempts:
+                    conn.execute(
+                        "UPDATE ingest_jobs SET status = 'failed', stage = 'failed', lease_until = NULL, "
+                        "error = 'lease expired', updated_at = ?, finished_at = ? WHERE id = ?",
+                        (now, now, job_id),
+                    )
+                    continue
+                conn.execute(
+                    "UPDATE ingest_jobs SET status = 'running', stage = 'fetching', attempts = attempts + 1, "
+                    "lease_until = ?, updated_at = ? WHERE id = ?",
+                    (now + self.lease_seconds, now, job_id),
+                )
+                jobs.append(IngestionJob(id=job_id, payload=json.loads(payload), attempts=attempts + 1))
+        return jobs
+
+    def set_stage(self, job_ids: List[str], stage: str, documents: Optional[Dict[str, int]] = None) -> None:
+        """Record progress of running jobs and renew their leases."""
+
+        now = time.time()
+        documents = documents or {}
+        with self._transaction() as conn:
+            for job_id in job_ids:
+                conn.execute(
+                    "UPDATE ingest_jobs SET stage = ?, documents = COALESCE(?, documents), lease_until = ?, "
+                    "updated_at = ? WHERE id = ? AND status = 'running'",
+                    (stage, documents.get(job_id), now + self.lease_seconds, now, job_id),
+                )
+
+    def complete(self, documents: Dict[str, int]) -> None:
+        """Mark jobs done with the number of documents each contributed."""
+
+        now = time.time()
+        with self._transaction() as conn:
+            for job_id, count in documents.items():
+                conn.execute(
+                    "UPDATE ingest_jobs SET status = 'done', stage = 'done', documents = ?, error = NULL, "
+                    "lease_until = NULL, updated_at = ?, finished_at = ? WHERE id = ?",
+                    (count, now, now, job_id),
+                )
+
+    def fail(self, job: IngestionJob, error: str) -> None:
+        """Requeue ``job`` after a backoff, or mark it failed once its attempts are used up."""
+
+        now = time.time()
+        conn = self._connection()
+        if job.attempts >= self.max_attempts:
+            conn.execute(
+                "UPDATE ingest_jobs SET status = 'failed', stage = 'failed', error = ?, lease_until = NULL, "
+                "updated_at = ?, finished_at = ? WHERE id = ?",
+                (error, now, now, job.id),
+            )
+            LOGGER.error("Ingestion job %s failed after %d attempts: %s", job.id, job.attempts, error)
+            return
+        delay = min(self.retry_backoff_max, self.retry_backoff * 2 ** (job.attempts - 1))
+        conn.execute(
+            "UPDATE ingest_jobs SET status = 'queued', stage = 'retrying', error = ?, lease_until = NULL, "
+            "available_at = ?, updated_at = ? WHERE id = ?",
+            (error, now + delay, now, job.id),
+        )
+        LOGGER.warning("Ingestion job %s attempt %d failed, retrying in %.0fs: %s", job.id, job.attempts, delay, error)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(f"SELECT {_JOB_COLUMNS} FROM ingest_jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job_dict(row) if row else None
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        rows = self._connection().execute(
+            f"SELECT {_JOB_COLUMNS} FROM ingest_jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [self._job_dict(row) for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._connection()
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        counts.update(conn.execute("SELECT status, COUNT(*) FROM ingest_jobs GROUP BY status").fetchall())
+        oldest = conn.execute("SELECT MIN(created_at) FROM ingest_jobs WHERE status = 'queued'").fetchone()[0]
+        return {
+            "jobs": counts,
+            "oldest_queued_seconds": round(time.time() - oldest, 1) if oldest else 0.0,
+        }
+
+    @staticmethod
+    def _job_dict(row: tuple) -> Dict[str, Any]:
+        keys = [column.strip() for column in _JOB_COLUMNS.split(",")]
+        job = dict(zip(keys, row))
+        job["payload"] = json.loads(job["payload"])
+        return job
+
+
+@dataclass
+class IngestionWorker:
+    """Background threads draining an :class:`IngestionJobQueue` into the RAG sink.
+
+    Each pass claims up to ``batch_size`` jobs, fetches their documents job
+    by job (a failing fetch only retries that job) and indexes the whole
+    batch at once, so embedding and upserts run on full batches rather than
+    per request. If indexing fails, every job of the batch is retried; the
+    retrievers skip documents whose content id is already indexed, so the
+    part of the batch that made it in before the failure is not duplicated.
+
+    Every API process may start a worker, but only the one holding an
+    ``flock`` on ``<queue path>.lock`` drains the queue, so a single process
+    writes the shared index and snapshot. The others keep polling for the
+    lock and take over when its holder exits. ``on_leader`` runs once the
+    lock is won, before the first batch (e.g. to promote the process's RAG
+    pipeline to writer); ``on_indexed`` runs after each indexed batch, before
+    its jobs are marked done.
+    """
+
+    queue: IngestionJobQueue
+    manager: DataIngestionManager
+    workers: int = 1
+    batch_size: int = 8
+    poll_interval: float = 1.0
+    on_leader: Optional[Callable[[], None]] = None
+    on_indexed: Optional[Callable[[], None]] = None
+    _threads: List[threading.Thread] = field(default_factory=list, init=False, repr=False)
+    _stop: threading.Event = field(default_factory=threading.Event, init=False, repr=False)
+    _wake: threading.Event = field(default_factory=threading.Event, init=False, repr=False)
+    _drain_lock: Optional[IO[str]] = field(default=None, init=False, repr=False)
+    _drain_lock_guard: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def start(self) -> None:
+        if any(thread.is_alive() for thread in self._threads):
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._loop, name=f"ingest-worker-{index}", daemon=True)
+            for index in range(max(1, self.workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop after the batch in progress; unfinished jobs stay leased and are picked up again later."""
+
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        with self._drain_lock_guard:
+            if self._drain_lock is not None:
+                self._drain_lock.close()
+                self._drain_lock = None
+
+    @property
+    def leader(self) -> bool:
+        """Whether this process holds the drain lock."""
+
+        return self._drain_lock is not None
+
+    def _lead(self) -> bool:
+        """Take the drain lock if no other process holds it; True while this process drains the queue."""
+
+        with self._drain_lock_guard:
+            if self._drain_lock is not None:
+                return True
+            handle = open(f"{self.queue.path}.lock", "a")
+            try:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                handle.close()
+                return False
+            try:
+                # Under the guard, so no thread of this process drains before the callback has run.
+                if self.on_leader is not None:
+                    self.on_leader()
+            except BaseException:
+                handle.close()
+                raise
+            self._drain_lock = handle
+        LOGGER.info("Process %d now drains the ingestion queue", os.getpid())
+        return True
+
+    def notify(self) -> None:
+        """Wake idle workers, e.g. right after a job was enqueued."""
+
+        self._wake.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                processed = self.run_once() if self._lead() else 0
+            except Exception:  # pragma: no cover - e.g. database locked for longer than the timeout
+                LOGGER.exception("Ingestion worker pass failed")
+                processed = 0
+            if not processed:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def run_once(self) -> int:
+        """Claim and process one batch in the calling thread; return how many jobs were claimed."""
+
+        jobs = self.queue.claim(self.batch_size)
+        if not jobs:
+            return 0
+        documents: List[dict] = []
+        counts: Dict[str, int] = {}
+        fetched: List[IngestionJob] = []
+        for job in jobs:
+            try:
+                job_documents = self.manager.collect(**job.payload)
+            except Exception as exc:
+                self.queue.fail(job, f"fetch failed: {exc!r}")
+                continue
+            documents.extend(job_documents)
+            counts[job.id] = len(job_documents)
+            fetched.append(job)
+        if not fetched:
+            return len(jobs)
+        self.queue.set_stage([job.id for job in fetched], "indexing", counts)
+        try:
+            if documents:
+                self.manager.index(documents)
+        except Exception as exc:
+            for job in fetched:
+                self.queue.fail(job, f"indexing failed: {exc!r}")
+            return len(jobs)
+        if self.on_indexed is not None:
+            try:
+                self.on_indexed()
+            except Exception:  # the documents are indexed; a later save persists them
+                LOGGER.exception("Post-index hook failed")
+        self.queue.complete(counts)
+        LOGGER.info("Ingested %d documents from %d jobs", len(documents), len(fetched))
+        return len(jobs)
+
+    def drain(self) -> int:
+        """Process runnable jobs in the calling thread until none are left; return how many were claimed."""
+
+        total = 0
+        while True:
+            processed = self.run_once()
+            if not processed:
+                return total
+            total += processed
+
+
+__all__ = ["IngestionJob", "IngestionJobQueue", "IngestionWorker", "JOB_STATUSES"]
@@ -12,9 +12,13 @@ import json
 import requests
 
 from ..config import DataSourceConfig
+from ..metrics import STAGE_SECONDS
 
 LOGGER = logging.getLogger(__name__)
 
+_FETCH_SECONDS = STAGE_SECONDS.labels("ingest_fetch")
+_INDEX_SECONDS = STAGE_SECONDS.labels("ingest_index")
+
 
 class DocumentSink(Protocol):
     """Protocol representing objects capable of ingesting documents."""
@@ -100,7 +104,13 @@ class DataIngestionManager:
     config: DataSourceConfig
     sink: DocumentSink
 
-    def ingest_all(self, snowball_symbols: Iterable[str], index_symbols: Iterable[str], topics: Iterable[str]) -> None:
+    def collect(self, snowball_symbols: Iterable[str], index_symbols: Iterable[str], topics: Iterable[str]) -> List[dict]:
+        """Fetch documents from every source without indexing them."""
+
+        with _FETCH_SECONDS.time():
+            return self._collect(snowball_symbols, index_symbols, topics)
+
+    def _collect(self, snowball_symbols: Iterable[str], index_symbols: Iterable[str], topics: Iterable[str]) -> List[dict]:
         snowball = SnowballSource(cookie=self.config.snowball_cookie)
         index_source = AShareIndexSource()
         research_source = ResearchReportSource(api_token=self.config.research_api_token)
@@ -111,9 +121,18 @@ class DataIngestionManager:
         documents.extend(index_source.fetch(index_symbols))
         for topic in topics:
             documents.extend(research_source.fetch(topic))
+        return documents
 
+    def ingest_all(self, snowball_symbols: Iterable[str], index_symbols: Iterable[str], topics: Iterable[str]) -> None:
+        documents = self.collect(snowball_symbols, index_symbols, topics)
         if documents:
             LOGGER.info("Ingested %d documents", len(documents))
+            self.index(documents)
+
+    def index(self, documents: List[dict]) -> None:
+        """Push fetched documents into the sink (embedding and upserts)."""
+
+        with _INDEX_SECONDS.time():
             self.sink.ingest(documents)
 
     async def ingest_periodically(
@@ -1,5 +1,84 @@
 """LLM integration layer exposing provider selection helpers."""
-from .router import create_client, PROVIDERS
-from .base import BaseLLMClient, DummyLLMClient
+from __future__ import annotations
 
-__all__ = ["create_client", "PROVIDERS", "BaseLLMClient", "DummyLLMClient"]
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .router import (
+        PROVIDERS,
+        CircuitBreaker,
+        RoutingLLMClient,
+        acreate_client,
+        create_client,
+        create_routing_client,
+    )
+    from .base import BaseLLMClient, DummyLLMClient
+    from .cache import CachingLLMClient
+    from .ratelimit import (
+        BATCH_PRIORITY,
+        INTERACTIVE_PRIORITY,
+        ProviderRateLimiter,
+        RateLimitedLLMClient,
+        rate_limit_metrics,
+        rate_limited,
+    )
+    from .transport import (
+        AsyncHTTPTransport,
+        HTTPTransport,
+        LLMRequestError,
+        configure_transport,
+        get_shared_async_transport,
+        get_shared_transport,
+    )
+
+_EXPORTS = {
+    "PROVIDERS": ".router",
+    "CircuitBreaker": ".router",
+    "RoutingLLMClient": ".router",
+    "acreate_client": ".router",
+    "create_client": ".router",
+    "create_routing_client": ".router",
+    "BaseLLMClient": ".base",
+    "DummyLLMClient": ".base",
+    "CachingLLMClient": ".cache",
+    "BATCH_PRIORITY": ".ratelimit",
+    "INTERACTIVE_PRIORITY": ".ratelimit",
+    "ProviderRateLimiter": ".ratelimit",
+    "RateLimitedLLMClient": ".ratelimit",
+    "rate_limit_metrics": ".ratelimit",
+    "rate_limited": ".ratelimit",
+    "AsyncHTTPTransport": ".transport",
+    "HTTPTransport": ".transport",
+    "LLMRequestError": ".transport",
+    "configure_transport": ".transport",
+    "get_shared_async_transport": ".transport",
+    "get_shared_transport": ".transport",
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+__all__ = [
+    "create_client",
+    "acreate_client",
+    "create_routing_client",
+    "CircuitBreaker",
+    "RoutingLLMClient",
+    "PROVIDERS",
+    "BaseLLMClient",
+    "DummyLLMClient",
+    "CachingLLMClient",
+    "BATCH_PRIORITY",
+    "INTERACTIVE_PRIORITY",
+    "ProviderRateLimiter",
+    "RateLimitedLLMClient",
+    "rate_limit_metrics",
+    "rate_limited",
+    "AsyncHTTPTransport",
+    "HTTPTransport",
+    "LLMRequestError",
+    "configure_transport",
+    "get_shared_async_transport",
+    "get_shared_transport",
+]
@@ -2,12 +2,27 @@
 from __future__ import annotations
 
 import abc
-from typing import Any, Dict, Optional
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional
+
+from ..metrics import FALLBACKS
+
+_DUMMY_CALLS = FALLBACKS.labels("dummy_llm")
+
+
+@dataclass
+class LLMCompletion:
+    """Generated text plus the token usage reported by the provider, if any."""
+
+    text: str
+    total_tokens: Optional[int] = None
 
 
 class BaseLLMClient(abc.ABC):
     """Abstract base class defining the minimal LLM interface."""
 
+    provider: str = "base"
     model: Optional[str] = None
 
     def __init__(self, token: Optional[str], model: Optional[str] = None) -> None:
@@ -19,14 +34,42 @@ class BaseLLMClient(abc.ABC):
     def generate(self, prompt: str, **kwargs: Any) -> str:
         """Generate text for the given ``prompt`` using provider specific APIs."""
 
+    async def agenerate(self, prompt: str, **kwargs: Any) -> str:
+        """Coroutine variant of :meth:`generate`.
+
+        Providers with a native async transport override this; the default runs
+        :meth:`generate` on the default executor so every client is awaitable.
+        """
+
+        return await asyncio.to_thread(self.generate, prompt, **kwargs)
+
+    def complete(self, prompt: str, **kwargs: Any) -> LLMCompletion:
+        """Like :meth:`generate` but also returns provider token usage when known."""
+
+        return LLMCompletion(text=self.generate(prompt, **kwargs))
+
+    async def acomplete(self, prompt: str, **kwargs: Any) -> LLMCompletion:
+        return LLMCompletion(text=await self.agenerate(prompt, **kwargs))
+
+    def stream(self, prompt: str, **kwargs: Any) -> Iterator[str]:
+        """Yield the response incrementally; providers without streaming yield it whole."""
+
+        yield self.generate(prompt, **kwargs)
+
 
 class DummyLLMClient(BaseLLMClient):
     """Fallback client used when provider credentials are unavailable."""
 
+    provider = "dummy"
+
     def generate(self, prompt: str, **kwargs: Any) -> str:  # type: ignore[override]
+        _DUMMY_CALLS.inc()
         suffix = kwargs.get("suffix", "")
         return f"[dummy-response]{prompt}{suffix}"[:512]
 
+    async def agenerate(self, prompt: str, **kwargs: Any) -> str:  # type: ignore[override]
+        return self.generate(prompt, **kwargs)
+
 
 def ensure_token_available(token: Optional[str], provider_name: str) -> None:
     """Raise a helpful error when the provider token is missing."""
@@ -0,0 +1,261 @@
+"""Response caching decorator for LLM clients."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from ..metrics import CACHE_EVENTS
+from .base import BaseLLMClient
+
+LOGGER = logging.getLogger(__name__)
+
+_CACHE_STATS = ("memory_hits", "disk_hits", "misses", "bypassed", "coalesced")
+_CACHE_EVENTS = {stat: CACHE_EVENTS.labels("llm", stat) for stat in _CACHE_STATS}
+
+
+def normalise_prompt(prompt: str) -> str:
+    """Canonical prompt form: NFKC normalised with whitespace runs collapsed."""
+
+    return " ".join(unicodedata.normalize("NFKC", prompt).split())
+
+
+@dataclass
+class _DiskStore:
+    """SQLite key/value table holding cached responses with expiry times."""
+
+    path: str
+    _local: threading.local = field(default_factory=threading.local, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # A connection inherited through fork() (preloaded app) must not be used by the child.
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def put(self, key: str, value: str, expires_at: float) -> None:
+        with self._connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO llm_cache(key, value, expires_at) VALUES (?, ?, ?)", (key, value, expires_at))
+
+    def purge_expired(self) -> int:
+        with self._connection() as conn:
+            return conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+
+
+class CachingLLMClient(BaseLLMClient):
+    """Serve repeated prompts from a bounded in-memory LRU backed by SQLite.
+
+    Entries are keyed by provider, model, temperature, the remaining call
+    options and the hash of the normalised prompt, and expire after ``ttl``
+    seconds. Calls whose temperature exceeds ``max_temperature`` (or that pass
+    ``cache=False``) bypass the cache. Concurrent identical calls share one
+    upstream request.
+    """
+
+    def __init__(
+        self,
+        inner: BaseLLMClient,
+        path: Optional[str] = "data/llm_cache.db",
+        max_entries: int = 1024,
+        ttl: float = 24 * 3600,
+        max_temperature: float = 0.3,
+    ) -> None:
+        super().__init__(token=inner.token, model=inner.model)
+        self.inner = inner
+        self.provider = inner.provider
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_temperature = max_temperature
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._disk = _DiskStore(path) if path else None
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._ainflight: Dict[Tuple[int, str], asyncio.Future] = {}
+        self._stats = dict.fromkeys(_CACHE_STATS, 0)
+
+    def cache_key(self, prompt: str, **kwargs: Any) -> str:
+        options = {k: v for k, v in kwargs.items() if k not in ("model", "temperature", "priority")}
+        material = json.dumps(
+            [
+                self.provider,
+                kwargs.get("model", self.inner.model),
+                kwargs.get("temperature"),
+                options,
+                normalise_prompt(prompt),
+            ],
+            ensure_ascii=False,
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _cacheable(self, kwargs: Dict[str, Any]) -> bool:
+        if not kwargs.pop("cache", True):
+            return False
+        temperature = kwargs.get("temperature")
+        return temperature is None or float(temperature) <= self.max_temperature
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
+        _CACHE_EVENTS[stat].inc()
+
+    def _lookup(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    _CACHE_EVENTS["memory_hits"].inc()
+                    return value
+                del self._memory[key]
+        if self._disk is not None:
+            stored = self._disk.get(key)
+            if stored is not None:
+                self._remember(key, *stored)
+                self._count("disk_hits")
+                return stored[0]
+        return None
+
+    def _remember(self, key: str, value: str, expires_at: float) -> None:
+        with self._lock:
+            self._memory[key] = (value, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _store(self, key: str, value: str) -> None:
+        expires_at = time.time() + self.ttl
+        self._remember(key, value, expires_at)
+        if self._disk is not None:
+            try:
+                self._disk.put(key, value, expires_at)
+            except sqlite3.Error as exc:  # pragma: no cover - disk full / locked
+                LOGGER.warning("Failed to persist LLM cache entry: %s", exc)
+
+    def generate(self, prompt: str, **kwargs: Any) -> str:  # type: ignore[override]
+        if not self._cacheable(kwargs):
+            self._count("bypassed")
+            return self.inner.generate(prompt, **kwargs)
+        key = self.cache_key(prompt, **kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        with self._lock:
+            leader = self._inflight.get(key)
+            if leader is None:
+                future: Future = Future()
+                self._inflight[key] = future
+        if leader is not None:
+            self._count("coalesced")
+            return leader.result()
+        self._count("misses")
+        try:
+            value = self.inner.generate(prompt, **kwargs)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            self._store(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    async def agenerate(self, prompt: str, **kwargs: Any) -> str:  # type: ignore[override]
+        if not self._cacheable(kwargs):
+            self._count("bypassed")
+            return await self.inner.agenerate(prompt, **kwargs)
+        key = self.cache_key(prompt, **kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        leader = self._ainflight.get(flight_key)
+        if leader is not None:
+            self._count("coalesced")
+            return await asyncio.shield(leader)
+        future = loop.create_future()
+        self._ainflight[flight_key] = future
+        self._count("misses")
+        try:
+            value = await self.inner.agenerate(prompt, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark retrieved so a failure nobody waited on does not warn at GC time.
+            future.exception()
+            raise
+        else:
+            self._store(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            self._ainflight.pop(flight_key, None)
+
+    def stream(self, prompt: str, **kwargs: Any) -> Iterator[str]:  # type: ignore[override]
+        """Replay a cached answer in one chunk, or stream upstream and cache the full text."""
+
+        if not self._cacheable(kwargs):
+            self._count("bypassed")
+            yield from self.inner.stream(prompt, **kwargs)
+            return
+        key = self.cache_key(prompt, **kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            yield cached
+            return
+        self._count("misses")
+        chunks = []
+        for chunk in self.inner.stream(prompt, **kwargs):
+            chunks.append(chunk)
+            yield chunk
+        self._store(key, "".join(chunks))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, memory_entries=len(self._memory))
+
+    def purge_expired(self) -> int:
+        """Drop expired entries from the on-disk store."""
+
+        return self._disk.purge_expired() if self._disk is not None else 0
+
+
+__all__ = ["CachingLLMClient", "normalise_prompt"]
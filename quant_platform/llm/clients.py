@@ -1,103 +1,204 @@
 """Provider specific LLM client implementations."""
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, Optional
 
+import abc
 import json
 import logging
 
-import requests
-
-from .base import BaseLLMClient, DummyLLMClient, ensure_token_available
+from ..metrics import LLM_REQUEST_SECONDS
+from .base import BaseLLMClient, DummyLLMClient, LLMCompletion, ensure_token_available
+from .transport import (
+    AsyncHTTPTransport,
+    HTTPTransport,
+    LLMRequestError,
+    get_shared_async_transport,
+    get_shared_transport,
+    iter_sse_data,
+)
 
 LOGGER = logging.getLogger(__name__)
 
 
-class OpenAIClient(BaseLLMClient):
+class HTTPLLMClient(BaseLLMClient):
+    """Shared request flow for providers exposing a JSON-over-HTTPS completion API.
+
+    Subclasses describe the provider specific headers, payload and response
+    shape; the pooled :class:`HTTPTransport` (or :class:`AsyncHTTPTransport` for
+    :meth:`agenerate`) handles keep-alive, timeouts and retries. Failures
+    surface as :class:`LLMRequestError` instead of dummy text.
+    """
+
+    provider = "http"
+    api_base = ""
+
+    def __init__(
+        self,
+        token: Optional[str],
+        model: Optional[str] = None,
+        transport: HTTPTransport | None = None,
+        async_transport: AsyncHTTPTransport | None = None,
+    ) -> None:
+        super().__init__(token=token, model=model)
+        self._transport = transport
+        self._async_transport = async_transport
+
+    @property
+    def transport(self) -> HTTPTransport:
+        return self._transport or get_shared_transport()
+
+    @property
+    def async_transport(self) -> AsyncHTTPTransport:
+        return self._async_transport or get_shared_async_transport()
+
+    def _headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}", "Content-Type": "application/json"}
+
+    @abc.abstractmethod
+    def _payload(self, prompt: str, **kwargs: Any) -> dict:
+        """Provider specific JSON request body for ``prompt``."""
+
+    @abc.abstractmethod
+    def _parse(self, data: dict) -> str:
+        """Completion text from a decoded provider response."""
+
+    def _usage(self, data: dict) -> Optional[int]:
+        usage = data.get("usage") or {}
+        if "total_tokens" in usage:
+            return int(usage["total_tokens"])
+        parts = [usage.get(key) for key in ("prompt_tokens", "completion_tokens", "input_tokens", "output_tokens")]
+        known = [int(part) for part in parts if part is not None]
+        return sum(known) if known else None
+
+    def complete(self, prompt: str, **kwargs: Any) -> LLMCompletion:  # type: ignore[override]
+        ensure_token_available(self.token, self.provider)
+        with LLM_REQUEST_SECONDS.labels(self.provider).time():
+            data = self.transport.post_json(
+                self.api_base, self._headers(), self._payload(prompt, **kwargs), provider=self.provider
+            )
+        return LLMCompletion(text=self._parse(data), total_tokens=self._usage(data))
+
+    async def acomplete(self, prompt: str, **kwargs: Any) -> LLMCompletion:  # type: ignore[override]
+        ensure_token_available(self.token, self.provider)
+        with LLM_REQUEST_SECONDS.labels(self.provider).time():
+            data = await self.async_transport.apost_json(
+                self.api_base, self._headers(), self._payload(prompt, **kwargs), provider=self.provider
+            )
+        return LLMCompletion(text=self._parse(data), total_tokens=self._usage(data))
+
+    def _stream_headers(self) -> Dict[str, str]:
+        return dict(self._headers(), Accept="text/event-stream")
+
+    def _stream_payload(self, prompt: str, **kwargs: Any) -> dict:
+        return dict(self._payload(prompt, **kwargs), stream=True)
+
+    def _parse_stream_event(self, event: dict) -> Optional[str]:
+        """Extract the text delta from one decoded SSE event (``None`` if it carries none)."""
+
+        choices = event.get("choices") or [{}]
+        return (choices[0].get("delta") or {}).get("content")
+
+    def stream(self, prompt: str, **kwargs: Any) -> Iterator[str]:  # type: ignore[override]
+        ensure_token_available(self.token, self.provider)
+        # Covers the whole stream, up to the last chunk or until the consumer stops reading.
+        with LLM_REQUEST_SECONDS.labels(self.provider).time():
+            lines = self.transport.stream_lines(
+                self.api_base, self._stream_headers(), self._stream_payload(prompt, **kwargs), provider=self.provider
+            )
+            for data in iter_sse_data(lines):
+                try:
+                    event = json.loads(data)
+                except ValueError:
+                    LOGGER.debug("Skipping non-JSON SSE payload from %s: %s", self.provider, data[:80])
+                    continue
+                if isinstance(event, dict) and event.get("error"):
+                    raise LLMRequestError(self.provider, f"stream error: {event['error']}")
+                delta = self._parse_stream_event(event)
+                if delta:
+                    yield delta
+
+    def generate(self, prompt: str, **kwargs: Any) -> str:  # type: ignore[override]
+        return self.complete(prompt, **kwargs).text
+
+    async def agenerate(self, prompt: str, **kwargs: Any) -> str:  # type: ignore[override]
+        return (await self.acomplete(prompt, **kwargs)).text
+
+
+class OpenAIClient(HTTPLLMClient):
     """Wrapper around the OpenAI completion API."""
 
+    provider = "openai"
     model = "gpt-4o-mini"
     api_base = "https://api.openai.com/v1/chat/completions"
 
-    def generate(self, prompt: str, **kwargs: Any) -> str:  # type: ignore[override]
-        ensure_token_available(self.token, "openai")
-        headers = {"Authorization": f"Bearer {self.token}", "Content-Type": "application/json"}
-        payload = {
+    def _payload(self, prompt: str, **kwargs: Any) -> dict:
+        return {
             "model": kwargs.get("model", self.model),
             "messages": [{"role": "user", "content": prompt}],
             "temperature": kwargs.get("temperature", 0.2),
         }
-        try:
-            response = requests.post(self.api_base, headers=headers, data=json.dumps(payload), timeout=60)
-            response.raise_for_status()
-        except requests.RequestException as exc:  # pragma: no cover - network path
-            LOGGER.warning("OpenAI request failed: %s", exc)
-            return DummyLLMClient(token=None).generate(prompt)
-        data = response.json()
+
+    def _parse(self, data: dict) -> str:
         return data["choices"][0]["message"]["content"]
 
 
-class AnthropicClient(BaseLLMClient):
+class AnthropicClient(HTTPLLMClient):
     """Wrapper for Anthropic's Claude completion API."""
 
+    provider = "anthropic"
     model = "claude-3-sonnet-20240229"
     api_base = "https://api.anthropic.com/v1/messages"
 
-    def generate(self, prompt: str, **kwargs: Any) -> str:  # type: ignore[override]
-        ensure_token_available(self.token, "anthropic")
-        headers = {
+    def _headers(self) -> Dict[str, str]:
+        return {
             "x-api-key": self.token or "",
             "anthropic-version": "2023-06-01",
             "content-type": "application/json",
         }
-        payload = {
+
+    def _payload(self, prompt: str, **kwargs: Any) -> dict:
+        return {
             "model": kwargs.get("model", self.model),
             "max_tokens": kwargs.get("max_tokens", 1024),
             "messages": [{"role": "user", "content": prompt}],
         }
-        try:
-            response = requests.post(self.api_base, headers=headers, data=json.dumps(payload), timeout=60)
-            response.raise_for_status()
-        except requests.RequestException as exc:  # pragma: no cover - network path
-            LOGGER.warning("Anthropic request failed: %s", exc)
-            return DummyLLMClient(token=None).generate(prompt)
-        data = response.json()
+
+    def _parse(self, data: dict) -> str:
         return data.get("content", [{}])[0].get("text", "")
 
+    def _parse_stream_event(self, event: dict) -> Optional[str]:
+        if event.get("type") == "content_block_delta":
+            return (event.get("delta") or {}).get("text")
+        return None
+
 
-class DeepSeekClient(BaseLLMClient):
+class DeepSeekClient(HTTPLLMClient):
     """Client for DeepSeek's completion endpoint."""
 
+    provider = "deepseek"
     model = "deepseek-chat"
     api_base = "https://api.deepseek.com/chat/completions"
 
-    def generate(self, prompt: str, **kwargs: Any) -> str:  # type: ignore[override]
-        ensure_token_available(self.token, "deepseek")
-        headers = {"Authorization": f"Bearer {self.token}", "Content-Type": "application/json"}
-        payload = {
+    def _payload(self, prompt: str, **kwargs: Any) -> dict:
+        return {
             "model": kwargs.get("model", self.model),
             "messages": [{"role": "user", "content": prompt}],
         }
-        try:
-            response = requests.post(self.api_base, headers=headers, data=json.dumps(payload), timeout=60)
-            response.raise_for_status()
-        except requests.RequestException as exc:  # pragma: no cover
-            LOGGER.warning("DeepSeek request failed: %s", exc)
-            return DummyLLMClient(token=None).generate(prompt)
-        data = response.json()
+
+    def _parse(self, data: dict) -> str:
         return data["choices"][0]["message"]["content"]
 
 
-class QwenClient(BaseLLMClient):
+class QwenClient(HTTPLLMClient):
     """Tongyi Qianwen client."""
 
+    provider = "qwen"
     model = "qwen-plus"
     api_base = "https://dashscope.aliyuncs.com/api/v1/services/aigc/text-generation/generation"
 
-    def generate(self, prompt: str, **kwargs: Any) -> str:  # type: ignore[override]
-        ensure_token_available(self.token, "qwen")
-        headers = {"Authorization": f"Bearer {self.token}", "Content-Type": "application/json"}
-        payload = {
+    def _payload(self, prompt: str, **kwargs: Any) -> dict:
+        return {
             "model": kwargs.get("model", self.model),
             "input": {
                 "messages": [
@@ -106,18 +207,25 @@ class QwenClient(BaseLLMClient):
                 ]
             },
         }
-        try:
-            response = requests.post(self.api_base, headers=headers, data=json.dumps(payload), timeout=60)
-            response.raise_for_status()
-        except requests.RequestException as exc:  # pragma: no cover
-            LOGGER.warning("Qwen request failed: %s", exc)
-            return DummyLLMClient(token=None).generate(prompt)
-        data = response.json()
-        output = data.get("output", {})
-        return output.get("text", "") or DummyLLMClient(token=None).generate(prompt)
+
+    def _parse(self, data: dict) -> str:
+        text = data.get("output", {}).get("text", "")
+        if not text:
+            raise LLMRequestError(self.provider, "empty output in response")
+        return text
+
+    def _stream_headers(self) -> Dict[str, str]:
+        return dict(self._headers(), Accept="text/event-stream", **{"X-DashScope-SSE": "enable"})
+
+    def _stream_payload(self, prompt: str, **kwargs: Any) -> dict:
+        return dict(self._payload(prompt, **kwargs), parameters={"incremental_output": True})
+
+    def _parse_stream_event(self, event: dict) -> Optional[str]:
+        return (event.get("output") or {}).get("text")
 
 
 __all__ = [
+    "HTTPLLMClient",
     "OpenAIClient",
     "AnthropicClient",
     "DeepSeekClient",
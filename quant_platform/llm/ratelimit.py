@@ -0,0 +1,289 @@
+"""Per-provider request and token rate limiting for LLM clients."""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..config import LLMRateLimitConfig
+from ..metrics import LLM_QUEUE_SECONDS
+from .base import BaseLLMClient, LLMCompletion
+
+_CJK_PATTERN = re.compile(r"[\u3000-\u303f\u3400-\u9fff\uff00-\uffef]")
+
+# Queue priorities (lower is admitted first): requests a user is waiting on
+# go ahead of batch work such as offline evaluation.
+INTERACTIVE_PRIORITY = 0
+BATCH_PRIORITY = 10
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate: one token per CJK character, one per four other characters."""
+
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+@dataclass
+class TokenBucket:
+    """Classic token bucket; ``adjust`` may push the level negative to record debt."""
+
+    capacity: float
+    refill_per_second: float
+    _level: float = field(init=False)
+    _updated: float = field(default_factory=time.monotonic, init=False)
+
+    def __post_init__(self) -> None:
+        self._level = self.capacity
+
+    def _refill(self, now: float) -> None:
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` (capped at capacity) can be taken."""
+
+        self._refill(now)
+        missing = min(amount, self.capacity) - self._level
+        return 0.0 if missing <= 0 else missing / self.refill_per_second
+
+    def consume(self, amount: float) -> None:
+        self._level -= amount
+
+    def adjust(self, delta: float) -> None:
+        self._level = min(self.capacity, self._level + delta)
+
+
+@dataclass
+class ProviderRateLimiter:
+    """Requests-per-minute and tokens-per-minute budget for one provider.
+
+    Callers over budget wait in a priority queue (lower ``priority`` first,
+    FIFO within a priority) instead of failing. Limits are per process, so a
+    deployment with N workers should configure 1/N of the provider quota.
+    Queue waits are exported as ``quant_platform_llm_queue_seconds``.
+    """
+
+    requests_per_minute: int = 0
+    tokens_per_minute: int = 0
+    provider: str = "default"
+    _requests: Optional[TokenBucket] = field(default=None, init=False, repr=False)
+    _tokens: Optional[TokenBucket] = field(default=None, init=False, repr=False)
+    _queue: List[Tuple[int, int]] = field(default_factory=list, init=False, repr=False)
+    _sequence: Any = field(default_factory=itertools.count, init=False, repr=False)
+    _condition: threading.Condition = field(default_factory=threading.Condition, init=False, repr=False)
+    _metrics: Dict[str, float] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.requests_per_minute > 0:
+            self._requests = TokenBucket(self.requests_per_minute, self.requests_per_minute / 60.0)
+        if self.tokens_per_minute > 0:
+            self._tokens = TokenBucket(self.tokens_per_minute, self.tokens_per_minute / 60.0)
+        self._metrics = {"admitted": 0, "queued": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+
+    def _try_admit(self, ticket: Tuple[int, int], tokens: int) -> float:
+        """Admit ``ticket`` if it heads the queue and budget allows; else return seconds to wait.
+
+        Must be called with the condition held.
+        """
+
+        if self._queue[0] != ticket:
+            return 0.05
+        now = time.monotonic()
+        delay = 0.0
+        if self._requests is not None:
+            delay = max(delay, self._requests.wait_time(1, now))
+        if self._tokens is not None:
+            delay = max(delay, self._tokens.wait_time(tokens, now))
+        if delay > 0:
+            return delay
+        if self._requests is not None:
+            self._requests.consume(1)
+        if self._tokens is not None:
+            self._tokens.consume(tokens)
+        heapq.heappop(self._queue)
+        return 0.0
+
+    def _enqueue(self, priority: int) -> Tuple[int, int]:
+        ticket = (priority, next(self._sequence))
+        heapq.heappush(self._queue, ticket)
+        return ticket
+
+    def _drop(self, ticket: Tuple[int, int]) -> None:
+        """Forget ``ticket`` if its caller gave up before admission. Must be called with the condition held."""
+
+        if ticket in self._queue:
+            self._queue.remove(ticket)
+            heapq.heapify(self._queue)
+            self._condition.notify_all()
+
+    def _record_wait(self, waited: float, priority: int) -> None:
+        label = "interactive" if priority <= INTERACTIVE_PRIORITY else "batch"
+        LLM_QUEUE_SECONDS.labels(self.provider, label).observe(waited)
+        self._metrics["admitted"] += 1
+        if waited > 0.001:
+            self._metrics["queued"] += 1
+        self._metrics["wait_seconds_total"] += waited
+        self._metrics["wait_seconds_max"] = max(self._metrics["wait_seconds_max"], waited)
+
+    def acquire(self, tokens: int, priority: int = 0) -> float:
+        """Block until the call may proceed; return the time spent queued."""
+
+        started = time.monotonic()
+        with self._condition:
+            ticket = self._enqueue(priority)
+            try:
+                while True:
+                    delay = self._try_admit(ticket, tokens)
+                    if delay == 0.0:
+                        waited = time.monotonic() - started
+                        self._record_wait(waited, priority)
+                        self._condition.notify_all()
+                        return waited
+                    self._condition.wait(timeout=delay)
+            finally:
+                # An interrupted waiter must not stay at the head and block everyone behind it.
+                self._drop(ticket)
+
+    async def aacquire(self, tokens: int, priority: int = 0) -> float:
+        """Coroutine variant of :meth:`acquire` that sleeps on the event loop."""
+
+        started = time.monotonic()
+        with self._condition:
+            ticket = self._enqueue(priority)
+        try:
+            while True:
+                with self._condition:
+                    delay = self._try_admit(ticket, tokens)
+                    if delay == 0.0:
+                        waited = time.monotonic() - started
+                        self._record_wait(waited, priority)
+                        self._condition.notify_all()
+                        return waited
+                await asyncio.sleep(min(delay, 0.05))
+        finally:
+            with self._condition:
+                self._drop(ticket)
+
+    def reconcile(self, estimated: int, actual: Optional[int]) -> None:
+        """Correct the token bucket once the provider reports real usage."""
+
+        if self._tokens is None or actual is None:
+            return
+        with self._condition:
+            self._tokens.adjust(estimated - actual)
+            self._condition.notify_all()
+
+    def metrics(self) -> Dict[str, float]:
+        with self._condition:
+            return dict(self._metrics, queue_depth=len(self._queue))
+
+
+class RateLimitedLLMClient(BaseLLMClient):
+    """Queue calls to ``inner`` so they stay within its provider's budget.
+
+    The token cost of a call is estimated from the prompt plus ``max_tokens``
+    (or ``default_completion_tokens``) and corrected from the usage fields of
+    the response. Pass ``priority=`` (:data:`INTERACTIVE_PRIORITY` or
+    :data:`BATCH_PRIORITY`) to order queued calls; lower goes first.
+    """
+
+    def __init__(
+        self, inner: BaseLLMClient, limiter: ProviderRateLimiter, default_completion_tokens: int = 512
+    ) -> None:
+        super().__init__(token=inner.token, model=inner.model)
+        self.inner = inner
+        self.provider = inner.provider
+        self.limiter = limiter
+        self.default_completion_tokens = default_completion_tokens
+
+    def _estimate(self, prompt: str, kwargs: Dict[str, Any]) -> int:
+        return estimate_tokens(prompt) + int(kwargs.get("max_tokens", self.default_completion_tokens))
+
+    def complete(self, prompt: str, **kwargs: Any) -> LLMCompletion:  # type: ignore[override]
+        priority = int(kwargs.pop("priority", 0))
+        estimated = self._estimate(prompt, kwargs)
+        self.limiter.acquire(estimated, priority=priority)
+        completion = self.inner.complete(prompt, **kwargs)
+        self.limiter.reconcile(estimated, completion.total_tokens)
+        return completion
+
+    async def acomplete(self, prompt: str, **kwargs: Any) -> LLMCompletion:  # type: ignore[override]
+        priority = int(kwargs.pop("priority", 0))
+        estimated = self._estimate(prompt, kwargs)
+        await self.limiter.aacquire(estimated, priority=priority)
+        completion = await self.inner.acomplete(prompt, **kwargs)
+        self.limiter.reconcile(estimated, completion.total_tokens)
+        return completion
+
+    def stream(self, prompt: str, **kwargs: Any) -> Iterator[str]:  # type: ignore[override]
+        priority = int(kwargs.pop("priority", 0))
+        estimated = self._estimate(prompt, kwargs)
+        self.limiter.acquire(estimated, priority=priority)
+        produced = []
+        try:
+            for chunk in self.inner.stream(prompt, **kwargs):
+                produced.append(chunk)
+                yield chunk
+        finally:
+            # Streams carry no usage block, so settle with the local estimate of the output,
+            # also when the consumer stops reading or the provider fails mid-stream.
+            self.limiter.reconcile(estimated, estimate_tokens(prompt) + estimate_tokens("".join(produced)))
+
+    def generate(self, prompt: str, **kwargs: Any) -> str:  # type: ignore[override]
+        return self.complete(prompt, **kwargs).text
+
+    async def agenerate(self, prompt: str, **kwargs: Any) -> str:  # type: ignore[override]
+        return (await self.acomplete(prompt, **kwargs)).text
+
+
+_LIMITERS: Dict[str, ProviderRateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(provider: str, config: LLMRateLimitConfig) -> Optional[ProviderRateLimiter]:
+    """Return the process-wide limiter for ``provider``, or ``None`` when it is unlimited."""
+
+    rpm = config.requests_per_minute.get(provider, 0)
+    tpm = config.tokens_per_minute.get(provider, 0)
+    if rpm <= 0 and tpm <= 0:
+        return None
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(provider)
+        if limiter is None:
+            limiter = ProviderRateLimiter(requests_per_minute=rpm, tokens_per_minute=tpm, provider=provider)
+            _LIMITERS[provider] = limiter
+        return limiter
+
+
+def rate_limited(client: BaseLLMClient, config: LLMRateLimitConfig) -> BaseLLMClient:
+    """Wrap ``client`` in its provider's limiter when limits are configured."""
+
+    limiter = get_rate_limiter(client.provider, config)
+    return client if limiter is None else RateLimitedLLMClient(client, limiter)
+
+
+def rate_limit_metrics() -> Dict[str, Dict[str, float]]:
+    """Queue wait statistics for every active provider limiter."""
+
+    with _LIMITERS_LOCK:
+        limiters = dict(_LIMITERS)
+    return {provider: limiter.metrics() for provider, limiter in limiters.items()}
+
+
+__all__ = [
+    "BATCH_PRIORITY",
+    "INTERACTIVE_PRIORITY",
+    "ProviderRateLimiter",
+    "RateLimitedLLMClient",
+    "TokenBucket",
+    "estimate_tokens",
+    "get_rate_limiter",
+    "rate_limit_metrics",
+    "rate_limited",
+]
@@ -1,10 +1,20 @@
 """Routing utilities to dynamically select LLM providers."""
 from __future__ import annotations
 
-from typing import Dict, Type
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Type
 
 from .base import BaseLLMClient, DummyLLMClient
-from .clients import AnthropicClient, DeepSeekClient, OpenAIClient, QwenClient
+from .transport import LLMRequestError, httpx_available
+from .clients import AnthropicClient, DeepSeekClient, HTTPLLMClient, OpenAIClient, QwenClient
+
+LOGGER = logging.getLogger(__name__)
 
 PROVIDERS: Dict[str, Type[BaseLLMClient]] = {
     "openai": OpenAIClient,
@@ -24,4 +34,343 @@ def create_client(provider: str, token: str | None = None, model: str | None = N
     return client_cls(token=token, model=model)
 
 
-__all__ = ["create_client", "PROVIDERS"]
+async def acreate_client(provider: str, token: str | None = None, model: str | None = None) -> BaseLLMClient:
+    """Create a provider client for use from coroutines.
+
+    The shared async connection pool is bound to the running event loop up
+    front so the first ``agenerate`` call does not pay for pool creation.
+    """
+
+    client = create_client(provider, token=token, model=model)
+    if isinstance(client, HTTPLLMClient) and httpx_available():
+        client.async_transport.client()
+    return client
+
+
+@dataclass
+class CircuitBreaker:
+    """Stop routing to a provider after ``failure_threshold`` consecutive failures.
+
+    After ``reset_timeout`` seconds a single trial call is let through
+    (half-open); its outcome closes or re-opens the breaker.
+    """
+
+    failure_threshold: int = 5
+    reset_timeout: float = 30.0
+    _failures: int = field(default=0, init=False)
+    _opened_at: Optional[float] = field(default=None, init=False)
+    _trial_in_flight: bool = field(default=False, init=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def available(self) -> bool:
+        """Whether a call could be admitted right now, without claiming a trial slot."""
+
+        state = self.state
+        return state == "closed" or (state == "half-open" and not self._trial_in_flight)
+
+    def allow(self) -> bool:
+        """Admit a call, claiming the half-open trial slot if needed."""
+
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def record_cancelled(self) -> None:
+        with self._lock:
+            self._trial_in_flight = False
+
+
+@dataclass
+class ProviderStats:
+    """Rolling window of call latencies and outcomes for one provider."""
+
+    window: int = 50
+    _samples: Deque[Tuple[float, bool]] = field(init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._samples = deque(maxlen=self.window)
+
+    def record(self, latency: float, ok: bool) -> None:
+        with self._lock:
+            self._samples.append((latency, ok))
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            latencies = sorted(latency for latency, ok in self._samples if ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self._samples:
+                return 0.0
+            return sum(1 for _, ok in self._samples if not ok) / len(self._samples)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class RoutingLLMClient(BaseLLMClient):
+    """Route each call to the fastest healthy provider and hedge slow calls.
+
+    Providers are ranked by error rate and median latency over a rolling
+    window. If the chosen provider has not answered by its
+    ``hedge_percentile`` latency, the same prompt is sent to the next provider
+    and whichever answers first wins; the loser is cancelled (async) or its
+    result discarded (sync). Providers failing ``failure_threshold`` times in a
+    row are skipped until their circuit breaker half-opens.
+    """
+
+    provider = "router"
+
+    def __init__(
+        self,
+        clients: Mapping[str, BaseLLMClient],
+        hedge_percentile: float = 0.95,
+        default_hedge_delay: float = 2.0,
+        min_hedge_delay: float = 0.05,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        window: int = 50,
+        max_workers: int = 16,
+    ) -> None:
+        if not clients:
+            raise ValueError("RoutingLLMClient needs at least one provider client")
+        super().__init__(token=None, model=next(iter(clients.values())).model)
+        self.clients: Dict[str, BaseLLMClient] = dict(clients)
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.stats = {name: ProviderStats(window=window) for name in self.clients}
+        self.breakers = {
+            name: CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+            for name in self.clients
+        }
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-router")
+
+    def _ranked(self) -> List[str]:
+        def score(name: str) -> Tuple[float, float]:
+            stats = self.stats[name]
+            # Providers without samples rank first so they get explored.
+            return (round(stats.error_rate(), 1), stats.latency_percentile(0.5) or 0.0)
+
+        return sorted((name for name in self.clients if self.breakers[name].available()), key=score)
+
+    def _candidates(self) -> Iterator[str]:
+        for name in self._ranked():
+            if self.breakers[name].allow():
+                yield name
+
+    def _hedge_delay(self, name: str) -> float:
+        stats = self.stats[name]
+        if len(stats) < 5:
+            return self.default_hedge_delay
+        delay = stats.latency_percentile(self.hedge_percentile)
+        return max(self.min_hedge_delay, delay if delay is not None else self.default_hedge_delay)
+
+    def _record(self, name: str, started: float, ok: bool) -> None:
+        self.stats[name].record(time.perf_counter() - started, ok)
+        if ok:
+            self.breakers[name].record_success()
+        else:
+            self.breakers[name].record_failure()
+
+    def _call(self, name: str, prompt: str, kwargs: Dict[str, Any]) -> str:
+        started = time.perf_counter()
+        try:
+            result = self.clients[name].generate(prompt, **kwargs)
+        except Exception:
+            self._record(name, started, ok=False)
+            raise
+        self._record(name, started, ok=True)
+        return result
+
+    async def _acall(self, name: str, prompt: str, kwargs: Dict[str, Any]) -> str:
+        started = time.perf_counter()
+        try:
+            result = await self.clients[name].agenerate(prompt, **kwargs)
+        except asyncio.CancelledError:
+            self.breakers[name].record_cancelled()
+            raise
+        except Exception:
+            self._record(name, started, ok=False)
+            raise
+        self._record(name, started, ok=True)
+        return result
+
+    def generate(self, prompt: str, **kwargs: Any) -> str:  # type: ignore[override]
+        candidates = self._candidates()
+        active: Dict[Future, str] = {}
+        errors: List[str] = []
+        hedged = False
+
+        def launch() -> bool:
+            name = next(candidates, None)
+            if name is None:
+                return False
+            active[self._executor.submit(self._call, name, prompt, kwargs)] = name
+            return True
+
+        if not launch():
+            raise LLMRequestError(self.provider, "no healthy provider available")
+        deadline = time.monotonic() + self._hedge_delay(next(iter(active.values())))
+        while active:
+            timeout = None if hedged else max(0.0, deadline - time.monotonic())
+            done, _ = wait(list(active), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                hedged = True
+                if launch():
+                    LOGGER.info("Hedging LLM call to %s", list(active.values())[-1])
+                continue
+            for future in done:
+                name = active.pop(future)
+                if future.exception() is None:
+                    for loser, loser_name in active.items():
+                        # Calls already running cannot be interrupted; they finish and feed the stats.
+                        if loser.cancel():
+                            self.breakers[loser_name].record_cancelled()
+                    return future.result()
+                errors.append(f"{name}: {future.exception()}")
+                LOGGER.warning("Provider %s failed, failing over: %s", name, future.exception())
+                launch()
+        raise LLMRequestError(self.provider, "all providers failed: " + "; ".join(errors))
+
+    async def agenerate(self, prompt: str, **kwargs: Any) -> str:  # type: ignore[override]
+        candidates = self._candidates()
+        active: Dict[asyncio.Task, str] = {}
+        errors: List[str] = []
+        hedged = False
+
+        def launch() -> bool:
+            name = next(candidates, None)
+            if name is None:
+                return False
+            active[asyncio.ensure_future(self._acall(name, prompt, kwargs))] = name
+            return True
+
+        if not launch():
+            raise LLMRequestError(self.provider, "no healthy provider available")
+        deadline = time.monotonic() + self._hedge_delay(next(iter(active.values())))
+        try:
+            while active:
+                timeout = None if hedged else max(0.0, deadline - time.monotonic())
+                done, _ = await asyncio.wait(list(active), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    launch()
+                    continue
+                for task in done:
+                    name = active.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append(f"{name}: {task.exception()}")
+                    LOGGER.warning("Provider %s failed, failing over: %s", name, task.exception())
+                    launch()
+        finally:
+            for loser in active:
+                loser.cancel()
+        raise LLMRequestError(self.provider, "all providers failed: " + "; ".join(errors))
+
+    def stream(self, prompt: str, **kwargs: Any) -> Iterator[str]:  # type: ignore[override]
+        """Stream from the best provider, failing over only until the first chunk arrives.
+
+        Streams are not hedged: duplicating a long generation would double its cost.
+        """
+
+        errors: List[str] = []
+        for name in self._candidates():
+            started = time.perf_counter()
+            produced = False
+            try:
+                for chunk in self.clients[name].stream(prompt, **kwargs):
+                    if not produced:
+                        produced = True
+                        # Time-to-first-chunk is what routing optimises for streams.
+                        self._record(name, started, ok=True)
+                    yield chunk
+            except Exception as exc:
+                if produced:
+                    raise
+                self._record(name, started, ok=False)
+                errors.append(f"{name}: {exc}")
+                LOGGER.warning("Provider %s stream failed, failing over: %s", name, exc)
+                continue
+            if not produced:
+                self._record(name, started, ok=True)
+            return
+        raise LLMRequestError(self.provider, "all providers failed: " + "; ".join(errors))
+
+    def health(self) -> Dict[str, dict]:
+        """Per-provider breaker state and rolling latency/error statistics."""
+
+        return {
+            name: {
+                "state": self.breakers[name].state,
+                "samples": len(self.stats[name]),
+                "error_rate": self.stats[name].error_rate(),
+                "p50_latency": self.stats[name].latency_percentile(0.5),
+                "p95_latency": self.stats[name].latency_percentile(0.95),
+            }
+            for name in self.clients
+        }
+
+
+def create_routing_client(
+    providers: Sequence[str],
+    tokens: Mapping[str, Optional[str]],
+    wrap: Optional[Callable[[BaseLLMClient], BaseLLMClient]] = None,
+    **kwargs: Any,
+) -> RoutingLLMClient:
+    """Build a :class:`RoutingLLMClient` over every listed provider that has a token.
+
+    ``wrap`` is applied to each provider client, e.g. to add rate limiting.
+    """
+
+    wrap = wrap or (lambda client: client)
+    clients = {
+        name.lower(): wrap(create_client(name, token=tokens.get(name.lower())))
+        for name in providers
+        if name.lower() in PROVIDERS and tokens.get(name.lower())
+    }
+    if not clients:
+        raise RuntimeError(f"No tokens configured for any of the providers {list(providers)}")
+    return RoutingLLMClient(clients, **kwargs)
+
+
+__all__ = [
+    "create_client",
+    "acreate_client",
+    "create_routing_client",
+    "CircuitBreaker",
+    "ProviderStats",
+    "RoutingLLMClient",
+    "PROVIDERS",
+]
@@ -0,0 +1,334 @@
+"""Pooled keep-alive HTTP transport shared by the provider clients."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:  # pragma: no cover - optional async / HTTP/2 support
+    import httpx
+except Exception:  # pragma: no cover
+    httpx = None  # type: ignore
+
+try:  # pragma: no cover - httpx needs h2 for http2=True
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except Exception:  # pragma: no cover
+    HTTP2_AVAILABLE = False
+
+from ..config import LLMTransportConfig
+
+LOGGER = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+def httpx_available() -> bool:
+    return httpx is not None
+
+
+class LLMRequestError(RuntimeError):
+    """Raised when a provider call fails after all retries."""
+
+    def __init__(self, provider: str, message: str, status: Optional[int] = None) -> None:
+        super().__init__(f"{provider} request failed: {message}")
+        self.provider = provider
+        self.status = status
+
+
+def backoff_delay(attempt: int, config: LLMTransportConfig, retry_after: Optional[str] = None) -> float:
+    """Full-jitter exponential backoff, honouring ``Retry-After`` when present."""
+
+    if retry_after:
+        try:
+            return min(float(retry_after), config.backoff_max)
+        except ValueError:
+            pass
+    return random.uniform(0, min(config.backoff_max, config.backoff_base * (2 ** attempt)))
+
+
+@dataclass
+class HTTPTransport:
+    """Send JSON requests over a pooled keep-alive session with retries.
+
+    Uses an HTTP/2 capable ``httpx.Client`` when httpx and h2 are installed and
+    ``config.http2`` is enabled, otherwise a ``requests.Session`` whose adapter
+    keeps up to ``config.pool_size`` connections alive per host.
+    """
+
+    config: LLMTransportConfig = field(default_factory=LLMTransportConfig)
+    _client: Any = field(default=None, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    @property
+    def uses_httpx(self) -> bool:
+        return httpx is not None and HTTP2_AVAILABLE and self.config.http2
+
+    def _session(self) -> Any:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._build_client()
+        return self._client
+
+    def _build_client(self) -> Any:
+        if self.uses_httpx:
+            return httpx.Client(
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=self.config.pool_size, max_keepalive_connections=self.config.pool_size
+                ),
+                timeout=httpx.Timeout(self.config.read_timeout, connect=self.config.connect_timeout),
+            )
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.config.pool_size, pool_maxsize=self.config.pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _send(self, url: str, headers: Dict[str, str], body: bytes) -> Any:
+        if self.uses_httpx:
+            return self._session().post(url, headers=headers, content=body)
+        return self._session().post(
+            url, headers=headers, data=body, timeout=(self.config.connect_timeout, self.config.read_timeout)
+        )
+
+    def post_json(self, url: str, headers: Dict[str, str], payload: dict, provider: str) -> dict:
+        """POST ``payload`` and return the decoded JSON body, retrying 429/5xx with jitter."""
+
+        body = json.dumps(payload).encode("utf-8")
+        transport_errors: tuple = (requests.RequestException,)
+        if httpx is not None:
+            transport_errors += (httpx.TransportError,)
+        for attempt in range(self.config.max_retries + 1):
+            last_attempt = attempt == self.config.max_retries
+            try:
+                response = self._send(url, headers, body)
+            except transport_errors as exc:
+                if last_attempt:
+                    raise LLMRequestError(provider, str(exc)) from exc
+                LOGGER.warning("%s request error (attempt %d): %s", provider, attempt + 1, exc)
+                time.sleep(backoff_delay(attempt, self.config))
+                continue
+            status = response.status_code
+            if status < 400:
+                return response.json()
+            if status not in RETRYABLE_STATUS or last_attempt:
+                raise LLMRequestError(provider, f"HTTP {status}: {response.text[:200]}", status=status)
+            delay = backoff_delay(attempt, self.config, response.headers.get("retry-after"))
+            LOGGER.warning("%s returned HTTP %d, retrying in %.2fs", provider, status, delay)
+            time.sleep(delay)
+        raise LLMRequestError(provider, "retries exhausted")  # pragma: no cover - loop always returns/raises
+
+    def _open_stream(self, url: str, headers: Dict[str, str], body: bytes) -> Any:
+        if self.uses_httpx:
+            session = self._session()
+            return session.send(session.build_request("POST", url, headers=headers, content=body), stream=True)
+        return self._session().post(
+            url,
+            headers=headers,
+            data=body,
+            timeout=(self.config.connect_timeout, self.config.read_timeout),
+            stream=True,
+        )
+
+    def _iter_lines(self, response: Any) -> Iterator[str]:
+        if self.uses_httpx:
+            yield from response.iter_lines()
+            return
+        for raw in response.iter_lines():
+            yield raw.decode("utf-8") if isinstance(raw, bytes) else raw
+
+    def stream_lines(self, url: str, headers: Dict[str, str], payload: dict, provider: str) -> Iterator[str]:
+        """POST ``payload`` and yield response lines as they arrive.
+
+        Retries (429/5xx/connection errors) only happen before the first byte;
+        once lines have been yielded a failure is raised to the caller.
+        """
+
+        body = json.dumps(payload).encode("utf-8")
+        transport_errors: tuple = (requests.RequestException,)
+        if httpx is not None:
+            transport_errors += (httpx.TransportError,)
+        for attempt in range(self.config.max_retries + 1):
+            last_attempt = attempt == self.config.max_retries
+            try:
+                response = self._open_stream(url, headers, body)
+            except transport_errors as exc:
+                if last_attempt:
+                    raise LLMRequestError(provider, str(exc)) from exc
+                LOGGER.warning("%s stream error (attempt %d): %s", provider, attempt + 1, exc)
+                time.sleep(backoff_delay(attempt, self.config))
+                continue
+            status = response.status_code
+            if status < 400:
+                break
+            detail = (response.read() if self.uses_httpx else response.content)[:200]
+            response.close()
+            if status not in RETRYABLE_STATUS or last_attempt:
+                raise LLMRequestError(provider, f"HTTP {status}: {detail!r}", status=status)
+            delay = backoff_delay(attempt, self.config, response.headers.get("retry-after"))
+            LOGGER.warning("%s returned HTTP %d, retrying in %.2fs", provider, status, delay)
+            time.sleep(delay)
+        try:
+            yield from self._iter_lines(response)
+        except transport_errors as exc:
+            raise LLMRequestError(provider, f"stream interrupted: {exc}") from exc
+        finally:
+            response.close()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+@dataclass
+class AsyncHTTPTransport:
+    """Asyncio counterpart of :class:`HTTPTransport` built on ``httpx.AsyncClient``.
+
+    httpx connections are bound to the event loop that opened them, so one
+    pooled client is kept per running loop and shared by every coroutine on it.
+    Without httpx the request is delegated to the synchronous transport on a
+    worker thread.
+    """
+
+    config: LLMTransportConfig = field(default_factory=LLMTransportConfig)
+    _clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = field(
+        default_factory=weakref.WeakKeyDictionary, init=False, repr=False
+    )
+
+    def client(self) -> Any:
+        """Return the pooled ``httpx.AsyncClient`` for the running loop."""
+
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE and self.config.http2,
+                limits=httpx.Limits(
+                    max_connections=self.config.async_pool_size,
+                    max_keepalive_connections=self.config.async_pool_size,
+                ),
+                timeout=httpx.Timeout(self.config.read_timeout, connect=self.config.connect_timeout),
+            )
+            self._clients[loop] = client
+        return client
+
+    async def apost_json(self, url: str, headers: Dict[str, str], payload: dict, provider: str) -> dict:
+        """Async :meth:`HTTPTransport.post_json` with the same retry policy."""
+
+        if httpx is None:  # pragma: no cover - optional dependency missing
+            return await asyncio.to_thread(get_shared_transport().post_json, url, headers, payload, provider)
+        body = json.dumps(payload).encode("utf-8")
+        for attempt in range(self.config.max_retries + 1):
+            last_attempt = attempt == self.config.max_retries
+            try:
+                response = await self.client().post(url, headers=headers, content=body)
+            except httpx.TransportError as exc:
+                if last_attempt:
+                    raise LLMRequestError(provider, str(exc)) from exc
+                LOGGER.warning("%s request error (attempt %d): %s", provider, attempt + 1, exc)
+                await asyncio.sleep(backoff_delay(attempt, self.config))
+                continue
+            status = response.status_code
+            if status < 400:
+                return response.json()
+            if status not in RETRYABLE_STATUS or last_attempt:
+                raise LLMRequestError(provider, f"HTTP {status}: {response.text[:200]}", status=status)
+            delay = backoff_delay(attempt, self.config, response.headers.get("retry-after"))
+            LOGGER.warning("%s returned HTTP %d, retrying in %.2fs", provider, status, delay)
+            await asyncio.sleep(delay)
+        raise LLMRequestError(provider, "retries exhausted")  # pragma: no cover
+
+    async def aclose(self) -> None:
+        """Close the pool owned by the running loop."""
+
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+def iter_sse_data(lines: Iterable[str]) -> Iterator[str]:
+    """Yield the ``data`` payload of each server-sent event until ``[DONE]``."""
+
+    data: list = []
+    for line in lines:
+        if not line:
+            if data:
+                payload = "\n".join(data)
+                data = []
+                if payload == "[DONE]":
+                    return
+                yield payload
+            continue
+        if line.startswith(":"):
+            continue
+        name, _, value = line.partition(":")
+        if name == "data":
+            data.append(value[1:] if value.startswith(" ") else value)
+    if data and "\n".join(data) != "[DONE]":
+        yield "\n".join(data)
+
+
+_SHARED_TRANSPORT: HTTPTransport | None = None
+_SHARED_ASYNC_TRANSPORT: AsyncHTTPTransport | None = None
+_SHARED_LOCK = threading.Lock()
+
+
+def get_shared_transport() -> HTTPTransport:
+    """Return the process-wide transport, creating it from the environment on first use."""
+
+    global _SHARED_TRANSPORT
+    if _SHARED_TRANSPORT is None:
+        with _SHARED_LOCK:
+            if _SHARED_TRANSPORT is None:
+                _SHARED_TRANSPORT = HTTPTransport()
+    return _SHARED_TRANSPORT
+
+
+def get_shared_async_transport() -> AsyncHTTPTransport:
+    """Return the process-wide async transport shared by all ``agenerate`` calls."""
+
+    global _SHARED_ASYNC_TRANSPORT
+    if _SHARED_ASYNC_TRANSPORT is None:
+        with _SHARED_LOCK:
+            if _SHARED_ASYNC_TRANSPORT is None:
+                _SHARED_ASYNC_TRANSPORT = AsyncHTTPTransport()
+    return _SHARED_ASYNC_TRANSPORT
+
+
+def configure_transport(config: LLMTransportConfig) -> HTTPTransport:
+    """Replace the process-wide sync and async transports, closing the previous sync pool."""
+
+    global _SHARED_TRANSPORT, _SHARED_ASYNC_TRANSPORT
+    with _SHARED_LOCK:
+        if _SHARED_TRANSPORT is not None:
+            _SHARED_TRANSPORT.close()
+        _SHARED_TRANSPORT = HTTPTransport(config=config)
+        _SHARED_ASYNC_TRANSPORT = AsyncHTTPTransport(config=config)
+    return _SHARED_TRANSPORT
+
+
+__all__ = [
+    "AsyncHTTPTransport",
+    "HTTPTransport",
+    "LLMRequestError",
+    "backoff_delay",
+    "configure_transport",
+    "get_shared_async_transport",
+    "get_shared_transport",
+    "httpx_available",
+    "iter_sse_data",
+]
@@ -1,7 +1,51 @@
 """RAG layer exports."""
-from .agentic import AgenticRAGPipeline
-from .retriever import EmbeddingService, HybridRetriever, RerankerService
-from .vector_store import QdrantVectorStore
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .agentic import AgenticRAGPipeline
+    from .chunking import DocumentChunker
+    from .context import ContextPacker, PackedContext
+    from .filters import MetadataFilter
+    from .local_store import LocalVectorStore
+    from .memory import ConversationMemoryStore, SessionMemory
+    from .dag import PipelineStep, StepScheduler
+    from .retriever import EmbeddingService, HybridRetriever, RerankerService
+    from .quantized_store import QuantizedVectorStore
+    from .semantic_cache import SemanticAnswerCache
+    from .sharded import ShardedRetriever
+    from .snapshot import RetrieverSnapshot
+    from .tiered import TieredRetriever
+    from .tokenizer import ChineseTokenizer
+    from .vector_store import QdrantVectorStore
+
+_EXPORTS = {
+    "AgenticRAGPipeline": ".agentic",
+    "DocumentChunker": ".chunking",
+    "ContextPacker": ".context",
+    "PackedContext": ".context",
+    "MetadataFilter": ".filters",
+    "LocalVectorStore": ".local_store",
+    "ConversationMemoryStore": ".memory",
+    "SessionMemory": ".memory",
+    "PipelineStep": ".dag",
+    "StepScheduler": ".dag",
+    "EmbeddingService": ".retriever",
+    "HybridRetriever": ".retriever",
+    "RerankerService": ".retriever",
+    "QuantizedVectorStore": ".quantized_store",
+    "SemanticAnswerCache": ".semantic_cache",
+    "ShardedRetriever": ".sharded",
+    "RetrieverSnapshot": ".snapshot",
+    "TieredRetriever": ".tiered",
+    "ChineseTokenizer": ".tokenizer",
+    "QdrantVectorStore": ".vector_store",
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
 
 __all__ = [
     "AgenticRAGPipeline",
@@ -9,4 +53,19 @@ __all__ = [
     "HybridRetriever",
     "RerankerService",
     "QdrantVectorStore",
+    "PipelineStep",
+    "StepScheduler",
+    "ContextPacker",
+    "PackedContext",
+    "ConversationMemoryStore",
+    "SessionMemory",
+    "SemanticAnswerCache",
+    "MetadataFilter",
+    "LocalVectorStore",
+    "TieredRetriever",
+    "QuantizedVectorStore",
+    "RetrieverSnapshot",
+    "ShardedRetriever",
+    "ChineseTokenizer",
+    "DocumentChunker",
 ]
@@ -1,62 +1,348 @@
 """Agentic RAG pipeline with iterative summarisation and research."""
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from typing import Iterable, List
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from functools import partial
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, Set, Tuple, TypeVar
+import asyncio
 import logging
+import os
+import threading
+import time
 
 from ..config import PlatformConfig
-from ..llm import BaseLLMClient
+from ..hardware import HardwareAdapter
+from ..llm import BATCH_PRIORITY, BaseLLMClient
+from ..metrics import DOCUMENTS_INGESTED, FALLBACKS
+from .chunking import DocumentChunker, merge_adjacent_chunks
+from .context import ContextPacker, context_budget_for_model, count_tokens
+from .filters import MetadataFilter
+from .local_store import LocalVectorStore
+from .dag import DAGRun, PipelineStep, StepResults, StepScheduler
+from .memory import ConversationMemoryStore, SessionMemory
 from .retriever import EmbeddingService, HybridRetriever, RerankerService
+from .quantized_store import QuantizedVectorStore
+from .semantic_cache import SemanticAnswerCache
+from .sharded import ShardedRetriever
+from .snapshot import RetrieverSnapshot
+from .tiered import DAY, TieredRetriever
+from .tokenizer import ChineseTokenizer, load_vocabulary
 from .vector_store import QdrantVectorStore
 
 LOGGER = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+_IN_MEMORY_QUERIES = FALLBACKS.labels("in_memory_retriever")
+
 
 @dataclass
 class _InMemoryRetriever:
     """Fallback retriever used when external dependencies are unavailable."""
 
     documents: List[dict] = field(default_factory=list)
+    _ids: Set[str] = field(default_factory=set, init=False, repr=False)
 
     def index(self, documents: Iterable[dict]) -> None:
         for doc in documents:
-            if doc.get("text"):
+            point_id = QdrantVectorStore.point_id(doc)
+            if doc.get("text") and point_id not in self._ids:
+                self._ids.add(point_id)
                 self.documents.append(doc)
 
-    def retrieve(self, query: str, top_k: int = 5) -> List[dict]:  # noqa: D401 - simple wrapper
-        return self.documents[:top_k]
+    def retrieve(
+        self, query: str, top_k: int = 5, filters: MetadataFilter | None = None
+    ) -> List[dict]:  # noqa: D401 - simple wrapper
+        _IN_MEMORY_QUERIES.inc()
+        if filters is None:
+            return self.documents[:top_k]
+        return [doc for doc in self.documents if filters.matches(doc)][:top_k]
 
+    def retrieve_many(
+        self, queries: Sequence[str], top_k: int = 5, filters: MetadataFilter | None = None
+    ) -> List[List[dict]]:
+        return [self.retrieve(query, top_k=top_k, filters=filters) for query in queries]
 
+
+@dataclass
 class AgenticRAGPipeline:
-    """High level agent orchestrating retrieval and synthesis."""
+    """High level agent orchestrating retrieval and synthesis.
+
+    Conversation state lives in ``memory`` keyed by the caller's session id,
+    so concurrent users never see each other's summaries.
+
+    When several processes serve the same data, one of them is the
+    ``writer``: it ingests, saves the snapshot and compacts the tiers.
+    The others run with ``writer=False`` and only follow: every
+    ``RAG_SNAPSHOT_FOLLOW_INTERVAL`` seconds :meth:`refresh` picks up the
+    vectors and snapshot segments the writer added. :meth:`promote` turns a
+    follower into the writer.
+    """
 
     config: PlatformConfig
     llm_client: BaseLLMClient
-    retriever: HybridRetriever | _InMemoryRetriever | None = None
-    _conversation_summary: List[str] = field(default_factory=list, init=False, repr=False)
+    retriever: HybridRetriever | TieredRetriever | ShardedRetriever | _InMemoryRetriever | None = None
+    scheduler: StepScheduler | None = None
+    context_packer: ContextPacker | None = None
+    memory: ConversationMemoryStore | None = None
+    answer_cache: SemanticAnswerCache | None = None
+    snapshots: RetrieverSnapshot | None = None
+    chunker: DocumentChunker | None = None
+    executor: ThreadPoolExecutor | None = None
+    writer: bool = True
+    _follow_stop: threading.Event = field(default_factory=threading.Event, init=False, repr=False)
+    _follower: threading.Thread | None = field(default=None, init=False, repr=False)
 
     def __post_init__(self) -> None:
+        if self.memory is None:
+            self.memory = ConversationMemoryStore(
+                max_sessions=self.config.rag.memory_sessions,
+                ttl=self.config.rag.memory_ttl,
+                max_turns=self.config.rag.memory_turns,
+                summary_tokens=self.config.rag.memory_summary_tokens,
+            )
         if self.retriever is None:
+            self.retriever = self._build_retriever()
+        # Shards snapshot themselves inside their worker processes.
+        sharded = isinstance(self.retriever, ShardedRetriever)
+        if self.snapshots is None and self.config.rag.snapshot_path and not sharded:
+            self.snapshots = RetrieverSnapshot(path=self.config.rag.snapshot_path)
             try:
-                embedding_service = EmbeddingService()
-                reranker = RerankerService()
-                vector_store = QdrantVectorStore(
-                    host=self.config.qdrant.host,
-                    port=self.config.qdrant.port,
-                    api_key=self.config.qdrant.api_key,
-                    collection_name=self.config.qdrant.collection_name,
-                )
-                self.retriever = HybridRetriever(
-                    vector_store=vector_store, embedding_service=embedding_service, reranker=reranker
-                )
-            except Exception as exc:  # pragma: no cover - dependency missing path
-                LOGGER.warning("Falling back to in-memory retriever: %s", exc)
-                self.retriever = _InMemoryRetriever()
+                self.snapshots.load(self.retriever)
+            except Exception as exc:  # pragma: no cover - corrupt or incompatible snapshot
+                LOGGER.warning("Could not restore retriever snapshot: %s", exc)
+        embedding_service = getattr(self.retriever, "embedding_service", None)
+        if self.answer_cache is None and self.config.rag.answer_cache and embedding_service is not None:
+            self.answer_cache = SemanticAnswerCache(
+                embedding_service=embedding_service,
+                threshold=self.config.rag.answer_cache_threshold,
+                max_entries=self.config.rag.answer_cache_size,
+                ttl=self.config.rag.answer_cache_ttl,
+            )
+        if self.answer_cache is not None and getattr(self.retriever, "on_indexed", False) is None:
+            # Invalidate with the vectors the retriever just computed instead of embedding the chunks again.
+            self.retriever.on_indexed = self._invalidate_answers
+        self.start_background_tasks()
+
+    def _build_retriever(self) -> HybridRetriever | TieredRetriever | ShardedRetriever | _InMemoryRetriever:
+        try:
+            embedding_service = EmbeddingService()
+            reranker = RerankerService()
+            if self.config.rag.tiered:
+                return self._tiered_retriever(self._vector_store(), embedding_service, reranker)
+            if self.config.rag.shards > 0:
+                return self._sharded_retriever(embedding_service, reranker)
+            return HybridRetriever(
+                vector_store=self._vector_store(),
+                embedding_service=embedding_service,
+                reranker=reranker,
+                bm25_tokenizer=self._bm25_tokenizer(),
+            )
+        except Exception as exc:  # pragma: no cover - dependency missing path
+            LOGGER.warning("Falling back to in-memory retriever: %s", exc)
+            return _InMemoryRetriever()
+
+    def start_background_tasks(self) -> None:
+        """Start snapshotting and tier compaction, or following the writer (no-ops when already running)."""
+
+        if not self.writer:
+            self._start_following(self.config.rag.snapshot_follow_interval)
+            return
+        if self.snapshots is not None:
+            self.snapshots.start(lambda: self.retriever, self.config.rag.snapshot_interval)
+        if isinstance(self.retriever, TieredRetriever):
+            self.retriever.start_compaction(self.config.rag.compaction_interval)
+
+    def stop_background_tasks(self) -> None:
+        """Stop the threads started by :meth:`start_background_tasks`, e.g. before forking workers."""
+
+        self._follow_stop.set()
+        if self._follower is not None:
+            self._follower.join(timeout=5)
+            self._follower = None
+        if self.snapshots is not None:
+            self.snapshots.stop()
+        if isinstance(self.retriever, TieredRetriever):
+            self.retriever.stop_compaction()
+
+    def _start_following(self, interval: float) -> None:
+        if self._follower is not None:
+            return
+
+        def loop() -> None:
+            while not self._follow_stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as exc:  # pragma: no cover - snapshot being rewritten, disk errors
+                    LOGGER.warning("Following the retriever snapshot failed: %s", exc)
+
+        self._follow_stop.clear()
+        self._follower = threading.Thread(target=loop, name="rag-follow", daemon=True)
+        self._follower.start()
+
+    def promote(self) -> None:
+        """Make this process the writer: catch up with the snapshot, then save and compact from now on."""
+
+        self.stop_background_tasks()
+        self.refresh()
+        self.writer = True
+        self.start_background_tasks()
+
+    def save_snapshot(self) -> bool:
+        """Save the retriever snapshot now, e.g. right after an ingest batch so followers see it soon."""
+
+        return self.snapshots.save(self.retriever) if self.snapshots is not None else False
+
+    def refresh(self) -> int:
+        """Pick up documents another (writer) process added; returns how many were restored.
+
+        Vectors appended to a shared local index are mapped first, then new
+        snapshot segments are restored into the current retriever. When the
+        writer rewrote the snapshot, it is loaded into a fresh retriever that
+        replaces the current one, and the answer cache is cleared.
+        """
+
+        retriever = self.retriever
+        for store in self._vector_stores(retriever):
+            store.refresh()
+        if self.snapshots is None:
+            return 0
+        restored = self.snapshots.refresh(retriever)
+        if restored is not None:
+            if restored and self.answer_cache is not None:
+                self.answer_cache.invalidate(restored)
+            return len(restored)
+        fresh = self._fresh_retriever(retriever)
+        count = self.snapshots.load(fresh)
+        self.retriever = fresh
+        if self.answer_cache is not None:
+            self.answer_cache.clear()
+        return count
+
+    @staticmethod
+    def _vector_stores(retriever: Any) -> List[Any]:
+        """Stores another process may append to (the local int8 index), which need a refresh to be seen."""
+
+        retrievers = [retriever.cold] if isinstance(retriever, TieredRetriever) else [retriever]
+        stores = [getattr(item, "vector_store", None) for item in retrievers]
+        return [store for store in stores if isinstance(store, QuantizedVectorStore)]
+
+    @staticmethod
+    def _fresh_retriever(retriever: Any) -> Any:
+        """Empty retriever configured like ``retriever``, sharing its models and any external store."""
+
+        def fresh_store(store: Any) -> Any:
+            if isinstance(store, QuantizedVectorStore):
+                return replace(store)
+            return type(store)() if isinstance(store, LocalVectorStore) else store
+
+        if isinstance(retriever, TieredRetriever):
+            cold = replace(retriever.cold, vector_store=fresh_store(retriever.cold.vector_store))
+            return replace(retriever, cold=cold)
+        if isinstance(retriever, HybridRetriever):
+            return replace(retriever, vector_store=fresh_store(retriever.vector_store))
+        return _InMemoryRetriever()
+
+    def warm_up(self, run_models: bool = True) -> Dict[str, Any]:
+        """Load retrieval models and indexes before the first request; seconds per step.
+
+        ``run_models=False`` loads weights without running inference, which
+        is what a parent process should do before forking workers: the
+        weights are then shared copy-on-write, while inference thread pools
+        do not survive a fork, so each worker runs the models once itself.
+        A failing step is logged and reported as ``{"error": ...}``; requests
+        then load lazily or fall back as before.
+        """
+
+        report: Dict[str, Any] = {}
+        warm = getattr(self.retriever, "warm_up", None)
+        if warm is not None:
+            start = time.perf_counter()
+            try:
+                warm(run_models)
+                report["retriever"] = round(time.perf_counter() - start, 3)
+            except Exception as exc:  # pragma: no cover - model weights unavailable
+                LOGGER.warning("Retriever warm-up failed: %s", exc)
+                report["retriever"] = {"error": str(exc)}
+        start = time.perf_counter()
+        count_tokens("预热")  # loads the tiktoken encoding used for chunking and context packing
+        report["token_counter"] = round(time.perf_counter() - start, 3)
+        return report
+
+    def _vector_store(self) -> QdrantVectorStore | QuantizedVectorStore:
+        """Qdrant by default; ``RAG_VECTOR_BACKEND=local`` selects the mmap-backed int8 index."""
+
+        if self.config.rag.vector_backend == "local":
+            return QuantizedVectorStore(
+                path=self.config.rag.local_index_path, rescore=self.config.rag.local_index_rescore
+            )
+        return QdrantVectorStore(
+            host=self.config.qdrant.host,
+            port=self.config.qdrant.port,
+            api_key=self.config.qdrant.api_key,
+            collection_name=self.config.qdrant.collection_name,
+        )
+
+    def _bm25_tokenizer(self) -> ChineseTokenizer | None:
+        """Tokenizer extended with ``RAG_TOKENIZER_DICT``; ``None`` keeps the built-in default."""
+
+        path = self.config.rag.tokenizer_dict
+        return ChineseTokenizer(extra_words=load_vocabulary(path)) if path else None
+
+    def _tiered_retriever(
+        self,
+        cold_store: QdrantVectorStore | QuantizedVectorStore,
+        embedding_service: EmbeddingService,
+        reranker: RerankerService,
+    ) -> TieredRetriever:
+        """Hot in-memory tier over the configured collection as the (dense-only) cold tier."""
+
+        rag = self.config.rag
+        retriever = TieredRetriever(
+            embedding_service=embedding_service,
+            cold=HybridRetriever(vector_store=cold_store, embedding_service=embedding_service, use_bm25=False),
+            reranker=reranker,
+            bm25_tokenizer=self._bm25_tokenizer(),
+            hot_window=rag.hot_window_days * DAY,
+            hot_max_docs=rag.hot_max_docs,
+            recency_half_life=rag.recency_half_life_days * DAY,
+            min_hot_score=rag.hot_min_score,
+        )
+        return retriever
+
+    def _sharded_retriever(self, embedding_service: EmbeddingService, reranker: RerankerService) -> ShardedRetriever:
+        """Local shard processes (``RAG_SHARDS``) persisting under ``<snapshot path>/shards``."""
+
+        rag = self.config.rag
+        return ShardedRetriever(
+            embedding_service=embedding_service,
+            reranker=reranker,
+            bm25_tokenizer=self._bm25_tokenizer(),
+            shards=rag.shards,
+            snapshot_path=os.path.join(rag.snapshot_path, "shards") if rag.snapshot_path else "",
+            snapshot_interval=rag.snapshot_interval,
+        )
 
     def ingest(self, documents: Iterable[dict]) -> None:
-        """Index new documents into the hybrid retriever."""
+        """Chunk ``documents`` and index them into the retriever in bounded batches.
+
+        Documents are consumed lazily, so a generator of (possibly streamed)
+        reports is never held in memory whole.
+        """
+
+        chunker = self._get_chunker()
+        stream = chunker.chunk(documents) if chunker is not None else iter(documents)
+        batch_size = max(1, self.config.rag.ingest_batch)
+        while True:
+            batch = list(islice(stream, batch_size))
+            if not batch:
+                break
+            self._ingest_batch(batch)
 
+    def _ingest_batch(self, documents: List[dict]) -> None:
         if self.retriever is None:
             self.retriever = _InMemoryRetriever()
         try:
@@ -66,10 +352,30 @@ class AgenticRAGPipeline:
             fallback = _InMemoryRetriever()
             fallback.index(documents)
             self.retriever = fallback
+        if self.answer_cache is not None and getattr(self.retriever, "on_indexed", None) is None:
+            # Retrievers with the hook (see __post_init__) have already invalidated.
+            self.answer_cache.invalidate(documents)
+        # Chunks of one long document count once, via its first chunk.
+        sources = Counter(doc.get("source") or "unknown" for doc in documents if not doc.get("chunk_index"))
+        for source, count in sources.items():
+            DOCUMENTS_INGESTED.labels(source).inc(count)
 
-    def _iterate_summary(self, query: str, retrieved: List[dict]) -> str:
-        """Iteratively summarise retrieved content guided by the LLM agent."""
+    def _invalidate_answers(self, documents: Sequence[dict], vectors: Sequence[Sequence[float]] | None) -> None:
+        if self.answer_cache is None:
+            return
+        try:
+            self.answer_cache.invalidate(documents, vectors)
+        except Exception as exc:  # pragma: no cover - must not fail the ingest that triggered it
+            LOGGER.warning("Answer cache invalidation failed: %s", exc)
+
+    def _get_chunker(self) -> DocumentChunker | None:
+        if self.chunker is None and self.config.rag.chunk_tokens > 0:
+            self.chunker = DocumentChunker(
+                chunk_tokens=self.config.rag.chunk_tokens, overlap_tokens=self.config.rag.chunk_overlap
+            )
+        return self.chunker
 
+    def _summary_prompt(self, query: str, retrieved: List[dict]) -> str:
         summary_prompt = """
 你是一名量化投研助手，需要结合缠论与量化策略思想对下面材料进行总结。
 重点提取：
@@ -80,38 +386,31 @@ class AgenticRAGPipeline:
 材料：{context}
 问题：{query}
 """
-        context = "\n\n".join(doc.get("text", "") for doc in retrieved)
-        prompt = summary_prompt.format(context=context, query=query)
-        summary = self.llm_client.generate(prompt)
-        self._conversation_summary.append(summary)
-        return summary
+        packed = self._get_context_packer().pack(query, retrieved)
+        return summary_prompt.format(context=packed.text, query=query)
 
-    def _research_iteration(self, query: str, iteration: int) -> str:
-        """Ask the agent to propose further research directions."""
+    def _get_context_packer(self) -> ContextPacker:
+        """Packer sized for the configured budget, else for the client's (or hardware's) model."""
+
+        if self.context_packer is None:
+            budget = self.config.rag.context_tokens
+            if budget <= 0:
+                model = self.llm_client.model or HardwareAdapter(profile=self.config.hardware).choose_llm_model()
+                budget = context_budget_for_model(model)
+            self.context_packer = ContextPacker(
+                budget_tokens=budget, max_passage_tokens=self.config.rag.passage_tokens
+            )
+        return self.context_packer
 
-        exploration_prompt = f"""
-基于已有摘要：{self._conversation_summary[-1] if self._conversation_summary else '无'}
+    def _exploration_prompt(self, iteration: int, summary: str, history: str = "") -> str:
+        earlier = f"此前对话：{history}\n" if history else ""
+        return f"""
+{earlier}基于已有摘要：{summary or '无'}
 第 {iteration} 轮研究，请列出需要补充的数据点、可能的回测参数和与缠论结构相关的验证步骤。
 """
-        return self.llm_client.generate(exploration_prompt)
-
-    def run(self, query: str, rounds: int = 2, top_k: int = 5) -> dict:
-        """Execute the agentic RAG loop."""
 
-        if self.retriever is None:
-            return {"answer": "未检索到有效信息", "research": []}
-        try:
-            retrieved = self.retriever.retrieve(query, top_k=top_k)
-        except Exception as exc:  # pragma: no cover
-            LOGGER.warning("Retrieval failed, returning empty result: %s", exc)
-            retrieved = []
-        if not retrieved:
-            return {"answer": "未检索到有效信息", "research": []}
-        summary = self._iterate_summary(query, retrieved)
-        research_plan = []
-        for idx in range(rounds):
-            research_plan.append(self._research_iteration(query, idx + 1))
-        answer_prompt = f"""
+    def _answer_prompt(self, query: str) -> str:
+        return f"""
 请基于总结与研究计划，给出针对问题《{query}》的量化建议，
 包括：
 - 缠论结构判断与趋势级别
@@ -119,8 +418,279 @@ class AgenticRAGPipeline:
 - 需要补充的外部数据
 - 建议的风险控制与回测平台
 """
-        answer = self.llm_client.generate(answer_prompt)
-        return {"answer": answer, "summary": summary, "research": research_plan, "sources": retrieved}
+
+    def _iterate_summary(self, query: str, retrieved: List[dict], priority: int = BATCH_PRIORITY) -> str:
+        """Iteratively summarise retrieved content guided by the LLM agent."""
+
+        return self.llm_client.generate(self._summary_prompt(query, retrieved), priority=priority)
+
+    def _research_iteration(
+        self, iteration: int, summary: str, history: str = "", priority: int = BATCH_PRIORITY
+    ) -> str:
+        """Ask the agent to propose further research directions."""
+
+        return self.llm_client.generate(self._exploration_prompt(iteration, summary, history), priority=priority)
+
+    async def _aiterate_summary(self, query: str, retrieved: List[dict], priority: int = BATCH_PRIORITY) -> str:
+        return await self.llm_client.agenerate(self._summary_prompt(query, retrieved), priority=priority)
+
+    async def _aresearch_iteration(
+        self, iteration: int, summary: str, history: str = "", priority: int = BATCH_PRIORITY
+    ) -> str:
+        prompt = self._exploration_prompt(iteration, summary, history)
+        return await self.llm_client.agenerate(prompt, priority=priority)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.config.rag.cpu_workers, thread_name_prefix="rag-cpu")
+        return self.executor
+
+    async def _offload(self, func: Callable[..., T], *args: Any) -> T:
+        """Run blocking ``func`` (embedding, search, reranking) on the bounded CPU executor."""
+
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), partial(func, *args))
+
+    @staticmethod
+    def _remember(session: SessionMemory, query: str, summary: str) -> None:
+        session.add_turn(f"问：{query}\n摘要：{summary}")
+
+    def _retrieve(self, query: str, top_k: int, filters: MetadataFilter | None = None) -> List[dict]:
+        if self.retriever is None:
+            return []
+        try:
+            return merge_adjacent_chunks(self.retriever.retrieve(query, top_k=top_k, filters=filters))
+        except Exception as exc:  # pragma: no cover
+            LOGGER.warning("Retrieval failed, returning empty result: %s", exc)
+            return []
+
+    def _retrieve_many(
+        self, queries: Sequence[str], top_k: int, filters: MetadataFilter | None = None
+    ) -> List[List[dict]]:
+        if self.retriever is None:
+            return [[] for _ in queries]
+        try:
+            results = self.retriever.retrieve_many(queries, top_k=top_k, filters=filters)
+            return [merge_adjacent_chunks(docs) for docs in results]
+        except Exception as exc:  # pragma: no cover
+            LOGGER.warning("Batch retrieval failed, returning empty results: %s", exc)
+            return [[] for _ in queries]
+
+    def _build_steps(
+        self,
+        query: str,
+        rounds: int,
+        retrieve: PipelineStep,
+        history: str = "",
+        prefix: str = "",
+        asynchronous: bool = False,
+        priority: int = BATCH_PRIORITY,
+    ) -> List[PipelineStep]:
+        """Describe the agentic loop for ``query`` as a dependency graph.
+
+        Research rounds depend only on the summary and the answer prompt only
+        on the query, so after ``retrieve`` the answer call runs alongside the
+        summary and all rounds run concurrently once the summary exists.
+        Step names other than ``retrieve.name`` are prefixed with ``prefix``
+        so several queries can share one graph. ``asynchronous`` builds LLM
+        steps returning coroutines, for :meth:`StepScheduler.arun`. LLM calls
+        queue at ``priority`` in rate-limited providers.
+        """
+
+        summarise = self._aiterate_summary if asynchronous else self._iterate_summary
+        research = self._aresearch_iteration if asynchronous else self._research_iteration
+        generate = self.llm_client.agenerate if asynchronous else self.llm_client.generate
+
+        def has_sources(results: StepResults) -> bool:
+            return bool(results[retrieve.name])
+
+        summary = prefix + "summary"
+        steps = [
+            retrieve,
+            PipelineStep(
+                summary,
+                lambda results: summarise(query, results[retrieve.name], priority=priority),
+                depends_on=(retrieve.name,),
+                when=has_sources,
+            ),
+            PipelineStep(
+                prefix + "answer",
+                lambda _: generate(self._answer_prompt(query), priority=priority),
+                depends_on=(retrieve.name,),
+                when=has_sources,
+            ),
+        ]
+        for idx in range(1, rounds + 1):
+            steps.append(
+                PipelineStep(
+                    f"{prefix}research_{idx}",
+                    lambda results, idx=idx: research(idx, results[summary], history, priority=priority),
+                    depends_on=(summary,),
+                )
+            )
+        return steps
+
+    @staticmethod
+    def _collect(outcome: DAGRun, rounds: int, prefix: str = "") -> dict:
+        timings = {
+            name[len(prefix) :]: timing for name, timing in outcome.timings.items() if name.startswith(prefix)
+        }
+        timings["total_ms"] = outcome.total_ms
+        retrieved = outcome.results[prefix + "retrieve"]
+        if not retrieved:
+            return {"answer": "未检索到有效信息", "research": [], "timings": timings}
+        return {
+            "answer": outcome.results[prefix + "answer"],
+            "summary": outcome.results[prefix + "summary"],
+            "research": [outcome.results[f"{prefix}research_{idx}"] for idx in range(1, rounds + 1)],
+            "sources": retrieved,
+            "timings": timings,
+        }
+
+    def _get_scheduler(self) -> StepScheduler:
+        if self.scheduler is None:
+            self.scheduler = StepScheduler()
+        return self.scheduler
+
+    def run(
+        self,
+        query: str,
+        rounds: int = 2,
+        top_k: int = 5,
+        session_id: str | None = None,
+        filters: MetadataFilter | None = None,
+        priority: int = BATCH_PRIORITY,
+    ) -> dict:
+        """Execute the agentic RAG loop, running independent steps concurrently.
+
+        ``filters`` restricts retrieval to documents whose metadata matches.
+        LLM calls wait at ``priority`` behind rate limits; the API front ends
+        pass ``INTERACTIVE_PRIORITY`` so users go ahead of batch callers.
+        """
+
+        session = self.memory.get(session_id)
+        history = session.history()
+        # Research prompts depend on session history, so only fresh sessions share answers.
+        use_cache = self.answer_cache is not None and not history
+        vector = None
+        if use_cache:
+            params = (rounds, top_k, filters.cache_key() if filters is not None else None)
+            cached, vector = self.answer_cache.lookup(query, params)
+            if cached is not None:
+                self._remember(session, query, cached["summary"])
+                return cached
+        retrieve = PipelineStep("retrieve", lambda _: self._retrieve(query, top_k, filters))
+        outcome = self._get_scheduler().run(self._build_steps(query, rounds, retrieve, history, priority=priority))
+        result = self._collect(outcome, rounds)
+        if "summary" in result:
+            self._remember(session, query, result["summary"])
+            if use_cache:
+                self.answer_cache.store(vector, query, params, result, outcome.total_ms)
+        return result
+
+    async def arun(
+        self,
+        query: str,
+        rounds: int = 2,
+        top_k: int = 5,
+        session_id: str | None = None,
+        filters: MetadataFilter | None = None,
+        priority: int = BATCH_PRIORITY,
+    ) -> dict:
+        """Coroutine variant of :meth:`run` for event-loop servers (``asgi.py``).
+
+        LLM steps await the clients' ``agenerate``; retrieval and the answer
+        cache lookup (embedding, search, reranking) run on a thread pool of
+        ``RAG_CPU_WORKERS`` threads. A request holds a thread only while
+        that CPU work runs, so one process can keep hundreds of requests in
+        flight while they wait on LLM providers.
+        """
+
+        session = self.memory.get(session_id)
+        history = session.history()
+        use_cache = self.answer_cache is not None and not history
+        vector = None
+        if use_cache:
+            params = (rounds, top_k, filters.cache_key() if filters is not None else None)
+            cached, vector = await self._offload(self.answer_cache.lookup, query, params)
+            if cached is not None:
+                self._remember(session, query, cached["summary"])
+                return cached
+        retrieve = PipelineStep("retrieve", lambda _: self._offload(self._retrieve, query, top_k, filters))
+        steps = self._build_steps(query, rounds, retrieve, history, asynchronous=True, priority=priority)
+        outcome = await self._get_scheduler().arun(steps)
+        result = self._collect(outcome, rounds)
+        if "summary" in result:
+            self._remember(session, query, result["summary"])
+            if use_cache:
+                self.answer_cache.store(vector, query, params, result, outcome.total_ms)
+        return result
+
+    def run_many(
+        self,
+        queries: Sequence[str],
+        rounds: int = 2,
+        top_k: int = 5,
+        filters: MetadataFilter | None = None,
+        priority: int = BATCH_PRIORITY,
+    ) -> List[dict]:
+        """Run the loop for a batch of independent queries (e.g. offline evaluation).
+
+        Retrieval for all queries happens in one batched call and every LLM
+        step of every query shares one graph, bounded by the scheduler's
+        workers. Session memory and the answer cache are not used.
+        """
+
+        queries = list(queries)
+        steps = [PipelineStep("retrieve_batch", lambda _: self._retrieve_many(queries, top_k, filters))]
+        for idx, query in enumerate(queries):
+            retrieve = PipelineStep(
+                f"{idx}:retrieve", lambda results, idx=idx: results["retrieve_batch"][idx], depends_on=("retrieve_batch",)
+            )
+            steps.extend(self._build_steps(query, rounds, retrieve, prefix=f"{idx}:", priority=priority))
+        outcome = self._get_scheduler().run(steps)
+        results = []
+        for idx in range(len(queries)):
+            result = self._collect(outcome, rounds, prefix=f"{idx}:")
+            result["timings"]["retrieve_batch"] = outcome.timings["retrieve_batch"]
+            results.append(result)
+        return results
+
+    def run_stream(
+        self,
+        query: str,
+        rounds: int = 2,
+        top_k: int = 5,
+        session_id: str | None = None,
+        filters: MetadataFilter | None = None,
+        priority: int = BATCH_PRIORITY,
+    ) -> Iterator[Tuple[str, dict]]:
+        """Streaming variant of :meth:`run` yielding ``(event, data)`` pairs as they are produced.
+
+        Events: ``sources`` once, ``summary`` / ``research`` / ``answer`` text
+        deltas, and a final ``done``.
+        """
+
+        session = self.memory.get(session_id)
+        history = session.history()
+        retrieved = self._retrieve(query, top_k, filters)
+        yield "sources", {"sources": retrieved}
+        if not retrieved:
+            yield "answer", {"delta": "未检索到有效信息"}
+            yield "done", {}
+            return
+        chunks: List[str] = []
+        for delta in self.llm_client.stream(self._summary_prompt(query, retrieved), priority=priority):
+            chunks.append(delta)
+            yield "summary", {"delta": delta}
+        summary = "".join(chunks)
+        self._remember(session, query, summary)
+        for idx in range(rounds):
+            prompt = self._exploration_prompt(idx + 1, summary, history)
+            for delta in self.llm_client.stream(prompt, priority=priority):
+                yield "research", {"round": idx + 1, "delta": delta}
+        for delta in self.llm_client.stream(self._answer_prompt(query), priority=priority):
+            yield "answer", {"delta": delta}
+        yield "done", {}
 
 
 __all__ = ["AgenticRAGPipeline"]
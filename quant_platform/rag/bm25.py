@@ -0,0 +1,260 @@
+"""Incremental Okapi BM25 index scored as a sparse matrix product."""
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import threading
+
+import numpy as np
+
+from ..metrics import STAGE_SECONDS
+
+_SPARSE: Any = False
+_SCORE_SECONDS = STAGE_SECONDS.labels("bm25_score")
+
+
+def _sparse() -> Any:
+    """``scipy.sparse`` or ``None``, imported on the first index build (it dominates import time)."""
+
+    global _SPARSE
+    if _SPARSE is False:
+        try:  # pragma: no cover - optional dependency
+            from scipy import sparse as _SPARSE
+        except Exception:  # pragma: no cover
+            _SPARSE = None
+    return _SPARSE
+
+
+@dataclass(frozen=True)
+class _Scoring:
+    """Term weights of one build, published as a whole so a query never mixes two builds."""
+
+    shape: Tuple[int, int] = (0, 0)
+    weights: object = None
+    postings: Dict[int, Tuple[np.ndarray, np.ndarray]] = field(default_factory=dict)
+
+
+@dataclass
+class BM25Index:
+    """Okapi BM25 over pre-tokenised documents.
+
+    Documents are appended with :meth:`add`; per-document term weights are
+    (re)computed lazily on the next query so repeated ingests stay cheap.
+    Term counts are kept as flat arrays (per-document length and number of
+    distinct terms, then term ids and counts) so they can be exported to a
+    snapshot and restored with :meth:`extend` without re-tokenising.
+    With scipy installed the weights live in a CSR matrix and a batch of
+    queries is scored with one sparse product; otherwise the term postings
+    are accumulated with numpy. Rebuilds are serialised and swap in the new
+    weights with one assignment, so queries running meanwhile keep scoring
+    the previous build.
+    """
+
+    k1: float = 1.5
+    b: float = 0.75
+    epsilon: float = 0.25
+    _vocabulary: Dict[str, int] = field(default_factory=dict, init=False, repr=False)
+    _terms: List[str] = field(default_factory=list, init=False, repr=False)
+    _segments: List[Tuple[np.ndarray, ...]] = field(default_factory=list, init=False, repr=False)
+    _n_docs: int = field(default=0, init=False, repr=False)
+    _scoring: _Scoring = field(default_factory=_Scoring, init=False, repr=False)
+    _dirty: bool = field(default=False, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _build_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def __len__(self) -> int:
+        return self._n_docs
+
+    @property
+    def n_terms(self) -> int:
+        return len(self._terms)
+
+    def add(self, tokenized: Sequence[Sequence[str]]) -> None:
+        lengths: List[int] = []
+        distinct: List[int] = []
+        term_ids: List[int] = []
+        tfs: List[int] = []
+        for tokens in tokenized:
+            counts = Counter(tokens)
+            for term, tf in counts.items():
+                term_id = self._vocabulary.get(term)
+                if term_id is None:
+                    term_id = self._vocabulary[term] = len(self._terms)
+                    self._terms.append(term)
+                term_ids.append(term_id)
+                tfs.append(tf)
+            lengths.append(len(tokens))
+            distinct.append(len(counts))
+        if lengths:
+            self._append(
+                np.asarray(lengths, dtype=np.int32),
+                np.asarray(distinct, dtype=np.int32),
+                np.asarray(term_ids, dtype=np.int32),
+                np.asarray(tfs, dtype=np.int32),
+            )
+
+    def _append(self, lengths: np.ndarray, distinct: np.ndarray, term_ids: np.ndarray, tfs: np.ndarray) -> None:
+        with self._lock:
+            self._segments.append((lengths, distinct, term_ids, tfs))
+            self._n_docs += len(lengths)
+            self._dirty = True
+
+    def _merged(self) -> Tuple[np.ndarray, ...]:
+        """All term counts as one segment (documents appended meanwhile stay in later segments)."""
+
+        with self._lock:
+            segments = list(self._segments)
+        if not segments:
+            empty = np.zeros(0, dtype=np.int32)
+            return empty, empty, empty, empty
+        merged = tuple(np.concatenate(parts) for parts in zip(*segments)) if len(segments) > 1 else segments[0]
+        with self._lock:
+            self._segments[: len(segments)] = [merged]
+        return merged
+
+    def export(self, start: int = 0, end: Optional[int] = None, start_term: int = 0) -> Dict[str, object]:
+        """Term counts of documents ``start:end`` and the vocabulary added since ``start_term``."""
+
+        lengths, distinct, term_ids, tfs = self._merged()
+        end = self._n_docs if end is None else end
+        offsets = np.concatenate([[0], np.cumsum(distinct, dtype=np.int64)])
+        lo, hi = int(offsets[start]), int(offsets[end])
+        return {
+            "terms": self._terms[start_term:],
+            "lengths": np.asarray(lengths[start:end]),
+            "distinct": np.asarray(distinct[start:end]),
+            "term_ids": np.asarray(term_ids[lo:hi]),
+            "tfs": np.asarray(tfs[lo:hi]),
+        }
+
+    def extend(
+        self,
+        terms: Sequence[str],
+        lengths: np.ndarray,
+        distinct: np.ndarray,
+        term_ids: np.ndarray,
+        tfs: np.ndarray,
+    ) -> None:
+        """Append documents previously produced by :meth:`export` (term ids continue this index's)."""
+
+        for term in terms:
+            self._vocabulary[term] = len(self._terms)
+            self._terms.append(term)
+        if len(lengths):
+            self._append(lengths, distinct, term_ids, tfs)
+
+    def _idf(self, document_frequency: np.ndarray, n_docs: int) -> np.ndarray:
+        # Same flooring as rank_bm25.BM25Okapi: very common terms get epsilon * mean idf.
+        idf = np.log((n_docs - document_frequency + 0.5) / (document_frequency + 0.5))
+        floor = self.epsilon * float(idf.mean()) if idf.size else 0.0
+        return np.where(idf < 0, floor, idf)
+
+    def _build(self) -> None:
+        lengths_arr, distinct, cols_arr, tf_arr = self._merged()
+        n_docs = len(lengths_arr)
+        cols_arr = cols_arr.astype(np.int64)
+        tf_arr = tf_arr.astype(np.float64)
+        rows_arr = np.repeat(np.arange(n_docs, dtype=np.int64), distinct)
+        lengths = lengths_arr.astype(np.float64)
+        avg_length = float(lengths.mean()) if lengths.size and lengths.mean() > 0 else 1.0
+        n_terms = len(self._terms)
+        idf = self._idf(np.bincount(cols_arr, minlength=n_terms).astype(np.float64), n_docs)
+        norm = self.k1 * (1 - self.b + self.b * lengths[rows_arr] / avg_length)
+        weights = idf[cols_arr] * tf_arr * (self.k1 + 1) / (tf_arr + norm)
+        shape = (n_docs, n_terms)
+        sparse = _sparse()
+        if sparse is not None:
+            indptr = np.concatenate([[0], np.cumsum(distinct, dtype=np.int64)])
+            scoring = _Scoring(shape, weights=sparse.csr_matrix((weights, cols_arr, indptr), shape=shape))
+        else:
+            order = np.argsort(cols_arr, kind="stable")
+            bounds = np.searchsorted(cols_arr[order], np.arange(shape[1] + 1))
+            postings = {}
+            for term_id in range(shape[1]):
+                span = order[bounds[term_id] : bounds[term_id + 1]]
+                postings[term_id] = (rows_arr[span], weights[span])
+            scoring = _Scoring(shape, postings=postings)
+        self._scoring = scoring
+        with self._lock:
+            self._dirty = n_docs != self._n_docs
+
+    def prepare(self) -> _Scoring:
+        """Compute pending term weights now rather than on the next query; return the current build."""
+
+        if self._dirty:
+            with self._build_lock:
+                # Another query may have rebuilt while this one waited.
+                if self._dirty:
+                    self._build()
+        return self._scoring
+
+    def get_scores_many(
+        self, queries: Sequence[Sequence[str]], candidates: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """BM25 scores per query, shape ``(len(queries), n)``.
+
+        Columns are all documents, or only the document ids in ``candidates``
+        (in that order) so a metadata pre-filter shrinks the work.
+        """
+
+        with _SCORE_SECONDS.time():
+            return self._scores_many(queries, candidates)
+
+    def _scores_many(self, queries: Sequence[Sequence[str]], candidates: Optional[np.ndarray]) -> np.ndarray:
+        scoring = self.prepare()
+        n_docs, n_terms = scoring.shape
+        n_columns = n_docs if candidates is None else len(candidates)
+        if not queries or not n_columns:
+            return np.zeros((len(queries), n_columns))
+        query_rows: List[int] = []
+        query_cols: List[int] = []
+        query_counts: List[float] = []
+        for row, tokens in enumerate(queries):
+            for term, count in Counter(tokens).items():
+                term_id = self._vocabulary.get(term)
+                if term_id is not None and term_id < n_terms:
+                    query_rows.append(row)
+                    query_cols.append(term_id)
+                    query_counts.append(count)
+        if scoring.weights is not None:
+            weights = scoring.weights if candidates is None else scoring.weights[candidates]
+            query_matrix = _sparse().csr_matrix(
+                (query_counts, (query_rows, query_cols)), shape=(len(queries), n_terms)
+            )
+            return np.asarray((query_matrix @ weights.T).todense())
+        if candidates is None:
+            column_of = np.arange(n_docs)
+        else:
+            column_of = np.full(n_docs, -1)
+            column_of[candidates] = np.arange(len(candidates))
+        scores = np.zeros((len(queries), n_columns))
+        for row, term_id, count in zip(query_rows, query_cols, query_counts):
+            doc_ids, weights = scoring.postings[term_id]
+            columns = column_of[doc_ids]
+            keep = columns >= 0
+            scores[row, columns[keep]] += count * weights[keep]
+        return scores
+
+    def get_scores(self, query: Sequence[str]) -> np.ndarray:
+        return self.get_scores_many([query])[0]
+
+    def top_k_many(
+        self, queries: Sequence[Sequence[str]], k: int, candidates: Optional[np.ndarray] = None
+    ) -> List[List[Tuple[int, float]]]:
+        """Best ``k`` ``(doc_id, score)`` pairs per query, highest score first."""
+
+        scores = self.get_scores_many(queries, candidates)
+        results: List[List[Tuple[int, float]]] = []
+        for row in scores:
+            if row.size > k:
+                top = np.argpartition(-row, k)[:k]
+            else:
+                top = np.arange(row.size)
+            ranked = top[np.argsort(-row[top], kind="stable")]
+            doc_ids = ranked if candidates is None else candidates[ranked]
+            results.append([(int(doc_id), float(row[col])) for doc_id, col in zip(doc_ids, ranked)])
+        return results
+
+
+__all__ = ["BM25Index"]
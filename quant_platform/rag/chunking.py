@@ -0,0 +1,185 @@
+"""Streaming, sentence-aware chunking of long documents before indexing."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import re
+
+from .context import count_tokens, fit_sentence
+from .vector_store import QdrantVectorStore
+
+# Sentence ends: Chinese/ASCII terminators (with trailing closing quotes/brackets), line breaks, ". ".
+_BOUNDARY = re.compile(r"[。！？!?；;…]+[”’」』）)\]]*|\n+|(?<=\.)\s+")
+_CJK_EDGE = re.compile(r"[\u3000-\u303f\u4e00-\u9fff\uff00-\uffef]")
+CHUNK_FIELDS = ("parent_id", "chunk_index", "chunk_overlap")
+
+
+def stream_sentences(pieces: Iterable[str], max_chars: int = 8192) -> Iterator[str]:
+    """Yield sentences from text arriving in ``pieces`` without holding the whole text.
+
+    Text without any boundary is cut every ``max_chars`` characters so the
+    buffer stays bounded.
+    """
+
+    buffer = ""
+    for piece in pieces:
+        buffer += piece
+        last = 0
+        for match in _BOUNDARY.finditer(buffer):
+            if match.end() == len(buffer):
+                break  # the boundary may continue in the next piece (e.g. "。" then "”")
+            sentence = buffer[last : match.end()].strip()
+            if sentence:
+                yield sentence
+            last = match.end()
+        buffer = buffer[last:]
+        while len(buffer) > max_chars:
+            yield buffer[:max_chars]
+            buffer = buffer[max_chars:]
+    tail = buffer.strip()
+    if tail:
+        yield tail
+
+
+def stream_file(path: str, block_chars: int = 1 << 16, encoding: str = "utf-8") -> Iterator[str]:
+    """Read a text file in blocks, e.g. as the ``text`` of a document passed to :meth:`DocumentChunker.chunk`."""
+
+    with open(path, "r", encoding=encoding) as handle:
+        while True:
+            block = handle.read(block_chars)
+            if not block:
+                return
+            yield block
+
+
+def _separator(left: str, right: str) -> str:
+    return "" if _CJK_EDGE.match(left[-1:]) or _CJK_EDGE.match(right[:1]) else " "
+
+
+def _join(parts: List[str]) -> str:
+    text = parts[0] if parts else ""
+    for part in parts[1:]:
+        text += _separator(text, part) + part
+    return text
+
+
+@dataclass
+class DocumentChunker:
+    """Split documents into chunks of at most ``chunk_tokens`` along sentence boundaries.
+
+    Consecutive chunks share up to ``overlap_tokens`` of trailing sentences.
+    Each chunk keeps the parent's metadata plus ``parent_id``,
+    ``chunk_index`` and ``chunk_overlap`` (characters at its start repeated
+    from the previous chunk), so neighbouring hits can be stitched back
+    together with :func:`merge_adjacent_chunks`. A document's ``text`` may be
+    a string or an iterable of strings (see :func:`stream_file`); chunks are
+    produced lazily either way. Documents that already fit are passed
+    through with their text unchanged.
+    """
+
+    chunk_tokens: int = 384
+    overlap_tokens: int = 64
+    token_counter: Callable[[str], int] = count_tokens
+
+    def chunk(self, documents: Iterable[dict]) -> Iterator[dict]:
+        for doc in documents:
+            text = doc.get("text")
+            if not text:
+                continue
+            metadata = {key: value for key, value in doc.items() if key != "text"}
+            parent_id: Optional[str] = metadata.pop("parent_id", None) or metadata.get("id")
+            if isinstance(text, str) and self.token_counter(text) <= self.chunk_tokens:
+                pieces: Iterator[Tuple[str, int]] = iter([(text, 0)])
+            else:
+                pieces = self._chunk_text([text] if isinstance(text, str) else text)
+            for index, (chunk_text, overlap) in enumerate(pieces):
+                if parent_id is None:
+                    parent_id = QdrantVectorStore.point_id(dict(metadata, text=chunk_text))
+                yield dict(metadata, text=chunk_text, parent_id=parent_id, chunk_index=index, chunk_overlap=overlap)
+
+    def _fit(self, sentence: str, tokens: int) -> Iterator[Tuple[str, int]]:
+        """Break an over-long sentence on clause punctuation, then by length."""
+
+        return fit_sentence(sentence, tokens, self.chunk_tokens, self.token_counter)
+
+    def _chunk_text(self, pieces: Iterable[str]) -> Iterator[Tuple[str, int]]:
+        window: List[Tuple[str, int]] = []
+        total = 0
+        carried = 0  # leading sentences of ``window`` repeated from the previous chunk
+        for sentence in stream_sentences(pieces):
+            for part, tokens in self._fit(sentence, self.token_counter(sentence)):
+                if window and total + tokens > self.chunk_tokens:
+                    if len(window) > carried:
+                        yield self._emit(window, carried)
+                        window, total = self._overlap(window)
+                        carried = len(window)
+                    while window and total + tokens > self.chunk_tokens:
+                        total -= window.pop(0)[1]
+                        carried -= 1
+                window.append((part, tokens))
+                total += tokens
+        if len(window) > carried:
+            yield self._emit(window, carried)
+
+    def _overlap(self, window: List[Tuple[str, int]]) -> Tuple[List[Tuple[str, int]], int]:
+        kept: List[Tuple[str, int]] = []
+        total = 0
+        for sentence, tokens in reversed(window):
+            if total + tokens > self.overlap_tokens:
+                break
+            kept.insert(0, (sentence, tokens))
+            total += tokens
+        return kept, total
+
+    @staticmethod
+    def _emit(window: List[Tuple[str, int]], carried: int) -> Tuple[str, int]:
+        sentences = [sentence for sentence, _ in window]
+        text = _join(sentences)
+        if not carried:
+            return text, 0
+        # The separator after the repeated sentences stays in the new part so merged text reads naturally.
+        return text, len(_join(sentences[:carried]))
+
+
+def merge_adjacent_chunks(documents: List[dict]) -> List[dict]:
+    """Stitch hits that are consecutive chunks of one parent into a single passage.
+
+    Overlapping text is included once, the merged passage keeps the best
+    score and takes the rank of its best-ranked member; repeated hits of the
+    same chunk collapse. Documents without chunk metadata pass through.
+    """
+
+    groups: Dict[str, Dict[int, Tuple[int, dict]]] = {}
+    for rank, doc in enumerate(documents):
+        if doc.get("parent_id") is not None and doc.get("chunk_index") is not None:
+            groups.setdefault(doc["parent_id"], {}).setdefault(doc["chunk_index"], (rank, doc))
+    if not groups:
+        return documents
+    merged_at: Dict[int, List[dict]] = {}
+    for chunks in groups.values():
+        runs: List[List[Tuple[int, dict]]] = []
+        for index in sorted(chunks):
+            if runs and runs[-1][-1][1]["chunk_index"] == index - 1:
+                runs[-1].append(chunks[index])
+            else:
+                runs.append([chunks[index]])
+        for run in runs:
+            first, last = run[0][1], run[-1][1]
+            text = first["text"]
+            for _, doc in run[1:]:
+                text += doc["text"][doc.get("chunk_overlap", 0) :]
+            merged = dict(first, text=text, chunk_span=(first["chunk_index"], last["chunk_index"]))
+            scores = [doc["score"] for _, doc in run if "score" in doc]
+            if scores:
+                merged["score"] = max(scores)
+            merged_at.setdefault(min(rank for rank, _ in run), []).append(merged)
+    results: List[dict] = []
+    for rank, doc in enumerate(documents):
+        if doc.get("parent_id") is None or doc.get("chunk_index") is None:
+            results.append(doc)
+        else:
+            results.extend(merged_at.get(rank, []))
+    return results
+
+
+__all__ = ["CHUNK_FIELDS", "DocumentChunker", "merge_adjacent_chunks", "stream_file", "stream_sentences"]
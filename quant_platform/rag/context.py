@@ -0,0 +1,216 @@
+"""Token-budgeted packing of retrieved passages into prompt context."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+import logging
+import re
+
+from ..llm.ratelimit import estimate_tokens
+
+LOGGER = logging.getLogger(__name__)
+
+# Tokens reserved for retrieved material per model, well inside each context
+# window so the instructions and the completion still fit.
+MODEL_CONTEXT_BUDGETS: Dict[str, int] = {
+    "gpt-4o-mini": 6000,
+    "gpt-4o": 8000,
+    "claude-3": 8000,
+    "deepseek-chat": 6000,
+    "qwen-max": 4000,
+    "qwen-plus": 4000,
+    "qwen-turbo": 3000,
+}
+DEFAULT_CONTEXT_BUDGET = 3000
+
+_SENTENCE_END = re.compile(r"(?<=[。！？!?；;])|(?<=\.)\s+|\n+")
+_CLAUSE_END = re.compile(r"(?<=[，、,：:])")
+_WORD_OR_CJK = re.compile(r"[一-鿿]|[A-Za-z0-9_]+")
+_ENCODER = None
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with ``tiktoken`` when installed, else with the local CJK-aware estimate."""
+
+    global _ENCODER
+    if _ENCODER is None:
+        try:  # pragma: no cover - optional dependency, imported on first count
+            import tiktoken
+        except Exception:  # pragma: no cover
+            _ENCODER = False
+        else:
+            try:
+                _ENCODER = tiktoken.get_encoding("cl100k_base")
+            except Exception as exc:  # pragma: no cover - encoding download failed
+                LOGGER.warning("tiktoken encoding unavailable, estimating tokens: %s", exc)
+                _ENCODER = False
+    if _ENCODER:
+        return len(_ENCODER.encode(text, disallowed_special=()))
+    return estimate_tokens(text)
+
+
+def context_budget_for_model(model: Optional[str]) -> int:
+    """Look up the retrieved-context budget for ``model`` (longest matching prefix wins)."""
+
+    if model:
+        matches = [name for name in MODEL_CONTEXT_BUDGETS if model.startswith(name)]
+        if matches:
+            return MODEL_CONTEXT_BUDGETS[max(matches, key=len)]
+    return DEFAULT_CONTEXT_BUDGET
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split Chinese/English prose on sentence punctuation and line breaks."""
+
+    return [part.strip() for part in _SENTENCE_END.split(text) if part and part.strip()]
+
+
+def fit_sentence(
+    sentence: str, tokens: int, limit: int, token_counter: Callable[[str], int] = count_tokens
+) -> Iterator[Tuple[str, int]]:
+    """Break a sentence of ``tokens`` tokens into ``(piece, tokens)`` of at most ``limit``.
+
+    Over-long sentences are split on clause punctuation first, then into
+    pieces of proportional length; a single character is never split.
+    """
+
+    if tokens <= limit or len(sentence) <= 1:
+        yield sentence, tokens
+        return
+    clauses = [clause for clause in _CLAUSE_END.split(sentence) if clause]
+    if len(clauses) > 1:
+        for clause in clauses:
+            yield from fit_sentence(clause, token_counter(clause), limit, token_counter)
+        return
+    width = max(1, len(sentence) * limit // tokens)
+    for start in range(0, len(sentence), width):
+        piece = sentence[start : start + width]
+        # Token density varies along the text, so a piece can still be over the limit.
+        yield from fit_sentence(piece, token_counter(piece), limit, token_counter)
+
+
+def _terms(text: str) -> Set[str]:
+    """Single CJK characters plus their bigrams, and lower-cased latin words."""
+
+    tokens = _WORD_OR_CJK.findall(text.lower())
+    terms = set(tokens)
+    terms.update(a + b for a, b in zip(tokens, tokens[1:]) if len(a) == 1 and len(b) == 1)
+    return terms
+
+
+@dataclass
+class PackedContext:
+    """Prompt-ready context text plus what was kept and dropped to produce it."""
+
+    text: str
+    tokens: int
+    passages: int
+    dropped_duplicates: int = 0
+    truncated: bool = False
+
+
+@dataclass
+class ContextPacker:
+    """Fit retrieved passages into ``budget_tokens``.
+
+    Passages are consumed in retrieval order. Sentences repeating one already
+    packed (exactly or above ``duplicate_threshold`` Jaccard overlap) are
+    dropped, and passages longer than ``max_passage_tokens`` are reduced to
+    their sentences most relevant to the query, kept in original order.
+    Sentences that alone exceed ``max_passage_tokens`` (e.g. unpunctuated
+    text, or chunks re-joined by :func:`merge_adjacent_chunks`) are first cut
+    into clauses or fixed-length pieces, so such a passage is shortened
+    rather than dropped.
+    """
+
+    budget_tokens: int = DEFAULT_CONTEXT_BUDGET
+    max_passage_tokens: int = 600
+    duplicate_threshold: float = 0.8
+    token_counter: Callable[[str], int] = field(default=count_tokens, repr=False)
+
+    def _extract_relevant(self, query_terms: Set[str], terms: List[Set[str]], costs: List[int]) -> List[int]:
+        scores = [len(query_terms & sentence_terms) for sentence_terms in terms]
+        order = sorted(range(len(terms)), key=lambda i: (-scores[i], i))
+        keep: List[int] = []
+        used = 0
+        for idx in order:
+            if used + costs[idx] > self.max_passage_tokens:
+                continue
+            keep.append(idx)
+            used += costs[idx]
+        return sorted(keep)
+
+    def _is_duplicate(self, key: str, terms: Set[str], seen_exact: Set[str], seen_terms: List[Set[str]]) -> bool:
+        if key in seen_exact:
+            return True
+        return any(len(terms & other) / (len(terms | other) or 1) >= self.duplicate_threshold for other in seen_terms)
+
+    def pack(self, query: str, documents: Sequence[dict]) -> PackedContext:
+        query_terms = _terms(query)
+        seen_exact: Set[str] = set()
+        seen_terms: List[Set[str]] = []
+        parts: List[str] = []
+        used = 0
+        dropped = 0
+        truncated = False
+
+        for doc in documents:
+            sentences: List[str] = []
+            costs: List[int] = []
+            separators: List[str] = []
+            for sentence in split_sentences(doc.get("text", "")):
+                cost = self.token_counter(sentence)
+                pieces = list(fit_sentence(sentence, cost, self.max_passage_tokens, self.token_counter))
+                for index, (piece, cost) in enumerate(pieces):
+                    sentences.append(piece)
+                    costs.append(cost)
+                    # Pieces of one sentence are re-joined as they were; whole sentences as before.
+                    last = index == len(pieces) - 1
+                    separators.append("" if not last or piece[-1] in "。！？!?；;" else " ")
+            if not sentences:
+                continue
+            terms = [_terms(sentence) for sentence in sentences]
+            if sum(costs) > self.max_passage_tokens:
+                kept = self._extract_relevant(query_terms, terms, costs)
+                sentences = [sentences[i] for i in kept]
+                terms = [terms[i] for i in kept]
+                costs = [costs[i] for i in kept]
+                separators = [separators[i] for i in kept]
+                truncated = True
+            # Duplicates are checked only against packed sentences, which the budget keeps few.
+            passage: List[str] = []
+            full = False
+            for sentence, sentence_terms, cost, separator in zip(sentences, terms, costs, separators):
+                key = " ".join(sentence.split())
+                if self._is_duplicate(key, sentence_terms, seen_exact, seen_terms):
+                    dropped += 1
+                    continue
+                if used + cost > self.budget_tokens:
+                    truncated = full = True
+                    break
+                seen_exact.add(key)
+                seen_terms.append(sentence_terms)
+                passage.append(sentence + separator)
+                used += cost
+            if passage:
+                parts.append("".join(passage).strip())
+            if full or used >= self.budget_tokens:
+                break
+
+        return PackedContext(
+            text="\n\n".join(parts),
+            tokens=used,
+            passages=len(parts),
+            dropped_duplicates=dropped,
+            truncated=truncated,
+        )
+
+
+__all__ = [
+    "ContextPacker",
+    "PackedContext",
+    "context_budget_for_model",
+    "count_tokens",
+    "fit_sentence",
+    "split_sentences",
+]
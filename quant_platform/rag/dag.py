@@ -0,0 +1,198 @@
+"""Minimal dependency-graph scheduler used to run pipeline steps concurrently."""
+from __future__ import annotations
+
+import asyncio
+import inspect
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Collection, Dict, List, Optional, Sequence, Tuple
+
+StepResults = Dict[str, Any]
+
+
+@dataclass
+class PipelineStep:
+    """One unit of work; ``func`` receives the results of the steps it depends on.
+
+    When ``when`` is given and returns ``False`` for those results, the step
+    and everything downstream of it is skipped.
+    """
+
+    name: str
+    func: Callable[[StepResults], Any]
+    depends_on: Tuple[str, ...] = ()
+    when: Optional[Callable[[StepResults], bool]] = None
+
+
+@dataclass
+class DAGRun:
+    """Outcome of a scheduler run: step results plus per-step timings in milliseconds."""
+
+    results: StepResults
+    timings: Dict[str, dict]
+    total_ms: float
+
+    def skipped(self, name: str) -> bool:
+        return self.timings.get(name, {}).get("status") == "skipped"
+
+
+@dataclass
+class StepScheduler:
+    """Execute :class:`PipelineStep` graphs, starting each step as soon as its inputs are ready."""
+
+    max_workers: int = 8
+    _executor: ThreadPoolExecutor | None = field(default=None, init=False, repr=False)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="rag-step")
+        return self._executor
+
+    @staticmethod
+    def _validate(steps: Sequence[PipelineStep]) -> Dict[str, PipelineStep]:
+        by_name = {step.name: step for step in steps}
+        if len(by_name) != len(steps):
+            raise ValueError("Duplicate step names in pipeline graph")
+        for step in steps:
+            missing = [dep for dep in step.depends_on if dep not in by_name]
+            if missing:
+                raise ValueError(f"Step {step.name} depends on unknown steps {missing}")
+        visiting: Dict[str, bool] = {}
+
+        def visit(name: str) -> None:
+            state = visiting.get(name)
+            if state is True:
+                raise ValueError(f"Cycle detected at step {name}")
+            if state is False:
+                return
+            visiting[name] = True
+            for dep in by_name[name].depends_on:
+                visit(dep)
+            visiting[name] = False
+
+        for name in by_name:
+            visit(name)
+        return by_name
+
+    @staticmethod
+    def _take_ready(
+        pending: Dict[str, PipelineStep], running: Collection[str], results: StepResults, timings: Dict[str, dict]
+    ) -> List[Tuple[PipelineStep, StepResults]]:
+        """Remove the steps whose dependencies are done from ``pending``; return the ones to start.
+
+        Steps that are skipped (a skipped dependency or a false ``when``) are
+        recorded in ``timings`` instead.
+        """
+
+        ready: List[Tuple[PipelineStep, StepResults]] = []
+        started = set()
+        for name in list(pending):
+            step = pending[name]
+            if any(dep in pending or dep in running or dep in started for dep in step.depends_on):
+                continue
+            del pending[name]
+            if any(timings[dep]["status"] == "skipped" for dep in step.depends_on):
+                timings[name] = {"status": "skipped"}
+                continue
+            inputs = {dep: results[dep] for dep in step.depends_on}
+            if step.when is not None and not step.when(inputs):
+                timings[name] = {"status": "skipped"}
+                continue
+            ready.append((step, inputs))
+            started.add(name)
+        return ready
+
+    def run(self, steps: Sequence[PipelineStep]) -> DAGRun:
+        """Run ``steps`` and return their results; the first step failure is re-raised."""
+
+        by_name = self._validate(steps)
+        results: StepResults = {}
+        timings: Dict[str, dict] = {}
+        pending = dict(by_name)
+        running: Dict[Future, str] = {}
+        started = time.perf_counter()
+
+        def elapsed_ms() -> float:
+            return (time.perf_counter() - started) * 1000
+
+        def timed(step: PipelineStep, inputs: StepResults) -> Tuple[Any, float, float]:
+            begin = elapsed_ms()
+            value = step.func(inputs)
+            return value, begin, elapsed_ms()
+
+        def schedule_ready() -> None:
+            for step, inputs in self._take_ready(pending, running.values(), results, timings):
+                running[self._get_executor().submit(timed, step, inputs)] = step.name
+
+        schedule_ready()
+        while pending or running:
+            if not running:
+                # Only skipped steps unblock the remainder; resolve them synchronously.
+                schedule_ready()
+                continue
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    value, begin, end = future.result()
+                except Exception:
+                    for other in running:
+                        other.cancel()
+                    raise
+                results[name] = value
+                timings[name] = {"status": "ok", "start_ms": begin, "duration_ms": end - begin}
+            schedule_ready()
+        return DAGRun(results=results, timings=timings, total_ms=elapsed_ms())
+
+    async def arun(self, steps: Sequence[PipelineStep]) -> DAGRun:
+        """Coroutine variant of :meth:`run` executing steps as tasks on the running event loop.
+
+        A step's ``func`` may return an awaitable, which is awaited; plain
+        values are taken as they are, so blocking work must be offloaded by
+        the step itself (e.g. ``loop.run_in_executor``). No threads are
+        held while steps wait, so many graphs can be in flight at once.
+        """
+
+        by_name = self._validate(steps)
+        results: StepResults = {}
+        timings: Dict[str, dict] = {}
+        pending = dict(by_name)
+        running: Dict[asyncio.Task, str] = {}
+        started = time.perf_counter()
+
+        def elapsed_ms() -> float:
+            return (time.perf_counter() - started) * 1000
+
+        async def timed(step: PipelineStep, inputs: StepResults) -> Tuple[Any, float, float]:
+            begin = elapsed_ms()
+            value = step.func(inputs)
+            if inspect.isawaitable(value):
+                value = await value
+            return value, begin, elapsed_ms()
+
+        def schedule_ready() -> None:
+            for step, inputs in self._take_ready(pending, running.values(), results, timings):
+                running[asyncio.ensure_future(timed(step, inputs))] = step.name
+
+        schedule_ready()
+        try:
+            while pending or running:
+                if not running:
+                    schedule_ready()
+                    continue
+                done, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = running.pop(task)
+                    value, begin, end = task.result()
+                    results[name] = value
+                    timings[name] = {"status": "ok", "start_ms": begin, "duration_ms": end - begin}
+                schedule_ready()
+        finally:
+            # A failed step (or a cancelled caller) leaves no orphaned tasks behind.
+            for task in running:
+                task.cancel()
+        return DAGRun(results=results, timings=timings, total_ms=elapsed_ms())
+
+
+__all__ = ["DAGRun", "PipelineStep", "StepScheduler"]
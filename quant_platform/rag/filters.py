@@ -0,0 +1,211 @@
+"""Structured metadata filters and bitmap payload indexes for retrieval."""
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import json
+
+import numpy as np
+
+KEYWORD_FIELDS: Tuple[str, ...] = ("source", "symbol", "topic")
+TIME_FIELD = "timestamp"
+_SCALARS = (str, int, float, bool, type(None))
+
+
+def _bound(spec: Dict[str, Any], key: str) -> Optional[float]:
+    value = spec.get(key)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{TIME_FIELD}.{key} must be a number, got {value!r}")
+    return value
+
+
+def _scalar(key: str, value: Any) -> Any:
+    if not isinstance(value, _SCALARS):
+        raise ValueError(f"{key} must be a string, number, boolean or null, got {type(value).__name__}")
+    return value
+
+
+@dataclass(frozen=True)
+class MetadataFilter:
+    """Conjunction of equality, set-membership and time-range conditions on document payloads.
+
+    ``equals`` and ``any_of`` map a payload field to a value or to a set of
+    accepted values; ``since`` / ``until`` bound the ``timestamp`` field
+    (inclusive) in whatever unit the documents use.
+    """
+
+    equals: Tuple[Tuple[str, Any], ...] = ()
+    any_of: Tuple[Tuple[str, Tuple[Any, ...]], ...] = ()
+    since: Optional[float] = None
+    until: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, spec: Optional[Dict[str, Any]]) -> Optional["MetadataFilter"]:
+        """Parse ``{"symbol": "SH000001", "source": ["snowball", ...], "timestamp": {"gte": ..., "lte": ...}}``.
+
+        Raises ``ValueError`` for a spec that is not a mapping, for values
+        (or list members) that are not scalars, and for non-numeric (or
+        unknown) time-range bounds.
+        """
+
+        if not spec:
+            return None
+        if not isinstance(spec, dict):
+            raise ValueError(f"filters must be an object, got {type(spec).__name__}")
+        equals: List[Tuple[str, Any]] = []
+        any_of: List[Tuple[str, Tuple[Any, ...]]] = []
+        since = until = None
+        for key, value in spec.items():
+            if key == TIME_FIELD and isinstance(value, dict):
+                unknown = set(value) - {"gte", "lte"}
+                if unknown:
+                    raise ValueError(f"{TIME_FIELD} range supports gte and lte, got {sorted(unknown)}")
+                since = _bound(value, "gte")
+                until = _bound(value, "lte")
+            elif isinstance(value, (list, tuple, set)):
+                any_of.append((key, tuple(_scalar(key, member) for member in value)))
+            else:
+                equals.append((key, _scalar(key, value)))
+        return cls(equals=tuple(sorted(equals)), any_of=tuple(sorted(any_of)), since=since, until=until)
+
+    def cache_key(self) -> str:
+        return json.dumps([self.equals, self.any_of, self.since, self.until], ensure_ascii=False, default=str)
+
+    def matches(self, payload: dict) -> bool:
+        for key, value in self.equals:
+            if payload.get(key) != value:
+                return False
+        for key, values in self.any_of:
+            if payload.get(key) not in values:
+                return False
+        if self.since is not None or self.until is not None:
+            stamp = payload.get(TIME_FIELD)
+            if stamp is None:
+                return False
+            if self.since is not None and stamp < self.since:
+                return False
+            if self.until is not None and stamp > self.until:
+                return False
+        return True
+
+    def to_qdrant(self) -> Any:
+        """Equivalent ``qdrant_client.models.Filter``."""
+
+        try:  # pragma: no cover - optional dependency
+            from qdrant_client import models as qdrant_models
+        except Exception as exc:  # pragma: no cover - import guard
+            raise ImportError("qdrant-client is required for Qdrant filters") from exc
+        must: List[Any] = [
+            qdrant_models.FieldCondition(key=key, match=qdrant_models.MatchValue(value=value))
+            for key, value in self.equals
+        ]
+        must.extend(
+            qdrant_models.FieldCondition(key=key, match=qdrant_models.MatchAny(any=list(values)))
+            for key, values in self.any_of
+        )
+        if self.since is not None or self.until is not None:
+            must.append(
+                qdrant_models.FieldCondition(key=TIME_FIELD, range=qdrant_models.Range(gte=self.since, lte=self.until))
+            )
+        return qdrant_models.Filter(must=must)
+
+
+@dataclass
+class PayloadIndex:
+    """Per-field bitmaps over locally indexed documents, used as retrieval pre-filters.
+
+    Keyword fields get one boolean bitmap per value and timestamps a numeric
+    column, so a filter resolves to candidate ids with a few vectorised
+    operations instead of a scan over payloads.
+    """
+
+    keyword_fields: Sequence[str] = KEYWORD_FIELDS
+    _postings: Dict[str, Dict[Any, List[int]]] = field(
+        default_factory=lambda: defaultdict(lambda: defaultdict(list)), init=False, repr=False
+    )
+    _bitmaps: Dict[Tuple[str, Any], np.ndarray] = field(default_factory=dict, init=False, repr=False)
+    _empty: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+    _timestamps: List[float] = field(default_factory=list, init=False, repr=False)
+    _timestamp_column: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+    _payloads: List[dict] = field(default_factory=list, init=False, repr=False)
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    def add(self, payloads: Iterable[dict]) -> None:
+        for payload in payloads:
+            doc_id = len(self._payloads)
+            self._payloads.append(payload)
+            for key in self.keyword_fields:
+                if payload.get(key) is not None:
+                    self._postings[key][payload[key]].append(doc_id)
+            stamp = payload.get(TIME_FIELD)
+            self._timestamps.append(float(stamp) if isinstance(stamp, (int, float)) else np.nan)
+        self._bitmaps.clear()
+        self._empty = None
+        self._timestamp_column = None
+
+    def payloads(self, start: int = 0, end: Optional[int] = None) -> List[dict]:
+        return self._payloads[start:end]
+
+    def get(self, doc_id: int) -> dict:
+        return self._payloads[doc_id]
+
+    def _bitmap(self, key: str, value: Any) -> np.ndarray:
+        cached = self._bitmaps.get((key, value))
+        if cached is None:
+            postings = self._postings[key].get(value)
+            if postings is None:
+                # Values no document carries share one read-only mask, so probing
+                # arbitrary values cannot grow the cache.
+                if self._empty is None:
+                    self._empty = np.zeros(len(self._payloads), dtype=bool)
+                    self._empty.flags.writeable = False
+                return self._empty
+            cached = np.zeros(len(self._payloads), dtype=bool)
+            cached[postings] = True
+            self._bitmaps[(key, value)] = cached
+        return cached
+
+    def mask(self, flt: Optional[MetadataFilter]) -> Optional[np.ndarray]:
+        """Boolean mask of documents passing ``flt`` (``None`` when there is nothing to filter)."""
+
+        if flt is None:
+            return None
+        mask = np.ones(len(self._payloads), dtype=bool)
+        for key, value in flt.equals:
+            mask &= self._field_mask(key, (value,))
+        for key, values in flt.any_of:
+            mask &= self._field_mask(key, values)
+        if flt.since is not None or flt.until is not None:
+            if self._timestamp_column is None:
+                self._timestamp_column = np.asarray(self._timestamps, dtype=np.float64)
+            column = self._timestamp_column
+            with np.errstate(invalid="ignore"):
+                if flt.since is not None:
+                    mask &= column >= flt.since
+                if flt.until is not None:
+                    mask &= column <= flt.until
+        return mask
+
+    def _field_mask(self, key: str, values: Sequence[Any]) -> np.ndarray:
+        if key in self.keyword_fields:
+            combined = np.zeros(len(self._payloads), dtype=bool)
+            for value in values:
+                combined |= self._bitmap(key, value)
+            return combined
+        # Unindexed field: fall back to checking payloads.
+        matches = (payload.get(key) in values for payload in self._payloads)
+        return np.fromiter(matches, dtype=bool, count=len(self._payloads))
+
+    def candidates(self, flt: Optional[MetadataFilter]) -> Optional[np.ndarray]:
+        """Ids of documents passing ``flt``, or ``None`` for no filtering."""
+
+        mask = self.mask(flt)
+        return None if mask is None else np.flatnonzero(mask)
+
+
+__all__ = ["KEYWORD_FIELDS", "MetadataFilter", "PayloadIndex", "TIME_FIELD"]
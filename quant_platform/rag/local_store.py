@@ -0,0 +1,123 @@
+"""In-process dense vector store with the same interface as :class:`QdrantVectorStore`."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+import threading
+
+import numpy as np
+
+from ..metrics import STAGE_SECONDS
+from .filters import MetadataFilter, PayloadIndex
+
+_SEARCH_SECONDS = STAGE_SECONDS.labels("memory_index_search")
+_UPSERT_SECONDS = STAGE_SECONDS.labels("memory_index_upsert")
+
+
+@dataclass
+class LocalVectorStore:
+    """Cosine-similarity search over a growable float32 matrix held in memory.
+
+    Used for small partitions (the hot tier) and when Qdrant is not
+    available. Metadata filters resolve through a :class:`PayloadIndex`
+    bitmap before scoring, so narrow filters score few rows.
+    """
+
+    _vectors: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+    _size: int = field(default=0, init=False, repr=False)
+    _payloads: List[dict] = field(default_factory=list, init=False, repr=False)
+    _payload_index: PayloadIndex = field(default_factory=PayloadIndex, init=False, repr=False)
+    _lock: threading.RLock = field(default_factory=threading.RLock, init=False, repr=False)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def ensure_collection(self, vector_size: int) -> None:
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((1024, vector_size), dtype=np.float32)
+
+    def upsert(self, embeddings: Sequence[Sequence[float]], payloads: Sequence[dict]) -> None:
+        with _UPSERT_SECONDS.time():
+            self._upsert(embeddings, payloads)
+
+    def _upsert(self, embeddings: Sequence[Sequence[float]], payloads: Sequence[dict]) -> None:
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if not len(vectors):
+            return
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        with self._lock:
+            self.ensure_collection(vectors.shape[1])
+            needed = self._size + len(vectors)
+            if needed > len(self._vectors):
+                grown = np.zeros((max(needed, 2 * len(self._vectors)), vectors.shape[1]), dtype=np.float32)
+                grown[: self._size] = self._vectors[: self._size]
+                self._vectors = grown
+            self._vectors[self._size : needed] = vectors
+            self._size = needed
+            self._payloads.extend(payloads)
+            self._payload_index.add(payloads)
+
+    def search(
+        self, embedding: Sequence[float], limit: int = 5, filters: Optional[MetadataFilter] = None
+    ) -> List[dict]:
+        return self.search_batch([embedding], limit=limit, filters=filters)[0]
+
+    def search_batch(
+        self, embeddings: Sequence[Sequence[float]], limit: int = 5, filters: Optional[MetadataFilter] = None
+    ) -> List[List[dict]]:
+        with _SEARCH_SECONDS.time():
+            return self._search_batch(embeddings, limit, filters)
+
+    def _search_batch(
+        self, embeddings: Sequence[Sequence[float]], limit: int, filters: Optional[MetadataFilter]
+    ) -> List[List[dict]]:
+        queries = np.asarray(embeddings, dtype=np.float32)
+        with self._lock:
+            if not self._size or not len(queries):
+                return [[] for _ in range(len(queries))]
+            candidates = self._payload_index.candidates(filters)
+            matrix = self._vectors[: self._size] if candidates is None else self._vectors[candidates]
+            payloads = self._payloads
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        scores = queries @ matrix.T
+        results: List[List[dict]] = []
+        for row in scores:
+            if row.size > limit:
+                top = np.argpartition(-row, limit)[:limit]
+            else:
+                top = np.arange(row.size)
+            top = top[np.argsort(-row[top], kind="stable")]
+            doc_ids = top if candidates is None else candidates[top]
+            results.append([dict(payloads[doc_id], score=float(row[col])) for doc_id, col in zip(doc_ids, top)])
+        return results
+
+    def restore(self, vectors: np.ndarray, payloads: Sequence[dict]) -> None:
+        """Append already-normalised vectors, e.g. from a snapshot.
+
+        An empty store adopts ``vectors`` as is, so a memory-mapped array is
+        searched in place and only copied into RAM by the next upsert.
+        """
+
+        if not len(payloads):
+            return
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = vectors
+                self._size = len(vectors)
+                self._payloads.extend(payloads)
+                self._payload_index.add(payloads)
+                return
+        self.upsert(vectors, payloads)
+
+    def items(self, start: int = 0, end: Optional[int] = None) -> Tuple[np.ndarray, List[dict]]:
+        """Copy of the stored (normalised) vectors ``start:end`` and their payloads."""
+
+        with self._lock:
+            if self._vectors is None:
+                return np.zeros((0, 0), dtype=np.float32), []
+            end = self._size if end is None else end
+            return np.array(self._vectors[start:end]), self._payloads[start:end]
+
+
+__all__ = ["LocalVectorStore"]
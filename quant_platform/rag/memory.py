@@ -0,0 +1,106 @@
+"""Bounded per-session conversation memory for the agentic RAG pipeline."""
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Optional
+import threading
+import time
+
+from .context import ContextPacker
+
+
+@dataclass
+class SessionMemory:
+    """Ring buffer of recent turns plus a rolled-up digest of older ones.
+
+    When the buffer is full the oldest turn is folded into ``rolled_up``,
+    which is kept under ``summary_tokens`` by retaining its newest,
+    non-redundant sentences.
+    """
+
+    max_turns: int = 4
+    summary_tokens: int = 400
+    rolled_up: str = ""
+    last_access: float = field(default_factory=time.monotonic)
+    _turns: Deque[str] = field(init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._turns = deque()
+
+    def add_turn(self, text: str) -> None:
+        with self._lock:
+            self._turns.append(text)
+            while len(self._turns) > self.max_turns:
+                self._roll_up(self._turns.popleft())
+            self.last_access = time.monotonic()
+
+    def _roll_up(self, turn: str) -> None:
+        packer = ContextPacker(budget_tokens=self.summary_tokens, max_passage_tokens=self.summary_tokens)
+        self.rolled_up = packer.pack("", [{"text": turn}, {"text": self.rolled_up}]).text
+
+    def history(self) -> str:
+        """Digest followed by the buffered turns, oldest first."""
+
+        with self._lock:
+            parts = ([self.rolled_up] if self.rolled_up else []) + list(self._turns)
+        return "\n\n".join(parts)
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+
+@dataclass
+class ConversationMemoryStore:
+    """Thread-safe map of session id to :class:`SessionMemory` with TTL and LRU eviction."""
+
+    max_sessions: int = 1024
+    ttl: float = 1800.0
+    max_turns: int = 4
+    summary_tokens: int = 400
+    _sessions: "OrderedDict[str, SessionMemory]" = field(default_factory=OrderedDict, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _evicted: int = field(default=0, init=False, repr=False)
+
+    def _evict(self, now: float) -> None:
+        # Sessions are kept in access order, so expired ones sit at the front.
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_access <= self.ttl and len(self._sessions) <= self.max_sessions:
+                break
+            self._sessions.popitem(last=False)
+            self._evicted += 1
+
+    def get(self, session_id: Optional[str]) -> SessionMemory:
+        """Return the memory for ``session_id``; without an id a throwaway memory is returned."""
+
+        if not session_id:
+            return SessionMemory(max_turns=self.max_turns, summary_tokens=self.summary_tokens)
+        now = time.monotonic()
+        with self._lock:
+            memory = self._sessions.get(session_id)
+            if memory is not None and now - memory.last_access > self.ttl:
+                del self._sessions[session_id]
+                self._evicted += 1
+                memory = None
+            if memory is None:
+                memory = SessionMemory(max_turns=self.max_turns, summary_tokens=self.summary_tokens)
+                self._sessions[session_id] = memory
+            else:
+                self._sessions.move_to_end(session_id)
+            memory.last_access = now
+            self._evict(now)
+        return memory
+
+    def drop(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            self._evict(time.monotonic())
+            return {"sessions": len(self._sessions), "evicted": self._evicted}
+
+
+__all__ = ["ConversationMemoryStore", "SessionMemory"]
@@ -2,28 +2,30 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Callable, Iterable, List, Sequence
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Sequence, Set
 import logging
+import threading
 
-try:  # pragma: no cover - optional heavy deps
-    from sentence_transformers import SentenceTransformer
-except Exception:  # pragma: no cover
-    SentenceTransformer = None  # type: ignore
-
-try:  # pragma: no cover
-    from rank_bm25 import BM25Okapi
-except Exception:  # pragma: no cover
-    BM25Okapi = None  # type: ignore
+import numpy as np
 
-try:  # pragma: no cover
+if TYPE_CHECKING:  # pragma: no cover - optional heavy deps, imported when a model is first loaded
     from FlagEmbedding import FlagReranker
-except Exception:  # pragma: no cover
-    FlagReranker = None  # type: ignore
+    from sentence_transformers import SentenceTransformer
 
+from ..metrics import STAGE_SECONDS
+from .bm25 import BM25Index
+from .chunking import CHUNK_FIELDS
+from .filters import MetadataFilter, PayloadIndex
+from .local_store import LocalVectorStore
+from .quantized_store import QuantizedVectorStore
+from .tokenizer import default_tokenizer
 from .vector_store import QdrantVectorStore
 
 LOGGER = logging.getLogger(__name__)
 
+_ENCODE_SECONDS = STAGE_SECONDS.labels("embedding_encode")
+_RERANK_SECONDS = STAGE_SECONDS.labels("rerank")
+
 
 @dataclass
 class EmbeddingService:
@@ -34,16 +36,28 @@ class EmbeddingService:
     _model: SentenceTransformer | None = field(default=None, init=False, repr=False)
 
     def _ensure_model(self) -> SentenceTransformer:
-        if SentenceTransformer is None:  # pragma: no cover - import guard
-            raise ImportError("sentence-transformers is required for EmbeddingService")
         if self._model is None:
+            try:  # pragma: no cover - import guard; pulls in torch, so only on first use
+                from sentence_transformers import SentenceTransformer
+            except Exception as exc:  # pragma: no cover
+                raise ImportError("sentence-transformers is required for EmbeddingService") from exc
             LOGGER.info("Loading embedding model: %s", self.model_name)
             self._model = SentenceTransformer(self.model_name, device=self.device)
         return self._model
 
-    def encode(self, texts: Sequence[str]) -> List[List[float]]:
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed ``texts`` into a ``(len(texts), dim)`` float32 array."""
+
         model = self._ensure_model()
-        return model.encode(list(texts), convert_to_numpy=True).tolist()
+        with _ENCODE_SECONDS.time():
+            return np.asarray(model.encode(list(texts), convert_to_numpy=True), dtype=np.float32)
+
+    def warm_up(self, run: bool = True) -> None:
+        """Load the model; with ``run`` also embed one text so the first request pays nothing."""
+
+        self._ensure_model()
+        if run:
+            self.encode(["预热"])
 
 
 @dataclass
@@ -55,79 +69,269 @@ class RerankerService:
     _model: FlagReranker | None = field(default=None, init=False, repr=False)
 
     def _ensure_model(self) -> FlagReranker:
-        if FlagReranker is None:  # pragma: no cover
-            raise ImportError("FlagEmbedding is required for RerankerService")
         if self._model is None:
+            try:  # pragma: no cover
+                from FlagEmbedding import FlagReranker
+            except Exception as exc:  # pragma: no cover
+                raise ImportError("FlagEmbedding is required for RerankerService") from exc
             LOGGER.info("Loading reranker model: %s", self.model_name)
             self._model = FlagReranker(self.model_name, use_fp16=self.device == "cuda")
         return self._model
 
+    def warm_up(self, run: bool = True) -> None:
+        """Load the model; with ``run`` also score one pair."""
+
+        self._ensure_model()
+        if run:
+            self.rerank("预热", ["预热"], top_k=1)
+
     def rerank(self, query: str, documents: Sequence[str], top_k: int = 5) -> List[int]:
+        return self.rerank_many([query], [documents], top_k=top_k)[0]
+
+    def rerank_many(
+        self, queries: Sequence[str], documents: Sequence[Sequence[str]], top_k: int = 5
+    ) -> List[List[int]]:
+        """Rerank each query's candidates with a single cross-encoder call over all pairs."""
+
+        pairs = [[query, doc] for query, docs in zip(queries, documents) for doc in docs]
+        if not pairs:
+            return [[] for _ in queries]
         model = self._ensure_model()
-        scores = model.compute_score([[query, doc] for doc in documents])
-        ranked_indices = sorted(range(len(documents)), key=lambda i: scores[i], reverse=True)
-        return ranked_indices[:top_k]
+        with _RERANK_SECONDS.time():
+            scores = model.compute_score(pairs)
+        if not isinstance(scores, list):  # a single pair yields a bare float
+            scores = [scores]
+        ranked: List[List[int]] = []
+        offset = 0
+        for docs in documents:
+            group = scores[offset : offset + len(docs)]
+            offset += len(docs)
+            ranked.append(sorted(range(len(docs)), key=lambda i: group[i], reverse=True)[:top_k])
+        return ranked
 
 
 @dataclass
 class HybridRetriever:
-    """Combine dense embedding similarity with BM25 sparse search."""
+    """Combine dense embedding similarity with BM25 sparse search.
 
-    vector_store: QdrantVectorStore
+    Ingestion tokenises outside ``_lock`` and then appends to the BM25 index,
+    the document texts and the payload index under it, so a concurrent query
+    never sees a BM25 document id whose text or payload is missing.
+
+    Documents are keyed by :meth:`QdrantVectorStore.point_id`; one that is
+    already indexed is skipped, so re-ingesting a batch (e.g. an ingestion
+    job retried after a partial failure) does not duplicate it. Once newly
+    added documents are searchable, ``on_indexed(payloads, embeddings)`` is
+    called with them (``embeddings`` is ``None`` for documents merged from a
+    snapshot whose vectors live in a shared store).
+    """
+
+    vector_store: QdrantVectorStore | LocalVectorStore | QuantizedVectorStore
     embedding_service: EmbeddingService
     reranker: RerankerService | None = None
     bm25_tokenizer: Callable[[str], Sequence[str]] | None = None
-    _bm25: BM25Okapi | None = field(default=None, init=False, repr=False)
+    use_bm25: bool = True
+    on_indexed: Callable[[Sequence[dict], Optional[np.ndarray]], None] | None = field(default=None, repr=False)
+    _bm25: BM25Index = field(default_factory=BM25Index, init=False, repr=False)
     _documents: List[str] = field(default_factory=list, init=False, repr=False)
+    _payload_index: PayloadIndex = field(default_factory=PayloadIndex, init=False, repr=False)
+    _lock: threading.RLock = field(default_factory=threading.RLock, init=False, repr=False)
+    _ids: Set[str] = field(default_factory=set, init=False, repr=False)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _tokenize_many(self, texts: Sequence[str]) -> List[Sequence[str]]:
+        tokenizer = self.bm25_tokenizer or default_tokenizer()
+        batch = getattr(tokenizer, "tokenize_many", None)
+        return batch(texts) if batch is not None else [tokenizer(text) for text in texts]
+
+    def warm_up(self, run_models: bool = True) -> None:
+        """Load the models and compute the BM25 weights ahead of the first query.
+
+        ``run_models=False`` loads weights without running inference, for a
+        process that is about to fork workers.
+        """
+
+        self.embedding_service.warm_up(run_models)
+        if self.reranker is not None:
+            self.reranker.warm_up(run_models)
+        if self.use_bm25:
+            self._tokenize_many(["预热"])
+            self._bm25.prepare()
 
     def index(self, documents: Iterable[dict]) -> None:
-        """Index documents in the vector store and prepare BM25 corpus."""
-
-        texts = []
-        payloads = []
-        for doc in documents:
-            text = doc.get("text")
-            if not text:
-                continue
-            texts.append(text)
-            payloads.append(doc)
-        if not texts:
+        """Index documents in the vector store and extend the BM25 corpus."""
+
+        payloads = [doc for doc in documents if doc.get("text")]
+        if not payloads:
             return
-        embeddings = self.embedding_service.encode(texts)
-        self.vector_store.ensure_collection(vector_size=len(embeddings[0]))
-        self.vector_store.upsert(embeddings, payloads)
-
-        tokenizer = self.bm25_tokenizer or (lambda x: x.split())
-        tokenized = [tokenizer(text) for text in texts]
-        if BM25Okapi is None:  # pragma: no cover
-            LOGGER.warning("rank_bm25 is not installed; BM25 retrieval disabled")
-        else:
-            self._bm25 = BM25Okapi(tokenized)
-            self._documents = texts
-
-    def retrieve(self, query: str, top_k: int = 5) -> List[dict]:
+        embeddings = self.embedding_service.encode([doc["text"] for doc in payloads])
+        self.add_embedded(embeddings, payloads)
+
+    def add_embedded(self, embeddings: Sequence[Sequence[float]], payloads: Sequence[dict]) -> None:
+        """Index documents whose embeddings are already known, e.g. when moving them between tiers."""
+
+        self._add(payloads, embeddings)
+
+    def merge_state(self, payloads: Sequence[dict], vectors: Optional[np.ndarray] = None) -> int:
+        """Add the documents of another process's snapshot that this retriever lacks; returns how many.
+
+        ``vectors`` are required for a :class:`LocalVectorStore`; other stores
+        already hold the other process's vectors (a shared index is
+        refreshed first), so only the BM25 side is extended.
+        """
+
+        if isinstance(self.vector_store, LocalVectorStore):
+            if vectors is None:
+                raise ValueError("Snapshot has no vectors for the local vector store")
+            return self._add(payloads, vectors)
+        refresh = getattr(self.vector_store, "refresh", None)
+        if refresh is not None:
+            refresh()
+        return self._add(payloads, None)
+
+    def _add(self, payloads: Sequence[dict], embeddings: Optional[Sequence[Sequence[float]]]) -> int:
+        if not len(payloads):
+            return 0
+        ids = [QdrantVectorStore.point_id(doc) for doc in payloads]
+        with self._lock:
+            fresh = self._fresh(ids)
+        if not fresh:
+            return 0
+        if len(fresh) < len(ids):
+            embeddings = np.asarray(embeddings)[fresh] if embeddings is not None else None
+            payloads = [payloads[idx] for idx in fresh]
+            ids = [ids[idx] for idx in fresh]
+        if embeddings is not None:
+            self.vector_store.ensure_collection(vector_size=len(embeddings[0]))
+            self.vector_store.upsert(embeddings, payloads)
+        if self.use_bm25:
+            texts = [doc["text"] for doc in payloads]
+            tokenized = self._tokenize_many(texts)
+        # Ids are recorded only once the document is searchable, so a failed upsert is retried in full.
+        with self._lock:
+            if self.use_bm25:
+                self._documents.extend(texts)
+                self._payload_index.add(payloads)
+                self._bm25.add(tokenized)
+            self._ids.update(ids)
+        if self.on_indexed is not None:
+            self.on_indexed(payloads, None if embeddings is None else np.asarray(embeddings))
+        return len(ids)
+
+    def _fresh(self, ids: Sequence[str]) -> List[int]:
+        """Positions of ``ids`` not indexed yet, keeping the first of in-batch duplicates."""
+
+        seen: Set[str] = set()
+        fresh = []
+        for idx, point_id in enumerate(ids):
+            if point_id not in self._ids and point_id not in seen:
+                seen.add(point_id)
+                fresh.append(idx)
+        return fresh
+
+    def export_state(self, start: int = 0, start_term: int = 0) -> Dict[str, Any]:
+        """Locally held state for documents ``start:`` (BM25 terms from ``start_term``), for snapshots.
+
+        Covers what a restart would otherwise lose: payloads and BM25 term
+        counts and, for a :class:`LocalVectorStore`, the vectors. Qdrant and
+        the quantised store persist their vectors themselves.
+        """
+
+        local = isinstance(self.vector_store, LocalVectorStore)
+        # Each part is append-only, so slicing all of them to the shortest is a consistent cut.
+        with self._lock:
+            sizes = [len(self._bm25), len(self._payload_index)] if self.use_bm25 else []
+        if local:
+            sizes.append(len(self.vector_store))
+        end = min(sizes) if sizes else start
+        state: Dict[str, Any] = {"count": end, "payloads": [], "vectors": None, "bm25": None}
+        if self.use_bm25:
+            state["payloads"] = self._payload_index.payloads(start, end)
+            state["bm25"] = self._bm25.export(start, end, start_term)
+        if local:
+            state["vectors"], payloads = self.vector_store.items(start, end)
+            state["payloads"] = state["payloads"] or payloads
+        return state
+
+    def restore_state(
+        self, payloads: Sequence[dict], vectors: Optional[np.ndarray] = None, bm25: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Append state written by :meth:`export_state` without re-embedding or re-tokenising."""
+
+        if isinstance(self.vector_store, LocalVectorStore):
+            if vectors is None:
+                raise ValueError("Snapshot has no vectors for the local vector store")
+            self.vector_store.restore(vectors, payloads)
+        ids = [QdrantVectorStore.point_id(doc) for doc in payloads]
+        with self._lock:
+            if self.use_bm25 and bm25 is not None:
+                self._documents.extend(doc["text"] for doc in payloads)
+                self._payload_index.add(payloads)
+                self._bm25.extend(**bm25)
+            self._ids.update(ids)
+
+    def retrieve(self, query: str, top_k: int = 5, filters: Optional[MetadataFilter] = None) -> List[dict]:
         """Retrieve documents using a hybrid search strategy."""
 
-        dense_embedding = self.embedding_service.encode([query])[0]
-        dense_results = self.vector_store.search(dense_embedding, limit=top_k * 2)
+        return self.retrieve_many([query], top_k=top_k, filters=filters)[0]
 
-        sparse_results: List[dict] = []
-        if self._bm25 is not None:
-            scores = self._bm25.get_scores((self.bm25_tokenizer or (lambda x: x.split()))(query))
-            ranked = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[: top_k * 2]
-            sparse_results = [
-                {"text": self._documents[idx], "source": "bm25", "score": float(scores[idx])}
-                for idx in ranked
-            ]
+    def retrieve_many(
+        self, queries: Sequence[str], top_k: int = 5, filters: Optional[MetadataFilter] = None
+    ) -> List[List[dict]]:
+        """Hybrid retrieval for a batch of queries.
 
-        combined = dense_results + sparse_results
-        if not combined:
-            return []
+        All queries share one embedding pass, one vector store batch search,
+        one sparse BM25 product and one reranker call. ``filters`` is pushed
+        down to the vector store and applied to BM25 as a bitmap pre-filter,
+        so only matching documents are scored.
+        """
 
+        if not queries:
+            return []
+        combined = self.search_embedded(
+            queries, self.embedding_service.encode(list(queries)), limit=top_k * 2, filters=filters
+        )
         if self.reranker is not None:
-            rerank_indices = self.reranker.rerank(query, [doc["text"] for doc in combined], top_k=top_k)
-            return [combined[idx] for idx in rerank_indices]
-        return combined[:top_k]
+            order = self.reranker.rerank_many(queries, [[doc["text"] for doc in docs] for docs in combined], top_k=top_k)
+            return [[docs[idx] for idx in indices] for docs, indices in zip(combined, order)]
+        return [docs[:top_k] for docs in combined]
+
+    def search_embedded(
+        self,
+        queries: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        limit: int = 10,
+        filters: Optional[MetadataFilter] = None,
+    ) -> List[List[dict]]:
+        """Up to ``limit`` dense then ``limit`` BM25 candidates per query, before reranking."""
+
+        dense_results = self.vector_store.search_batch(embeddings, limit=limit, filters=filters)
+        sparse_results = self.sparse_search(queries, limit=limit, filters=filters)
+        return [dense + sparse for dense, sparse in zip(dense_results, sparse_results)]
+
+    def sparse_search(
+        self, queries: Sequence[str], limit: int = 10, filters: Optional[MetadataFilter] = None
+    ) -> List[List[dict]]:
+        """Best ``limit`` BM25 hits per query among documents passing ``filters``."""
+
+        if not len(self._bm25):
+            return [[] for _ in queries]
+        with self._lock:
+            # Ids here are already in the BM25 index, so the build scoring them covers them too.
+            candidates = self._payload_index.candidates(filters)
+        if candidates is not None and not len(candidates):
+            return [[] for _ in queries]
+        ranked = self._bm25.top_k_many(self._tokenize_many(queries), limit, candidates)
+        return [[self._sparse_hit(idx, score) for idx, score in hits] for hits in ranked]
+
+    def _sparse_hit(self, doc_id: int, score: float) -> dict:
+        hit = {"text": self._documents[doc_id], "source": "bm25", "score": score}
+        payload = self._payload_index.get(doc_id)
+        # Chunk coordinates let the pipeline stitch neighbouring hits together.
+        hit.update((key, payload[key]) for key in CHUNK_FIELDS if key in payload)
+        return hit
 
 
 __all__ = ["HybridRetriever", "EmbeddingService", "RerankerService"]
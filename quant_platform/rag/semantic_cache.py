@@ -0,0 +1,197 @@
+"""Semantic answer cache placed in front of the agentic RAG pipeline."""
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, List, Optional, Sequence, Tuple
+import logging
+import threading
+import time
+
+import numpy as np
+
+from ..metrics import CACHE_EVENTS
+from .retriever import EmbeddingService
+
+LOGGER = logging.getLogger(__name__)
+
+# Upper bounds of the best-match similarity histogram reported by ``stats``.
+_SIMILARITY_BUCKETS = (0.5, 0.7, 0.8, 0.85, 0.9, 0.95, 1.0)
+_HITS = CACHE_EVENTS.labels("answer", "hits")
+_MISSES = CACHE_EVENTS.labels("answer", "misses")
+
+
+def source_key(doc: dict) -> str:
+    """Identify where a document came from, e.g. ``snowball:SH000001``."""
+
+    return f"{doc.get('source', '')}:{doc.get('symbol') or doc.get('topic') or ''}"
+
+
+@dataclass
+class _CachedAnswer:
+    query: str
+    params: Hashable
+    result: dict
+    sources: FrozenSet[str]
+    latency_ms: float
+    created: float = field(default_factory=time.monotonic)
+    hits: int = 0
+
+
+@dataclass
+class SemanticAnswerCache:
+    """Serve answers to paraphrased questions from a small in-memory vector index.
+
+    A lookup embeds the query with ``embedding_service`` and returns the
+    stored answer of the most similar cached question when the cosine
+    similarity reaches ``threshold`` and the call parameters match. Ingesting
+    documents invalidates answers built on the same sources or whose question
+    is similar (``invalidate_threshold``) to the new material.
+    """
+
+    embedding_service: EmbeddingService
+    threshold: float = 0.92
+    invalidate_threshold: float = 0.75
+    max_entries: int = 512
+    ttl: float = 3600.0
+    _entries: "OrderedDict[int, _CachedAnswer]" = field(default_factory=OrderedDict, init=False, repr=False)
+    _vectors: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+    _free: List[int] = field(default_factory=list, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _stats: Dict[str, float] = field(init=False, repr=False)
+    _histogram: List[int] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "invalidated": 0, "expired": 0, "saved_ms": 0.0}
+        self._histogram = [0] * len(_SIMILARITY_BUCKETS)
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        return self._normalise(self.embedding_service.encode(texts))
+
+    @staticmethod
+    def _normalise(vectors: Sequence[Sequence[float]]) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _drop(self, slot: int) -> None:
+        del self._entries[slot]
+        self._free.append(slot)
+
+    def _record_similarity(self, similarity: float) -> None:
+        for idx, bound in enumerate(_SIMILARITY_BUCKETS):
+            if similarity <= bound or idx == len(_SIMILARITY_BUCKETS) - 1:
+                self._histogram[idx] += 1
+                return
+
+    def lookup(self, query: str, params: Hashable = None) -> Tuple[Optional[dict], Optional[np.ndarray]]:
+        """Return ``(cached result or None, query embedding)``; the embedding is reused by :meth:`store`."""
+
+        try:
+            vector = self._embed([query])[0]
+        except Exception as exc:  # pragma: no cover - embedding model unavailable
+            LOGGER.warning("Semantic cache disabled for this call: %s", exc)
+            return None, None
+        now = time.monotonic()
+        with self._lock:
+            best: Optional[Tuple[int, float]] = None
+            if self._entries:
+                slots = np.fromiter(self._entries.keys(), dtype=np.int64)
+                similarities = self._vectors[slots] @ vector
+                self._record_similarity(float(similarities.max()))
+                for pos in np.argsort(-similarities):
+                    similarity = float(similarities[pos])
+                    if similarity < self.threshold:
+                        break
+                    slot = int(slots[pos])
+                    entry = self._entries[slot]
+                    if now - entry.created > self.ttl:
+                        self._drop(slot)
+                        self._stats["expired"] += 1
+                        continue
+                    if entry.params == params:
+                        best = (slot, similarity)
+                        break
+            if best is None:
+                self._stats["misses"] += 1
+                _MISSES.inc()
+                return None, vector
+            slot, similarity = best
+            entry = self._entries[slot]
+            self._entries.move_to_end(slot)
+            entry.hits += 1
+            self._stats["hits"] += 1
+            _HITS.inc()
+            self._stats["saved_ms"] += entry.latency_ms
+            cache_info = {"hit": True, "similarity": similarity, "cached_query": entry.query}
+            return dict(entry.result, cache=cache_info), vector
+
+    def store(
+        self, vector: Optional[np.ndarray], query: str, params: Hashable, result: dict, latency_ms: float
+    ) -> None:
+        if vector is None:
+            return
+        sources = frozenset(source_key(doc) for doc in result.get("sources", []))
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+                self._free = list(range(self.max_entries - 1, -1, -1))
+            if not self._free:
+                self._drop(next(iter(self._entries)))
+            slot = self._free.pop()
+            self._vectors[slot] = vector
+            self._entries[slot] = _CachedAnswer(query, params, result, sources, latency_ms)
+            self._stats["stores"] += 1
+
+    def invalidate(self, documents: Iterable[dict], vectors: Optional[Sequence[Sequence[float]]] = None) -> int:
+        """Drop answers affected by newly ingested ``documents``; return how many were dropped.
+
+        ``vectors`` are the documents' embeddings when the caller already has
+        them (the retriever's ``on_indexed`` hook), so they are not embedded
+        a second time.
+        """
+
+        documents = list(documents)
+        keep = [idx for idx, doc in enumerate(documents) if doc.get("text")]
+        with self._lock:
+            if not keep or not self._entries:
+                return 0
+        documents = [documents[idx] for idx in keep]
+        keys = {source_key(doc) for doc in documents}
+        try:
+            if vectors is not None:
+                doc_vectors = self._normalise(np.asarray(vectors, dtype=np.float32)[keep])
+            else:
+                # The head of each document is enough to tell what it is about.
+                doc_vectors = self._embed([doc["text"][:512] for doc in documents])
+        except Exception as exc:  # pragma: no cover - embedding model unavailable
+            LOGGER.warning("Semantic cache invalidation by similarity skipped: %s", exc)
+            doc_vectors = None
+        with self._lock:
+            slots = list(self._entries)
+            stale = {slot for slot in slots if self._entries[slot].sources & keys}
+            if doc_vectors is not None and slots:
+                similarities = self._vectors[slots] @ doc_vectors.T
+                stale.update(slot for slot, row in zip(slots, similarities) if row.max() >= self.invalidate_threshold)
+            for slot in stale:
+                self._drop(slot)
+            self._stats["invalidated"] += len(stale)
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            for slot in list(self._entries):
+                self._drop(slot)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return dict(
+                self._stats,
+                entries=len(self._entries),
+                hit_rate=self._stats["hits"] / lookups if lookups else 0.0,
+                similarity_histogram={f"<={bound}": count for bound, count in zip(_SIMILARITY_BUCKETS, self._histogram)},
+            )
+
+
+__all__ = ["SemanticAnswerCache", "source_key"]
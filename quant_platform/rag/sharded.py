@@ -0,0 +1,402 @@
+"""Scatter-gather retrieval over hash-partitioned shards running in worker processes."""
+from __future__ import annotations
+
+from bisect import bisect_right
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from itertools import chain, count
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import hashlib
+import heapq
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+
+import numpy as np
+
+from .filters import MetadataFilter
+from .local_store import LocalVectorStore
+from .retriever import EmbeddingService, HybridRetriever, RerankerService
+from .snapshot import RetrieverSnapshot
+from .vector_store import QdrantVectorStore
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _ring_position(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+@dataclass
+class HashRing:
+    """Consistent hashing of document keys onto shard ids.
+
+    Every shard owns ``virtual_nodes`` points on the ring, so adding or
+    removing a shard only moves the keys adjacent to its points (about
+    ``1 / n_shards`` of the corpus).
+    """
+
+    virtual_nodes: int = 64
+    _points: List[int] = field(default_factory=list, init=False, repr=False)
+    _owners: List[int] = field(default_factory=list, init=False, repr=False)
+
+    @property
+    def shard_ids(self) -> List[int]:
+        return sorted(set(self._owners))
+
+    def add(self, shard_id: int) -> None:
+        for replica in range(self.virtual_nodes):
+            position = _ring_position(f"shard-{shard_id}#{replica}")
+            index = bisect_right(self._points, position)
+            self._points.insert(index, position)
+            self._owners.insert(index, shard_id)
+
+    def remove(self, shard_id: int) -> None:
+        kept = [(point, owner) for point, owner in zip(self._points, self._owners) if owner != shard_id]
+        self._points = [point for point, _ in kept]
+        self._owners = [owner for _, owner in kept]
+
+    def owner(self, key: str) -> int:
+        if not self._points:
+            raise LookupError("Hash ring has no shards")
+        index = bisect_right(self._points, _ring_position(key)) % len(self._points)
+        return self._owners[index]
+
+
+def document_key(payload: dict) -> str:
+    """Stable routing key of a document (the same identity Qdrant point ids use)."""
+
+    return QdrantVectorStore.point_id(payload)
+
+
+def _new_shard(bm25_tokenizer: Optional[Callable[[str], Sequence[str]]]) -> HybridRetriever:
+    # Shards only receive precomputed embeddings, so they never load an embedding model.
+    return HybridRetriever(vector_store=LocalVectorStore(), embedding_service=None, bm25_tokenizer=bm25_tokenizer)
+
+
+def _serve_shard(
+    conn: Any,
+    shard_id: int,
+    bm25_tokenizer: Optional[Callable[[str], Sequence[str]]],
+    snapshot_dir: str,
+    snapshot_interval: float,
+) -> None:
+    """Worker process loop: apply ``(request_id, op, args)`` requests, replying ``(request_id, status, reply)``."""
+
+    retriever = _new_shard(bm25_tokenizer)
+    snapshots = None
+    if snapshot_dir:
+        snapshots = RetrieverSnapshot(path=snapshot_dir)
+        snapshots.load(retriever)
+        snapshots.start(lambda: retriever, snapshot_interval)
+    while True:
+        try:
+            request_id, op, args = conn.recv()
+        except EOFError:
+            break
+        try:
+            if op == "add":
+                retriever.add_embedded(*args)
+                reply: Any = len(retriever.vector_store)
+            elif op == "search":
+                queries, embeddings, limit, filters = args
+                reply = (
+                    retriever.vector_store.search_batch(embeddings, limit=limit, filters=filters),
+                    retriever.sparse_search(queries, limit=limit, filters=filters),
+                )
+            elif op in ("split", "drain"):
+                vectors, payloads = retriever.vector_store.items()
+                if op == "drain":
+                    move = np.ones(len(payloads), dtype=bool)
+                else:
+                    ring = args[0]
+                    keys = (ring.owner(document_key(doc)) != shard_id for doc in payloads)
+                    move = np.fromiter(keys, dtype=bool, count=len(payloads))
+                retriever = _new_shard(bm25_tokenizer)
+                if (~move).any():
+                    retriever.add_embedded(vectors[~move], [doc for doc, flag in zip(payloads, move) if not flag])
+                reply = (vectors[move], [doc for doc, flag in zip(payloads, move) if flag])
+            elif op == "size":
+                reply = len(retriever.vector_store)
+            elif op == "stop":
+                if snapshots is not None:
+                    snapshots.stop()
+                    snapshots.save(retriever)
+                conn.send((request_id, "ok", None))
+                break
+            else:
+                raise ValueError(f"Unknown shard operation {op!r}")
+            conn.send((request_id, "ok", reply))
+        except Exception as exc:  # pragma: no cover - surfaced to the coordinator
+            conn.send((request_id, "error", f"{type(exc).__name__}: {exc}"))
+
+
+@dataclass
+class _Shard:
+    """Coordinator side of one worker: requests carry ids so several can be in flight on its pipe."""
+
+    shard_id: int
+    process: Any
+    conn: Any
+    _ids: Any = field(default_factory=count, init=False, repr=False)
+    _pending: Dict[int, Future] = field(default_factory=dict, init=False, repr=False)
+    _send_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _reader: Optional[threading.Thread] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._reader = threading.Thread(
+            target=self._read_replies, name=f"rag-shard-{self.shard_id}-replies", daemon=True
+        )
+        self._reader.start()
+
+    def submit(self, request: Tuple[str, tuple]) -> Future:
+        """Send ``(op, args)`` and return a future of ``(status, reply)``."""
+
+        future: Future = Future()
+        with self._send_lock:
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+            try:
+                self.conn.send((request_id, *request))
+            except (OSError, ValueError) as exc:
+                self._pending.pop(request_id, None)
+                raise RuntimeError(f"shard {self.shard_id} is not running") from exc
+        return future
+
+    def _read_replies(self) -> None:
+        while True:
+            try:
+                request_id, status, reply = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            future = self._pending.pop(request_id, None)
+            if future is not None:
+                future.set_result((status, reply))
+        with self._send_lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_result(("error", "worker exited"))
+
+
+@dataclass
+class ShardedRetriever:
+    """Hybrid retrieval split across ``shards`` worker processes by consistent hashing.
+
+    The coordinator embeds documents and queries once and sends the vectors
+    to the shards; each shard holds a :class:`HybridRetriever` over a
+    :class:`LocalVectorStore` and runs dense and BM25 search on its slice in
+    its own process, so scoring is not bound to one core and corpus size is
+    not bound to one process. Per-shard candidates are merged with a global
+    heap and reranked once. BM25 idf is computed per shard, which hash
+    partitioning keeps close to the global value. :meth:`add_shard` and
+    :meth:`remove_shard` rebalance by moving only the documents whose ring
+    owner changed, without re-embedding. With ``snapshot_path`` set every
+    shard snapshots itself to ``<snapshot_path>/shard-<id>``.
+
+    ``bm25_tokenizer`` must be picklable (a module-level function) since it
+    is sent to the worker processes. ``_lock`` guards the ring and the worker
+    set and orders requests sent to each shard; replies are awaited outside
+    it, so concurrent searches overlap on the shards and a slow shard only
+    delays the queries waiting on it. Rebalancing holds the lock throughout.
+    ``on_indexed`` is called with every indexed batch and its embeddings.
+    """
+
+    embedding_service: EmbeddingService
+    reranker: RerankerService | None = None
+    bm25_tokenizer: Callable[[str], Sequence[str]] | None = None
+    shards: int = 4
+    virtual_nodes: int = 64
+    snapshot_path: str = ""
+    snapshot_interval: float = 300.0
+    start_method: str = "spawn"
+    on_indexed: Callable[[Sequence[dict], Optional[np.ndarray]], None] | None = field(default=None, repr=False)
+    _ring: HashRing = field(init=False, repr=False)
+    _workers: Dict[int, _Shard] = field(default_factory=dict, init=False, repr=False)
+    _lock: threading.RLock = field(default_factory=threading.RLock, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._context = multiprocessing.get_context(self.start_method)
+        shard_ids = list(range(self.shards))
+        if self.snapshot_path and os.path.exists(self._membership_file()):
+            # The ring as last saved, including shards added or removed at runtime.
+            with open(self._membership_file(), "r", encoding="utf-8") as handle:
+                membership = json.load(handle)
+            shard_ids, self.virtual_nodes = membership["shards"], membership["virtual_nodes"]
+        self._ring = HashRing(virtual_nodes=self.virtual_nodes)
+        for shard_id in shard_ids:
+            self._start_worker(shard_id)
+        self._save_membership()
+
+    def _membership_file(self) -> str:
+        return os.path.join(self.snapshot_path, "shards.json")
+
+    def _save_membership(self) -> None:
+        if not self.snapshot_path:
+            return
+        os.makedirs(self.snapshot_path, exist_ok=True)
+        tmp = self._membership_file() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as handle:
+            json.dump({"shards": sorted(self._workers), "virtual_nodes": self.virtual_nodes}, handle)
+        os.replace(tmp, self._membership_file())
+
+    def _snapshot_dir(self, shard_id: int) -> str:
+        return os.path.join(self.snapshot_path, f"shard-{shard_id}") if self.snapshot_path else ""
+
+    def _start_worker(self, shard_id: int) -> None:
+        parent, child = self._context.Pipe()
+        process = self._context.Process(
+            target=_serve_shard,
+            args=(child, shard_id, self.bm25_tokenizer, self._snapshot_dir(shard_id), self.snapshot_interval),
+            name=f"rag-shard-{shard_id}",
+            daemon=True,
+        )
+        process.start()
+        child.close()
+        self._workers[shard_id] = _Shard(shard_id=shard_id, process=process, conn=parent)
+        self._ring.add(shard_id)
+
+    def _call_many(self, requests: Dict[int, Tuple[str, tuple]]) -> Dict[int, Any]:
+        """Send every request before waiting on any reply, so shards work concurrently."""
+
+        with self._lock:
+            futures = {shard_id: self._workers[shard_id].submit(request) for shard_id, request in requests.items()}
+        return self._gather(futures)
+
+    def _call_all(self, request: Tuple[str, tuple]) -> Dict[int, Any]:
+        """:meth:`_call_many` with ``request`` for every shard running when it is sent."""
+
+        with self._lock:
+            futures = {shard_id: shard.submit(request) for shard_id, shard in self._workers.items()}
+        return self._gather(futures)
+
+    @staticmethod
+    def _gather(futures: Dict[int, Future]) -> Dict[int, Any]:
+        replies: Dict[int, Any] = {}
+        errors: List[str] = []
+        for shard_id, future in futures.items():
+            status, reply = future.result()
+            if status == "ok":
+                replies[shard_id] = reply
+            else:
+                errors.append(f"shard {shard_id}: {reply}")
+        if errors:
+            raise RuntimeError("; ".join(errors))
+        return replies
+
+    def _route(self, embeddings: np.ndarray, payloads: Sequence[dict]) -> None:
+        # Routed and sent under the lock: a rebalance starting later queues its split behind these adds.
+        with self._lock:
+            groups: Dict[int, List[int]] = {}
+            for position, doc in enumerate(payloads):
+                groups.setdefault(self._ring.owner(document_key(doc)), []).append(position)
+            futures = {
+                shard_id: self._workers[shard_id].submit(
+                    ("add", (embeddings[positions], [payloads[idx] for idx in positions]))
+                )
+                for shard_id, positions in groups.items()
+            }
+        self._gather(futures)
+
+    def warm_up(self, run_models: bool = True) -> None:
+        """Load the coordinator's embedding and reranker models (shards hold no models)."""
+
+        self.embedding_service.warm_up(run_models)
+        if self.reranker is not None:
+            self.reranker.warm_up(run_models)
+
+    def index(self, documents: Sequence[dict]) -> None:
+        payloads = [doc for doc in documents if doc.get("text")]
+        if not payloads:
+            return
+        embeddings = np.asarray(self.embedding_service.encode([doc["text"] for doc in payloads]), dtype=np.float32)
+        self._route(embeddings, payloads)
+        if self.on_indexed is not None:
+            self.on_indexed(payloads, embeddings)
+
+    def retrieve(self, query: str, top_k: int = 5, filters: Optional[MetadataFilter] = None) -> List[dict]:
+        return self.retrieve_many([query], top_k=top_k, filters=filters)[0]
+
+    def retrieve_many(
+        self, queries: Sequence[str], top_k: int = 5, filters: Optional[MetadataFilter] = None
+    ) -> List[List[dict]]:
+        if not queries:
+            return []
+        embeddings = np.asarray(self.embedding_service.encode(list(queries)), dtype=np.float32)
+        limit = top_k * 2
+        request = ("search", (list(queries), embeddings, limit, filters))
+        replies = list(self._call_all(request).values())
+        combined: List[List[dict]] = []
+        for position in range(len(queries)):
+            dense = chain.from_iterable(reply[0][position] for reply in replies)
+            sparse = chain.from_iterable(reply[1][position] for reply in replies)
+            combined.append(
+                heapq.nlargest(limit, dense, key=lambda doc: doc["score"])
+                + heapq.nlargest(limit, sparse, key=lambda doc: doc["score"])
+            )
+        if self.reranker is not None:
+            order = self.reranker.rerank_many(queries, [[doc["text"] for doc in docs] for docs in combined], top_k=top_k)
+            return [[docs[idx] for idx in indices] for docs, indices in zip(combined, order)]
+        return [docs[:top_k] for docs in combined]
+
+    def add_shard(self) -> int:
+        """Start one more shard and move to it the documents it now owns; returns how many moved."""
+
+        with self._lock:
+            existing = list(self._workers)
+            self._start_worker(max(existing, default=-1) + 1)
+            moved = self._call_many({shard_id: ("split", (self._ring,)) for shard_id in existing})
+            count = self._reroute(moved.values())
+            self._save_membership()
+            return count
+
+    def remove_shard(self, shard_id: int) -> int:
+        """Hand a shard's documents to the remaining shards and stop it; returns how many moved."""
+
+        with self._lock:
+            if shard_id not in self._workers or len(self._workers) == 1:
+                raise ValueError(f"Cannot remove shard {shard_id}")
+            drained = self._call_many({shard_id: ("drain", ())})
+            self._ring.remove(shard_id)
+            self._stop_worker(shard_id)
+            if self.snapshot_path:
+                shutil.rmtree(self._snapshot_dir(shard_id), ignore_errors=True)
+            count = self._reroute(drained.values())
+            self._save_membership()
+            return count
+
+    def _reroute(self, batches: Any) -> int:
+        moved = 0
+        for vectors, payloads in batches:
+            if payloads:
+                self._route(vectors, payloads)
+                moved += len(payloads)
+        LOGGER.info("Rebalanced %d documents across %d shards", moved, len(self._workers))
+        return moved
+
+    def _stop_worker(self, shard_id: int) -> None:
+        shard = self._workers.pop(shard_id)
+        try:
+            shard.submit(("stop", ())).result(timeout=30)
+        except Exception:  # pragma: no cover - worker already gone or stuck
+            pass
+        shard.process.join(timeout=10)
+        shard.conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            for shard_id in list(self._workers):
+                self._stop_worker(shard_id)
+
+    def stats(self) -> Dict[str, Any]:
+        sizes = self._call_all(("size", ()))
+        return {
+            "shards": len(sizes),
+            "documents": sum(sizes.values()),
+            "per_shard": {str(shard_id): size for shard_id, size in sorted(sizes.items())},
+        }
+
+
+__all__ = ["HashRing", "ShardedRetriever", "document_key"]
@@ -0,0 +1,333 @@
+"""Versioned on-disk snapshots of local retriever state for fast warm starts."""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import weakref
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: a single process owns the snapshot directory
+    fcntl = None  # type: ignore[assignment]
+
+from .retriever import HybridRetriever
+from .tiered import TieredRetriever
+
+LOGGER = logging.getLogger(__name__)
+
+# 2: BM25 terms come from ChineseTokenizer instead of whitespace splitting.
+_FORMAT_VERSION = 2
+_BM25_ARRAYS = ("lengths", "distinct", "term_ids", "tfs")
+
+
+def _target(retriever: Any) -> Any:
+    """Object whose state is snapshotted: the hot tier of a tiered retriever, else the retriever."""
+
+    return retriever.hot if isinstance(retriever, TieredRetriever) else retriever
+
+
+@dataclass
+class RetrieverSnapshot:
+    """Persist what a retriever keeps only in memory so a restart does not need a re-ingest.
+
+    A snapshot under ``path`` is a ``manifest.json`` listing segment
+    directories. Each segment holds the payloads (JSON lines), the vectors
+    and BM25 term counts as ``.npy`` arrays, and the BM25 terms it
+    introduced. :meth:`save` appends a segment with the documents added since
+    the previous save, and rewrites everything as one segment when the
+    retriever was replaced (e.g. by hot-tier compaction) or after
+    ``max_segments`` deltas. Segments are written to a temporary directory
+    and renamed, then the manifest is swapped with ``os.replace``, so a
+    crash leaves the previous snapshot readable. :meth:`load` maps the arrays
+    with ``mmap_mode="r"``; a single-segment vector matrix is searched
+    straight from the page cache.
+
+    Processes sharing ``path`` (gunicorn workers) coordinate through an
+    ``flock`` on ``path/.lock``: saves hold it exclusively from reading the
+    manifest to pruning segments, loads hold it shared while opening
+    segments. Normally only one process saves (the one draining the
+    ingestion queue) and the others :meth:`refresh`. A save that still finds
+    a manifest written by another process first merges that snapshot's
+    documents it lacks into its retriever (by point id, see
+    :meth:`HybridRetriever.merge_state`) and then rewrites the union in full,
+    so divergent writers never drop each other's documents; segments are
+    only pruned once no manifest or in-progress load can reference them.
+    """
+
+    path: str = "data/retriever_snapshot"
+    max_segments: int = 8
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _stop: threading.Event = field(default_factory=threading.Event, init=False, repr=False)
+    _worker: Optional[threading.Thread] = field(default=None, init=False, repr=False)
+    _lineage: Optional[weakref.ref] = field(default=None, init=False, repr=False)
+    _segments: List[str] = field(default_factory=list, init=False, repr=False)
+    _count: int = field(default=0, init=False, repr=False)
+    _terms: int = field(default=0, init=False, repr=False)
+    _generation: int = field(default=0, init=False, repr=False)
+    _stats: Dict[str, float] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._root = Path(self.path)
+        self._stats = {"saves": 0, "last_save_ms": 0.0, "load_ms": 0.0, "loaded_documents": 0}
+
+    # -- reading ---------------------------------------------------------------------------
+
+    def _manifest(self) -> Optional[dict]:
+        manifest_file = self._root / "manifest.json"
+        if not manifest_file.exists():
+            return None
+        manifest = json.loads(manifest_file.read_text())
+        if manifest.get("version") != _FORMAT_VERSION:
+            LOGGER.warning("Ignoring retriever snapshot format %s in %s", manifest.get("version"), self.path)
+            return None
+        return manifest
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool) -> Iterator[None]:
+        """Hold ``path/.lock`` against other processes sharing the snapshot directory."""
+
+        if fcntl is None:  # pragma: no cover
+            yield
+            return
+        self._root.mkdir(parents=True, exist_ok=True)
+        with open(self._root / ".lock", "a") as handle:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+    def load(self, retriever: Any) -> int:
+        """Restore the latest snapshot into an empty ``retriever``; returns the documents restored."""
+
+        if not (self._root / "manifest.json").exists():
+            return 0
+        # Segments stay readable once mapped, so the shared lock only has to cover opening them.
+        with self._lock, self._file_lock(exclusive=False):
+            return self._load(retriever)
+
+    def _load(self, retriever: Any) -> int:
+        started = time.perf_counter()
+        manifest = self._manifest()
+        target = _target(retriever)
+        if manifest is None:
+            return 0
+        kind = "hybrid" if isinstance(target, HybridRetriever) else "documents"
+        if manifest["kind"] != kind:
+            LOGGER.warning("Snapshot in %s holds %s state, retriever needs %s", self.path, manifest["kind"], kind)
+            return 0
+        count = sum(len(self._restore_segment(target, kind, name)) for name in manifest["segments"])
+        self._adopt(target, manifest)
+        self._stats["load_ms"] = (time.perf_counter() - started) * 1000
+        self._stats["loaded_documents"] = count
+        LOGGER.info("Restored %d documents from %s in %.0f ms", count, self.path, self._stats["load_ms"])
+        return count
+
+    def refresh(self, retriever: Any) -> Optional[List[dict]]:
+        """Restore segments appended since the last load or refresh; returns their payloads.
+
+        This is how a process that does not write the snapshot follows the
+        one that does. ``None`` means the snapshot no longer extends the
+        chain ``retriever`` was loaded from (the writer rewrote it after a
+        compaction or ``max_segments`` deltas); the caller then loads it into
+        a fresh retriever. ``retriever`` must not have indexed documents of
+        its own, as appended segments continue the writer's BM25 term ids.
+        """
+
+        if not (self._root / "manifest.json").exists():
+            return []
+        target = _target(retriever)
+        with self._lock, self._file_lock(exclusive=False):
+            manifest = self._manifest()
+            if manifest is None or manifest["generation"] == self._generation:
+                return []
+            kind = "hybrid" if isinstance(target, HybridRetriever) else "documents"
+            same_lineage = self._lineage is not None and self._lineage() is target
+            extends = manifest["segments"][: len(self._segments)] == self._segments
+            if manifest["kind"] != kind:
+                # The writer fell back to the in-memory retriever (or the reverse); there is nothing to follow.
+                return []
+            if not same_lineage or not extends:
+                return None
+            restored: List[dict] = []
+            for name in manifest["segments"][len(self._segments) :]:
+                restored.extend(self._restore_segment(target, kind, name))
+            self._adopt(target, manifest)
+        return restored
+
+    def _merge(self, target: Any, manifest: dict) -> bool:
+        """Add the documents of ``manifest`` that ``target`` lacks; False if ``target`` has none of its own."""
+
+        kind = "hybrid" if isinstance(target, HybridRetriever) else "documents"
+        if manifest["kind"] != kind:
+            return True
+        merged = 0
+        for name in manifest["segments"]:
+            segment = self._root / name
+            payloads = self._read_payloads(segment / "payloads.jsonl")
+            if kind == "documents":
+                before = len(target.documents)
+                target.index(payloads)
+                merged += len(target.documents) - before
+            else:
+                vectors_file = segment / "vectors.npy"
+                vectors = np.load(vectors_file, mmap_mode="r") if vectors_file.exists() else None
+                merged += target.merge_state(payloads, vectors)
+        if merged:
+            LOGGER.info("Merged %d documents saved by another process into %s", merged, self.path)
+        size = len(target) if kind == "hybrid" else len(target.documents)
+        return size > manifest["count"]
+
+    def _restore_segment(self, target: Any, kind: str, name: str) -> List[dict]:
+        segment = self._root / name
+        payloads = self._read_payloads(segment / "payloads.jsonl")
+        if kind == "documents":
+            target.index(payloads)
+            return payloads
+        vectors_file = segment / "vectors.npy"
+        vectors = np.load(vectors_file, mmap_mode="r") if vectors_file.exists() else None
+        bm25 = None
+        if (segment / "bm25_terms.json").exists():
+            bm25 = {key: np.load(segment / f"bm25_{key}.npy", mmap_mode="r") for key in _BM25_ARRAYS}
+            bm25["terms"] = json.loads((segment / "bm25_terms.json").read_text(encoding="utf-8"))
+        target.restore_state(payloads, vectors=vectors, bm25=bm25)
+        return payloads
+
+    def _adopt(self, target: Any, manifest: dict) -> None:
+        """Record ``manifest`` as the snapshot ``target`` now matches."""
+
+        self._lineage = weakref.ref(target)
+        self._segments = list(manifest["segments"])
+        self._count = manifest["count"]
+        self._terms = manifest["terms"]
+        self._generation = manifest["generation"]
+
+    @staticmethod
+    def _read_payloads(path: Path) -> List[dict]:
+        with open(path, "r", encoding="utf-8") as handle:
+            return [json.loads(line) for line in handle if line.strip()]
+
+    # -- writing ---------------------------------------------------------------------------
+
+    def save(self, retriever: Any) -> bool:
+        """Write the documents added since the last save; returns whether a new generation was written."""
+
+        target = _target(retriever)
+        with self._lock, self._file_lock(exclusive=True):
+            started = time.perf_counter()
+            on_disk = self._manifest()
+            same_lineage = self._lineage is not None and self._lineage() is target
+            # A different generation on disk means another process saved since our last save or load.
+            own_manifest = (on_disk["generation"] if on_disk else 0) == self._generation
+            if on_disk is not None and not own_manifest and not self._merge(target, on_disk):
+                # Everything we hold is already in the other process's snapshot.
+                return False
+            full = not same_lineage or not own_manifest or len(self._segments) >= self.max_segments
+            start, start_term = (0, 0) if full else (self._count, self._terms)
+            if isinstance(target, HybridRetriever):
+                kind = "hybrid"
+                state = target.export_state(start, start_term)
+                terms = start_term + len(state["bm25"]["terms"]) if state["bm25"] is not None else 0
+            else:
+                kind = "documents"
+                documents = list(target.documents)
+                state = {"count": len(documents), "payloads": documents[start:], "vectors": None, "bm25": None}
+                terms = 0
+            if state["count"] == (0 if full else self._count):
+                # Nothing new; an empty retriever never replaces a snapshot it did not load.
+                return False
+            generation = max(self._generation, on_disk["generation"] if on_disk else 0) + 1
+            name = f"segment-{generation:06d}"
+            self._write_segment(name, state)
+            segments = [name] if full else self._segments + [name]
+            manifest = {
+                "version": _FORMAT_VERSION,
+                "kind": kind,
+                "generation": generation,
+                "count": state["count"],
+                "terms": terms,
+                "segments": segments,
+                "saved_at": time.time(),
+            }
+            tmp = self._root / "manifest.json.tmp"
+            tmp.write_text(json.dumps(manifest))
+            os.replace(tmp, self._root / "manifest.json")
+            self._remove_unreferenced(segments)
+            self._adopt(target, manifest)
+            self._stats["saves"] += 1
+            self._stats["last_save_ms"] = (time.perf_counter() - started) * 1000
+        return True
+
+    def _write_segment(self, name: str, state: Dict[str, Any]) -> None:
+        tmp = self._root / f"{name}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir()
+        with open(tmp / "payloads.jsonl", "w", encoding="utf-8") as handle:
+            for payload in state["payloads"]:
+                handle.write(json.dumps(payload, ensure_ascii=False, default=str) + "\n")
+        if state["vectors"] is not None:
+            np.save(tmp / "vectors.npy", np.ascontiguousarray(state["vectors"], dtype=np.float32))
+        if state["bm25"] is not None:
+            for key in _BM25_ARRAYS:
+                np.save(tmp / f"bm25_{key}.npy", state["bm25"][key])
+            (tmp / "bm25_terms.json").write_text(json.dumps(state["bm25"]["terms"], ensure_ascii=False), encoding="utf-8")
+        for written in tmp.iterdir():
+            with open(written, "rb") as handle:
+                os.fsync(handle.fileno())
+        # A crash between renaming a segment and swapping the manifest can leave a stale directory here.
+        shutil.rmtree(self._root / name, ignore_errors=True)
+        os.replace(tmp, self._root / name)
+
+    def _remove_unreferenced(self, segments: List[str]) -> None:
+        keep = set(segments)
+        for entry in self._root.iterdir():
+            if entry.is_dir() and entry.name.startswith("segment-") and entry.name not in keep:
+                shutil.rmtree(entry, ignore_errors=True)
+
+    # -- background refresh ----------------------------------------------------------------
+
+    def start(self, retriever: Callable[[], Any], interval: float = 300.0) -> None:
+        """Call :meth:`save` on ``retriever()`` every ``interval`` seconds on a daemon thread."""
+
+        if self._worker is not None:
+            return
+
+        def loop() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.save(retriever())
+                except Exception as exc:  # pragma: no cover - disk full, unserialisable payload
+                    LOGGER.warning("Retriever snapshot failed: %s", exc)
+
+        self._stop.clear()
+        self._worker = threading.Thread(target=loop, name="rag-snapshot", daemon=True)
+        self._worker.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join(timeout=5)
+            self._worker = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(
+                self._stats,
+                path=self.path,
+                generation=self._generation,
+                documents=self._count,
+                segments=len(self._segments),
+            )
+
+
+__all__ = ["RetrieverSnapshot"]
@@ -0,0 +1,226 @@
+"""Time-tiered retrieval: a small in-memory hot partition in front of a cold store."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+import logging
+import threading
+import time
+
+import numpy as np
+
+from .filters import MetadataFilter
+from .local_store import LocalVectorStore
+from .retriever import EmbeddingService, HybridRetriever, RerankerService
+
+LOGGER = logging.getLogger(__name__)
+
+DAY = 86400.0
+
+
+def document_time(doc: dict) -> float:
+    """Publication time of ``doc`` in epoch seconds, falling back to when it was ingested."""
+
+    stamp = doc.get("timestamp")
+    if isinstance(stamp, (int, float)):
+        # Snowball reports milliseconds, the other sources seconds.
+        return stamp / 1000.0 if stamp > 1e11 else float(stamp)
+    return float(doc.get("ingested_at", time.time()))
+
+
+@dataclass
+class TieredRetriever:
+    """Route documents by age into a hot tier (last ``hot_window`` seconds) and a cold tier.
+
+    The hot tier is an in-memory :class:`HybridRetriever` capped at
+    ``hot_max_docs``; ``cold`` is typically Qdrant-backed with BM25 disabled so
+    process memory does not grow with history. Queries search the hot tier
+    and fan out to the cold tier when the hot tier yields fewer than
+    ``top_k`` distinct dense hits with cosine similarity of at least
+    ``min_hot_score`` (BM25 scores are unbounded and do not count), or when
+    the filter reaches back past the hot window. Hot and cold candidates are
+    then merged by dense score, so a strong archived match outranks weak
+    recent ones even without a reranker.
+    :meth:`compact` (periodically via :meth:`start_compaction`) demotes aged
+    documents without re-embedding them. With ``recency_half_life`` set,
+    final ranks are discounted by document age. ``on_indexed`` is called
+    with every indexed batch and its embeddings, not with demoted documents.
+    """
+
+    embedding_service: EmbeddingService
+    cold: HybridRetriever
+    reranker: RerankerService | None = None
+    bm25_tokenizer: Callable[[str], Sequence[str]] | None = None
+    hot_window: float = 7 * DAY
+    hot_max_docs: int = 50000
+    recency_half_life: float = 0.0
+    min_hot_score: float = 0.75
+    on_indexed: Callable[[Sequence[dict], Optional[np.ndarray]], None] | None = field(default=None, repr=False)
+    _hot: HybridRetriever = field(init=False, repr=False)
+    _lock: threading.RLock = field(default_factory=threading.RLock, init=False, repr=False)
+    _stop: threading.Event = field(default_factory=threading.Event, init=False, repr=False)
+    _compactor: Optional[threading.Thread] = field(default=None, init=False, repr=False)
+    _stats: Dict[str, int] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._hot = self._new_hot()
+        self._stats = {"queries": 0, "cold_fanouts": 0, "compactions": 0, "demoted": 0}
+
+    @property
+    def hot(self) -> HybridRetriever:
+        """Current hot-tier retriever (replaced wholesale by :meth:`compact`)."""
+
+        with self._lock:
+            return self._hot
+
+    def _new_hot(self) -> HybridRetriever:
+        return HybridRetriever(
+            vector_store=LocalVectorStore(),
+            embedding_service=self.embedding_service,
+            bm25_tokenizer=self.bm25_tokenizer,
+        )
+
+    def warm_up(self, run_models: bool = True) -> None:
+        """See :meth:`HybridRetriever.warm_up`; the cold tier shares the hot tier's embedding model."""
+
+        self.hot.warm_up(run_models)
+        if self.reranker is not None:
+            self.reranker.warm_up(run_models)
+
+    def index(self, documents: Iterable[dict]) -> None:
+        now = time.time()
+        payloads = [dict(doc, ingested_at=doc.get("ingested_at", now)) for doc in documents if doc.get("text")]
+        if not payloads:
+            return
+        embeddings = np.asarray(self.embedding_service.encode([doc["text"] for doc in payloads]), dtype=np.float32)
+        cutoff = now - self.hot_window
+        is_hot = np.fromiter((document_time(doc) >= cutoff for doc in payloads), dtype=bool, count=len(payloads))
+        if (~is_hot).any():
+            self.cold.add_embedded(embeddings[~is_hot], [doc for doc, hot in zip(payloads, is_hot) if not hot])
+        if is_hot.any():
+            with self._lock:
+                self._hot.add_embedded(embeddings[is_hot], [doc for doc, hot in zip(payloads, is_hot) if hot])
+                overflow = len(self._hot.vector_store) > self.hot_max_docs
+            if overflow:
+                self.compact()
+        if self.on_indexed is not None:
+            self.on_indexed(payloads, embeddings)
+
+    def retrieve(self, query: str, top_k: int = 5, filters: Optional[MetadataFilter] = None) -> List[dict]:
+        return self.retrieve_many([query], top_k=top_k, filters=filters)[0]
+
+    def retrieve_many(
+        self, queries: Sequence[str], top_k: int = 5, filters: Optional[MetadataFilter] = None
+    ) -> List[List[dict]]:
+        if not queries:
+            return []
+        with self._lock:
+            hot = self._hot
+        fetch = top_k * 2
+        results = hot.retrieve_many(queries, top_k=fetch, filters=filters)
+        reaches_back = (
+            filters is not None
+            and filters.since is not None
+            and document_time({"timestamp": filters.since}) < time.time() - self.hot_window
+        )
+        fan_out = [idx for idx, docs in enumerate(results) if reaches_back or self._relevant_hits(docs) < top_k]
+        if fan_out:
+            cold_results = self.cold.retrieve_many([queries[idx] for idx in fan_out], top_k=fetch, filters=filters)
+            for idx, docs in zip(fan_out, cold_results):
+                results[idx] = self._merge(results[idx], docs)
+        with self._lock:
+            self._stats["queries"] += len(queries)
+            self._stats["cold_fanouts"] += len(fan_out)
+        if self.reranker is not None:
+            order = self.reranker.rerank_many(queries, [[doc["text"] for doc in docs] for docs in results], top_k=fetch)
+            results = [[docs[idx] for idx in indices] for docs, indices in zip(results, order)]
+        if self.recency_half_life > 0:
+            results = [self._recency_rank(docs) for docs in results]
+        return [docs[:top_k] for docs in results]
+
+    def _relevant_hits(self, docs: List[dict]) -> int:
+        return len(
+            {doc["text"] for doc in docs if doc.get("source") != "bm25" and doc.get("score", 0.0) >= self.min_hot_score}
+        )
+
+    @staticmethod
+    def _merge(hot_docs: List[dict], cold_docs: List[dict]) -> List[dict]:
+        # Dense hits of both tiers share the cosine scale; hot BM25 hits (raw scores) follow them.
+        dense = [doc for doc in hot_docs if doc.get("source") != "bm25"] + cold_docs
+        dense.sort(key=lambda doc: doc.get("score", 0.0), reverse=True)
+        merged: List[dict] = []
+        seen: set = set()
+        for doc in dense + [doc for doc in hot_docs if doc.get("source") == "bm25"]:
+            if doc["text"] not in seen:
+                seen.add(doc["text"])
+                merged.append(doc)
+        return merged
+
+    def _recency_rank(self, docs: List[dict]) -> List[dict]:
+        now = time.time()
+        weights = [
+            0.5 ** (max(0.0, now - document_time(doc)) / self.recency_half_life) / (rank + 1)
+            for rank, doc in enumerate(docs)
+        ]
+        order = sorted(range(len(docs)), key=lambda idx: weights[idx], reverse=True)
+        return [docs[idx] for idx in order]
+
+    def compact(self) -> int:
+        """Demote documents older than the hot window (or beyond ``hot_max_docs``) to the cold tier."""
+
+        with self._lock:
+            vectors, payloads = self._hot.vector_store.items()
+        if not payloads:
+            return 0
+        ages = np.fromiter((document_time(doc) for doc in payloads), dtype=np.float64, count=len(payloads))
+        demote = ages < time.time() - self.hot_window
+        if (~demote).sum() > self.hot_max_docs:
+            newest = np.argsort(-ages, kind="stable")[: self.hot_max_docs]
+            demote[:] = True
+            demote[newest] = False
+        if not demote.any():
+            return 0
+        moved = [doc for doc, flag in zip(payloads, demote) if flag]
+        # Copy to cold before dropping from hot so documents never vanish from both tiers.
+        self.cold.add_embedded(vectors[demote], moved)
+        moved_ids = {id(doc) for doc in moved}
+        with self._lock:
+            vectors, payloads = self._hot.vector_store.items()
+            keep = np.fromiter((id(doc) not in moved_ids for doc in payloads), dtype=bool, count=len(payloads))
+            hot = self._new_hot()
+            hot.add_embedded(vectors[keep], [doc for doc, flag in zip(payloads, keep) if flag])
+            self._hot = hot
+            self._stats["compactions"] += 1
+            self._stats["demoted"] += len(moved)
+        LOGGER.info("Demoted %d documents from the hot tier", len(moved))
+        return len(moved)
+
+    def start_compaction(self, interval: float = 600.0) -> None:
+        """Run :meth:`compact` every ``interval`` seconds on a daemon thread."""
+
+        if self._compactor is not None:
+            return
+
+        def loop() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.compact()
+                except Exception as exc:  # pragma: no cover - cold store unavailable
+                    LOGGER.warning("Tier compaction failed: %s", exc)
+
+        self._stop.clear()
+        self._compactor = threading.Thread(target=loop, name="rag-tier-compaction", daemon=True)
+        self._compactor.start()
+
+    def stop_compaction(self) -> None:
+        self._stop.set()
+        if self._compactor is not None:
+            self._compactor.join(timeout=5)
+            self._compactor = None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, hot_documents=len(self._hot.vector_store))
+
+
+__all__ = ["TieredRetriever", "document_time"]
@@ -0,0 +1,139 @@
+"""Dictionary-based Chinese tokenizer for the BM25 (sparse) retrieval path."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence
+import re
+
+# Terms that must survive as single tokens: Chan-lun structure, index names and common quant vocabulary.
+FINANCE_VOCABULARY: tuple = (
+    # 缠论
+    "缠论", "中枢", "笔", "线段", "分型", "顶分型", "底分型", "包含关系", "背驰", "盘整背驰", "趋势背驰",
+    "走势类型", "走势中枢", "中枢震荡", "中枢扩张", "中枢延伸", "区间套", "级别", "次级别", "本级别",
+    "一买", "二买", "三买", "一卖", "二卖", "三卖", "第一类买点", "第二类买点", "第三类买点",
+    "第一类卖点", "第二类卖点", "第三类卖点", "买点", "卖点", "盘整", "趋势", "上涨趋势", "下跌趋势",
+    # 指数与市场
+    "上证指数", "上证综指", "深证成指", "创业板指", "科创50", "上证50", "沪深300", "中证500", "中证1000",
+    "中证2000", "国证2000", "恒生指数", "恒生科技", "纳斯达克", "标普500", "道琼斯", "沪股通", "深股通",
+    "北向资金", "南向资金", "融资融券", "两融", "科创板", "创业板", "北交所", "主板", "港股", "美股", "A股",
+    # 量化与风控
+    "量化", "因子", "多因子", "阿尔法", "贝塔", "回测", "实盘", "夏普比率", "最大回撤", "年化收益",
+    "收益率", "波动率", "动量", "反转", "均值回归", "均线", "移动平均", "布林带", "成交量", "成交额",
+    "换手率", "市盈率", "市净率", "市值", "流通市值", "股息率", "净利润", "营业收入", "毛利率",
+    "涨停", "跌停", "涨跌幅", "止损", "止盈", "仓位", "加仓", "减仓", "建仓", "清仓", "多头", "空头",
+    "做多", "做空", "对冲", "套利", "主力资金", "资金流向", "龙虎榜", "金叉", "死叉", "背离", "支撑位",
+    "压力位", "突破", "回调", "反弹", "缩量", "放量", "高开", "低开", "利好", "利空", "估值", "业绩",
+)
+
+_CJK = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_RUN_CACHE_SIZE = 1 << 16
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex equivalent to walking a trie of ``words``, preferring the longest match.
+
+    Each trie node becomes one alternation over its children (leaf children
+    collapse into a character class), so the regex engine follows a single
+    path per position instead of trying every word.
+    """
+
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        leaves = sorted(char for char, child in node.items() if char and set(child) == {""})
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char and char not in leaves]
+        if leaves:
+            branches.append(re.escape(leaves[0]) if len(leaves) == 1 else "[" + "".join(map(re.escape, leaves)) + "]")
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A word may end here: try the longer continuation first (greedy ``?``).
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+@dataclass
+class ChineseTokenizer:
+    """Maximum-match tokenizer over a financial vocabulary with a character-bigram fallback.
+
+    Text is lower-cased, then scanned once by a compiled pattern: vocabulary
+    words (longest match), exchange-prefixed tickers such as ``sh600519``
+    (also emitted as the bare code), other ASCII alphanumerics, and runs of
+    CJK characters that start no vocabulary word. Those runs become
+    overlapping bigrams (a lone character stays a unigram); their
+    tokenisation is memoised since the same phrases recur across documents.
+    Callable, so an instance can be passed as ``bm25_tokenizer``.
+    """
+
+    extra_words: Sequence[str] = ()
+    cache_size: int = _RUN_CACHE_SIZE
+    _pattern: re.Pattern = field(init=False, repr=False)
+    _runs: Dict[str, List[str]] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        words = {word.lower() for word in (*FINANCE_VOCABULARY, *self.extra_words) if word.strip()}
+        starts = "".join(sorted({re.escape(word[0]) for word in words}))
+        word = f"(?=[{starts}]){_trie_pattern(words)}" if words else "(?!)"
+        self._pattern = re.compile(
+            rf"(?P<word>{word})"
+            r"|(?P<ticker>(?:sh|sz|bj|hk)(?P<code>\d{5,6}))"
+            r"|(?P<alnum>[a-z0-9]+(?:\.[a-z0-9]+)*)"
+            rf"|(?P<run>[{_CJK}](?:(?!{word})[{_CJK}])*)"
+        )
+
+    def __call__(self, text: str) -> List[str]:
+        return self.tokenize(text)
+
+    def tokenize(self, text: str) -> List[str]:
+        tokens: List[str] = []
+        runs = self._runs
+        # findall yields one (word, ticker, code, alnum, run) tuple per match with exactly one side filled.
+        for word, ticker, code, alnum, run in self._pattern.findall(text.lower()):
+            if run:
+                split = runs.get(run)
+                if split is None:
+                    split = [run[i : i + 2] for i in range(len(run) - 1)] or [run]
+                    if len(runs) >= self.cache_size:
+                        runs.clear()
+                    runs[run] = split
+                tokens.extend(split)
+            elif ticker:
+                tokens.append(ticker)
+                tokens.append(code)
+            else:
+                tokens.append(word or alnum)
+        return tokens
+
+    def tokenize_many(self, texts: Iterable[str]) -> List[List[str]]:
+        """Tokenise a batch of texts (shares the compiled pattern and run cache)."""
+
+        tokenize = self.tokenize
+        return [tokenize(text) for text in texts]
+
+
+_DEFAULT: Optional[ChineseTokenizer] = None
+
+
+def load_vocabulary(path: str) -> List[str]:
+    """One word per line; blank lines and ``#`` comments are skipped."""
+
+    with open(path, "r", encoding="utf-8") as handle:
+        return [line.strip() for line in handle if line.strip() and not line.startswith("#")]
+
+
+def default_tokenizer() -> ChineseTokenizer:
+    """Process-wide tokenizer over the built-in vocabulary (the BM25 default)."""
+
+    global _DEFAULT
+    if _DEFAULT is None:
+        _DEFAULT = ChineseTokenizer()
+    return _DEFAULT
+
+
+__all__ = ["ChineseTokenizer", "FINANCE_VOCABULARY", "default_tokenizer", "load_vocabulary"]
@@ -2,29 +2,39 @@
 from __future__ import annotations
 
 import logging
-from typing import List, Sequence
+import uuid
+from typing import Any, List, Optional, Sequence
 
-try:  # pragma: no cover - optional dependency
-    from qdrant_client import QdrantClient
-    from qdrant_client.models import Distance, VectorParams, PointStruct
-except Exception:  # pragma: no cover - fallback
-    QdrantClient = None  # type: ignore
-    Distance = VectorParams = PointStruct = object  # type: ignore
+import numpy as np
+
+from ..metrics import STAGE_SECONDS
+from .filters import KEYWORD_FIELDS, TIME_FIELD, MetadataFilter
 
 LOGGER = logging.getLogger(__name__)
 
+_SEARCH_SECONDS = STAGE_SECONDS.labels("qdrant_search")
+_UPSERT_SECONDS = STAGE_SECONDS.labels("qdrant_upsert")
+
 
 class QdrantVectorStore:
-    """Utility class encapsulating qdrant operations."""
+    """Utility class encapsulating qdrant operations.
+
+    ``qdrant_client`` (gRPC, pydantic models) is imported when a store is
+    constructed, so importing the RAG layer without Qdrant stays cheap.
+    """
 
     def __init__(self, host: str, port: int, collection_name: str, api_key: str | None = None) -> None:
-        if QdrantClient is None:
-            raise ImportError("qdrant-client is required for QdrantVectorStore")
+        try:  # pragma: no cover - optional dependency
+            from qdrant_client import QdrantClient, models
+        except Exception as exc:  # pragma: no cover - fallback
+            raise ImportError("qdrant-client is required for QdrantVectorStore") from exc
         self.collection_name = collection_name
         self.client = QdrantClient(host=host, port=port, api_key=api_key)
+        self._models: Any = models
+        self._payload_indexed = False
 
     def ensure_collection(self, vector_size: int) -> None:
-        """Create the collection if it does not exist."""
+        """Create the collection if it does not exist, with payload indexes for filterable fields."""
 
         try:
             self.client.get_collection(self.collection_name)
@@ -32,23 +42,70 @@ class QdrantVectorStore:
             LOGGER.info("Creating Qdrant collection: %s", self.collection_name)
             self.client.recreate_collection(
                 collection_name=self.collection_name,
-                vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
+                vectors_config=self._models.VectorParams(size=vector_size, distance=self._models.Distance.COSINE),
             )
+        if not self._payload_indexed:
+            self._ensure_payload_indexes()
+
+    def _ensure_payload_indexes(self) -> None:
+        schema_type = self._models.PayloadSchemaType
+        schemas = {name: schema_type.KEYWORD for name in KEYWORD_FIELDS}
+        schemas[TIME_FIELD] = schema_type.FLOAT
+        for name, schema in schemas.items():
+            try:
+                self.client.create_payload_index(
+                    collection_name=self.collection_name, field_name=name, field_schema=schema
+                )
+            except Exception as exc:  # pragma: no cover - remote call, index may already exist
+                LOGGER.debug("Payload index on %s not created: %s", name, exc)
+        self._payload_indexed = True
+
+    @staticmethod
+    def point_id(payload: dict) -> str:
+        """Stable id derived from the document, so re-ingesting it overwrites instead of duplicating."""
+
+        material = f"{payload.get('source', '')}|{payload.get('symbol') or payload.get('topic') or ''}|{payload.get('text', '')}"
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, material))
 
     def upsert(self, embeddings: Sequence[Sequence[float]], payloads: Sequence[dict]) -> None:
         """Insert vectors into the collection."""
 
         points = [
-            PointStruct(id=idx, vector=vector, payload=payload)
-            for idx, (vector, payload) in enumerate(zip(embeddings, payloads))
+            self._models.PointStruct(id=self.point_id(payload), vector=vector.tolist(), payload=payload)
+            for vector, payload in zip(np.asarray(embeddings, dtype=float), payloads)
         ]
-        self.client.upsert(collection_name=self.collection_name, points=points)
+        with _UPSERT_SECONDS.time():
+            self.client.upsert(collection_name=self.collection_name, points=points)
 
-    def search(self, embedding: Sequence[float], limit: int = 5) -> List[dict]:
-        """Search for similar vectors and return payloads."""
+    def search(
+        self, embedding: Sequence[float], limit: int = 5, filters: Optional[MetadataFilter] = None
+    ) -> List[dict]:
+        """Search for similar vectors and return payloads with their similarity ``score``."""
 
-        result = self.client.search(collection_name=self.collection_name, query_vector=embedding, limit=limit)
-        return [hit.payload for hit in result]
+        with _SEARCH_SECONDS.time():
+            result = self.client.search(
+                collection_name=self.collection_name,
+                query_vector=np.asarray(embedding, dtype=float).tolist(),
+                query_filter=filters.to_qdrant() if filters is not None else None,
+                limit=limit,
+            )
+        return [dict(hit.payload, score=hit.score) for hit in result]
+
+    def search_batch(
+        self, embeddings: Sequence[Sequence[float]], limit: int = 5, filters: Optional[MetadataFilter] = None
+    ) -> List[List[dict]]:
+        """Search several query vectors in one round trip; one payload list per query."""
+
+        query_filter = filters.to_qdrant() if filters is not None else None
+        requests = [
+            self._models.SearchRequest(
+                vector=np.asarray(vector, dtype=float).tolist(), filter=query_filter, limit=limit, with_payload=True
+            )
+            for vector in embeddings
+        ]
+        with _SEARCH_SECONDS.time():
+            results = self.client.search_batch(collection_name=self.collection_name, requests=requests)
+        return [[dict(hit.payload, score=hit.score) for hit in hits] for hits in results]
 
 
 __all__ = ["QdrantVectorStore"]
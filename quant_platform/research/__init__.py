@@ -1,4 +1,20 @@
 """Research layer exports."""
-from .pipeline import ResearchCoordinator, DummyPaperSearchTool
+from __future__ import annotations
 
-__all__ = ["ResearchCoordinator", "DummyPaperSearchTool"]
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .notes import HumanNotesStore
+    from .pipeline import ResearchCoordinator, DummyPaperSearchTool
+
+_EXPORTS = {
+    "HumanNotesStore": ".notes",
+    "ResearchCoordinator": ".pipeline",
+    "DummyPaperSearchTool": ".pipeline",
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+__all__ = ["ResearchCoordinator", "DummyPaperSearchTool", "HumanNotesStore"]
@@ -0,0 +1,187 @@
+"""Persistent, de-duplicated store for human research notes backed by SQLite FTS5."""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+_TERM_PATTERN = re.compile(r"\w+")
+_MAX_MATCH_TERMS = 32
+
+
+def _normalise(note: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", note).split())
+
+
+@dataclass
+class HumanNotesStore:
+    """Store analyst notes once and retrieve only those relevant to a query.
+
+    Notes are de-duplicated on their normalised text and indexed with an FTS5
+    trigram index so Chinese text without spaces can still be matched. The
+    database file is shared by every worker process pointing at ``path``;
+    ``path=":memory:"`` keeps a private database that lives as long as the
+    store (shared by its threads, not persisted).
+    """
+
+    path: str = "data/research_notes.db"
+    _local: threading.local = field(default_factory=threading.local, init=False, repr=False)
+    _tokenizer: str = field(default="trigram", init=False, repr=False)
+    _uri: str = field(default="", init=False, repr=False)
+    _keepalive: Optional[sqlite3.Connection] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.path == ":memory:":
+            # Per-thread connections must see the same database, so name it and keep one connection open.
+            self._uri = f"file:notes-{uuid.uuid4().hex}?mode=memory&cache=shared"
+            self._keepalive = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+        else:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._create_schema()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # A connection inherited through fork() (preloaded app) must not be used by the child.
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self._uri or self.path, timeout=30, uri=bool(self._uri))
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _create_schema(self) -> None:
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS notes ("
+                "id INTEGER PRIMARY KEY, digest TEXT UNIQUE NOT NULL, text TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            try:
+                conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5("
+                    "text, content='notes', content_rowid='id', tokenize='trigram')"
+                )
+            except sqlite3.OperationalError:  # pragma: no cover - SQLite < 3.34
+                LOGGER.warning("FTS5 trigram tokenizer unavailable; falling back to unicode61")
+                self._tokenizer = "unicode61"
+                conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5("
+                    "text, content='notes', content_rowid='id')"
+                )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS notes_ai AFTER INSERT ON notes BEGIN "
+                "INSERT INTO notes_fts(rowid, text) VALUES (new.id, new.text); END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS notes_ad AFTER DELETE ON notes BEGIN "
+                "INSERT INTO notes_fts(notes_fts, rowid, text) VALUES ('delete', old.id, old.text); END"
+            )
+
+    def add(self, note: str) -> bool:
+        """Persist ``note``; return ``False`` when an identical note already exists."""
+
+        return self.add_many([note]) == 1
+
+    def add_many(self, notes: Iterable[str]) -> int:
+        """Persist several notes in one transaction and return how many were new."""
+
+        rows = []
+        for note in notes:
+            text = _normalise(note)
+            if text:
+                rows.append((hashlib.sha1(text.encode("utf-8")).hexdigest(), text, time.time()))
+        if not rows:
+            return 0
+        conn = self._connection()
+        with conn:
+            cursor = conn.executemany("INSERT OR IGNORE INTO notes(digest, text, created_at) VALUES (?, ?, ?)", rows)
+        return cursor.rowcount
+
+    def _match_expression(self, query: str) -> str:
+        terms: List[str] = []
+        for term in _TERM_PATTERN.findall(_normalise(query)):
+            if self._tokenizer != "trigram":
+                terms.append(term)
+            elif len(term) >= 3:
+                # Trigram windows let long Chinese phrases match notes sharing only part of them.
+                terms.extend(term[i : i + 3] for i in range(len(term) - 2))
+        unique = list(dict.fromkeys(terms))[:_MAX_MATCH_TERMS]
+        return " OR ".join('"{}"'.format(term.replace('"', '""')) for term in unique)
+
+    def _short_terms(self, query: str) -> List[str]:
+        # Trigrams cannot match two-character terms such as "上证"; single characters are too unselective.
+        if self._tokenizer != "trigram":
+            return []
+        terms = [term for term in _TERM_PATTERN.findall(_normalise(query)) if len(term) == 2]
+        return list(dict.fromkeys(terms))[:_MAX_MATCH_TERMS]
+
+    def search(self, query: str, top_k: int = 5) -> List[str]:
+        """Return the ``top_k`` notes most relevant to ``query``.
+
+        Notes matching the query's trigrams come first, ranked by BM25; terms
+        too short for the trigram index are matched with ``LIKE``, notes
+        containing more of them ranking higher. Only an empty query returns
+        the newest notes.
+        """
+
+        expression = self._match_expression(query)
+        short_terms = self._short_terms(query)
+        conn = self._connection()
+        if not expression and not short_terms:
+            rows = conn.execute("SELECT text FROM notes ORDER BY id DESC LIMIT ?", (top_k,)).fetchall()
+            return [row[0] for row in rows]
+        texts: List[str] = []
+        if expression:
+            rows = conn.execute(
+                "SELECT notes.text FROM notes_fts JOIN notes ON notes.id = notes_fts.rowid "
+                "WHERE notes_fts MATCH ? ORDER BY bm25(notes_fts) LIMIT ?",
+                (expression, top_k),
+            ).fetchall()
+            texts = [row[0] for row in rows]
+        if short_terms and len(texts) < top_k:
+            matches = " + ".join("(text LIKE ? ESCAPE '\\')" for _ in short_terms)
+            patterns = ["%{}%".format(re.sub(r"([%_\\])", r"\\\1", term)) for term in short_terms]
+            rows = conn.execute(
+                f"SELECT text FROM notes WHERE ({matches}) > 0 ORDER BY ({matches}) DESC, id DESC LIMIT ?",
+                (*patterns, *patterns, top_k + len(texts)),
+            ).fetchall()
+            seen = set(texts)
+            texts.extend(row[0] for row in rows if row[0] not in seen)
+        return texts[:top_k]
+
+    def list_notes(self, offset: int = 0, limit: int = 50) -> dict:
+        """Page through notes from newest to oldest."""
+
+        conn = self._connection()
+        total = conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+        rows = conn.execute(
+            "SELECT id, text, created_at FROM notes ORDER BY id DESC LIMIT ? OFFSET ?", (limit, offset)
+        ).fetchall()
+        return {
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "notes": [{"id": row[0], "text": row[1], "created_at": row[2]} for row in rows],
+        }
+
+    def delete(self, note_id: int) -> None:
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute("DELETE FROM notes WHERE id = ?", (note_id,))
+        if cursor.rowcount == 0:
+            raise KeyError(f"Note {note_id} not found")
+
+
+__all__ = ["HumanNotesStore"]
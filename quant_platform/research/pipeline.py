@@ -1,8 +1,16 @@
 """Research orchestration combining automated and human-in-the-loop analysis."""
 from __future__ import annotations
 
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from dataclasses import dataclass, field
-from typing import Iterable, List, Protocol
+from typing import Dict, Iterable, List, Protocol, Tuple
+
+from .notes import HumanNotesStore
+
+LOGGER = logging.getLogger(__name__)
 
 
 class ResearchTool(Protocol):
@@ -23,27 +31,156 @@ class DummyPaperSearchTool:
         ]
 
 
+def _tool_name(tool: ResearchTool) -> str:
+    return getattr(tool, "name", None) or type(tool).__name__
+
+
+def _unique_names(tools: List[ResearchTool]) -> List[str]:
+    """Name each tool, suffixing repeats (``Tool``, ``Tool#2``) so stats and cache entries stay apart."""
+
+    names: List[str] = []
+    for tool in tools:
+        base = name = _tool_name(tool)
+        suffix = 1
+        while name in names:
+            suffix += 1
+            name = f"{base}#{suffix}"
+        names.append(name)
+    return names
+
+
 @dataclass
 class ResearchCoordinator:
-    """Coordinate automated research tasks and capture human notes."""
+    """Coordinate automated research tasks and capture human notes.
+
+    Tools are queried concurrently; each one gets ``tool_timeout`` seconds and a
+    tool that misses its deadline simply contributes no results to the report.
+    Results are cached per ``(tool, query)`` for ``cache_ttl`` seconds. Reports
+    only carry the ``notes_top_k`` human notes most relevant to the query.
+    Without an explicit ``notes_store`` notes are kept in memory only.
+
+    Tools are keyed by their ``name`` attribute or class name; two tools that
+    share one get ``#2``, ``#3``... suffixes in ``tool_stats``, the cache and
+    ``tool_timeouts``. A thread cannot be cancelled, so a tool that hangs
+    keeps its pool thread until ``search`` returns; tools should bound their
+    own I/O. Until its overdue call finishes such a tool is reported as
+    ``busy`` and not called again, so it holds at most one of the
+    ``max_workers`` threads.
+    """
 
     tools: Iterable[ResearchTool] = field(default_factory=lambda: [DummyPaperSearchTool()])
-    human_notes: List[str] = field(default_factory=list)
+    notes_store: HumanNotesStore = field(default_factory=lambda: HumanNotesStore(path=":memory:"))
+    notes_top_k: int = 5
+    tool_timeout: float = 10.0
+    tool_timeouts: Dict[str, float] = field(default_factory=dict)
+    cache_ttl: float = 300.0
+    max_workers: int = 8
+    _cache: Dict[Tuple[str, str], Tuple[float, List[dict]]] = field(default_factory=dict, init=False, repr=False)
+    # Guards the cache and the overdue calls, which concurrent reports share.
+    _cache_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _executor: ThreadPoolExecutor | None = field(default=None, init=False, repr=False)
+    _names: List[str] = field(default_factory=list, init=False, repr=False)
+    _overdue: Dict[str, Future] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        # Materialise once so generators are not exhausted by the first report.
+        self.tools = list(self.tools)
+        self._names = _unique_names(self.tools)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="research-tool")
+        return self._executor
+
+    def _cache_get(self, key: Tuple[str, str]) -> List[dict] | None:
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            expires_at, results = entry
+            if expires_at < time.monotonic():
+                del self._cache[key]
+                return None
+            return results
+
+    def _cache_put(self, key: Tuple[str, str], results: List[dict]) -> None:
+        if self.cache_ttl <= 0:
+            return
+        with self._cache_lock:
+            self._cache[key] = (time.monotonic() + self.cache_ttl, results)
+
+    def _timed_search(
+        self, tool: ResearchTool, key: Tuple[str, str]
+    ) -> Tuple[List[dict] | None, float, Exception | None]:
+        started = time.perf_counter()
+        try:
+            results = list(tool.search(key[1]))
+        except Exception as exc:
+            return None, time.perf_counter() - started, exc
+        self._cache_put(key, results)
+        return results, time.perf_counter() - started, None
+
+    def _search_all(self, query: str) -> Tuple[List[dict], Dict[str, dict]]:
+        """Fan out ``query`` to every tool and collect results with per-tool stats."""
 
-    def run_auto_research(self, query: str) -> List[dict]:
         results: List[dict] = []
-        for tool in self.tools:
-            results.extend(tool.search(query))
+        stats: Dict[str, dict] = {}
+        pending: List[Tuple[str, float, Future]] = []
+        started = time.perf_counter()
+        for tool, name in zip(self.tools, self._names):
+            key = (name, query)
+            cached = self._cache_get(key)
+            if cached is not None:
+                stats[name] = {"status": "cached", "latency_ms": 0.0, "results": len(cached)}
+                results.extend(cached)
+                continue
+            with self._cache_lock:
+                overdue = self._overdue.get(name)
+                busy = overdue is not None and not overdue.done()
+                if overdue is not None and not busy:
+                    del self._overdue[name]
+            if busy:
+                stats[name] = {"status": "busy", "latency_ms": 0.0, "results": 0}
+                continue
+            # Late results still land in the cache for the next report.
+            future = self._get_executor().submit(self._timed_search, tool, key)
+            pending.append((name, self.tool_timeouts.get(name, self.tool_timeout), future))
+
+        for name, timeout, future in pending:
+            remaining = max(0.0, started + timeout - time.perf_counter())
+            try:
+                tool_results, elapsed, error = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                LOGGER.warning("Research tool %s timed out after %.1fs", name, timeout)
+                with self._cache_lock:
+                    self._overdue[name] = future
+                stats[name] = {"status": "timeout", "latency_ms": timeout * 1000, "results": 0}
+                continue
+            if tool_results is None:
+                LOGGER.warning("Research tool %s failed: %s", name, error)
+                stats[name] = {"status": "error", "latency_ms": elapsed * 1000, "results": 0, "error": str(error)}
+                continue
+            stats[name] = {"status": "ok", "latency_ms": elapsed * 1000, "results": len(tool_results)}
+            results.extend(tool_results)
+        return results, stats
+
+    def run_auto_research(self, query: str) -> List[dict]:
+        results, _ = self._search_all(query)
         return results
 
-    def add_human_insight(self, note: str) -> None:
-        self.human_notes.append(note)
+    def add_human_insight(self, note: str) -> bool:
+        return self.notes_store.add(note)
+
+    def add_human_insights(self, notes: Iterable[str]) -> int:
+        return self.notes_store.add_many(notes)
 
     def compile_report(self, query: str) -> dict:
+        auto_research, tool_stats = self._search_all(query)
         return {
             "query": query,
-            "auto_research": self.run_auto_research(query),
-            "human_notes": list(self.human_notes),
+            "auto_research": auto_research,
+            "tool_stats": tool_stats,
+            "human_notes": self.notes_store.search(query, top_k=self.notes_top_k),
         }
 
 
@@ -0,0 +1,253 @@
+"""Construction, warm-up and fork handling of the subsystems behind the API.
+
+``app.py`` builds one :class:`PlatformServices` per process, or once in the
+gunicorn master when the app is preloaded (``gunicorn.conf.py``) so model
+weights and indexes loaded there are shared with the forked workers
+copy-on-write instead of being loaded once per worker.
+
+With the ingestion queue enabled, exactly one process (whichever holds the
+queue's drain lock) ingests and writes the shared vector index and
+retriever snapshot; the pipelines of all other processes follow that
+snapshot instead of indexing anything themselves, so every worker answers
+from the same documents.
+"""
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, Optional
+import gc
+import logging
+import os
+import threading
+import time
+
+from .architecture_layer import ArchitectureOptimiser
+from .backtesting import QuantBacktestManager
+from .config import PlatformConfig
+from .frontend import FrontendArchitecturePlanner
+from .hardware import HardwareAdapter
+from .ingestion import DataIngestionManager, IngestionJobQueue, IngestionWorker
+from .llm import (
+    BaseLLMClient,
+    CachingLLMClient,
+    DummyLLMClient,
+    RoutingLLMClient,
+    configure_transport,
+    create_client,
+    create_routing_client,
+    rate_limit_metrics,
+    rate_limited,
+)
+from .rag import AgenticRAGPipeline
+from .research import HumanNotesStore, ResearchCoordinator
+from .virtualization import VirtualLoginSandbox
+
+LOGGER = logging.getLogger(__name__)
+
+WARMUP_MODES = ("sync", "background", "preload", "off")
+
+
+@dataclass
+class PlatformServices:
+    """The long-lived subsystem objects one API process serves requests with."""
+
+    config: PlatformConfig
+    llm_client: BaseLLMClient
+    rag_pipeline: AgenticRAGPipeline
+    ingestion_manager: DataIngestionManager
+    backtest_manager: QuantBacktestManager
+    research_coordinator: ResearchCoordinator
+    frontend_planner: FrontendArchitecturePlanner
+    virtual_sandbox: VirtualLoginSandbox
+    architecture_optimiser: ArchitectureOptimiser
+    hardware_adapter: HardwareAdapter
+    ingestion_queue: Optional[IngestionJobQueue] = None
+    ingestion_worker: Optional[IngestionWorker] = None
+    _ready: threading.Event = field(default_factory=threading.Event, init=False, repr=False)
+    _warmup: Dict[str, Any] = field(default_factory=dict, init=False, repr=False)
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def warm_up(self, run_models: bool = True) -> Dict[str, Any]:
+        """Load models and indexes now (see :meth:`AgenticRAGPipeline.warm_up`) and mark the process ready."""
+
+        start = time.perf_counter()
+        steps = self.rag_pipeline.warm_up(run_models)
+        self._warmup = {
+            "pid": os.getpid(),
+            "run_models": run_models,
+            "steps": steps,
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+        LOGGER.info("Warm-up finished in %.2fs: %s", self._warmup["seconds"], steps)
+        self._ready.set()
+        return self._warmup
+
+    def start_warm_up(self, mode: str) -> None:
+        """Apply a ``ServingConfig.warmup`` mode."""
+
+        if mode not in WARMUP_MODES:
+            raise ValueError(f"Unknown warm-up mode {mode!r}, expected one of {WARMUP_MODES}")
+        if mode == "background":
+            threading.Thread(target=self.warm_up, name="warm-up", daemon=True).start()
+        elif mode in ("sync", "preload"):
+            self.warm_up(run_models=mode == "sync")
+        else:
+            self._ready.set()
+
+    def readiness(self) -> Dict[str, Any]:
+        return dict(self._warmup, ready=self.ready)
+
+    def llm_report(self) -> Dict[str, Any]:
+        """Provider health (routing state, cache and rate-limit metrics) for ``/llm/providers``."""
+
+        llm_client = self.llm_client
+        client = llm_client.inner if isinstance(llm_client, CachingLLMClient) else llm_client
+        report: Dict[str, Any] = (
+            client.health() if isinstance(client, RoutingLLMClient) else {client.provider: {"state": "unrouted"}}
+        )
+        if isinstance(llm_client, CachingLLMClient):
+            report["cache"] = llm_client.stats()
+        report["rate_limits"] = rate_limit_metrics()
+        return report
+
+    def submit_ingest(
+        self, snowball_symbols: Iterable[str], index_symbols: Iterable[str], topics: Iterable[str]
+    ) -> Dict[str, Any]:
+        """Queue an ingestion job and return its id, or ingest inline when the queue is disabled."""
+
+        if self.ingestion_queue is None:
+            self.ingestion_manager.ingest_all(snowball_symbols, index_symbols, topics)
+            return {"status": "ok"}
+        job_id = self.ingestion_queue.enqueue(
+            {"snowball_symbols": list(snowball_symbols), "index_symbols": list(index_symbols), "topics": list(topics)}
+        )
+        if self.ingestion_worker is not None:
+            self.ingestion_worker.notify()
+        return {"status": "queued", "job_id": job_id}
+
+    def ingest_report(self) -> Dict[str, Any]:
+        """Queue depth and the most recent jobs for ``/ingest/jobs``."""
+
+        if self.ingestion_queue is None:
+            return {"enabled": False}
+        return dict(self.ingestion_queue.stats(), enabled=True, recent=self.ingestion_queue.recent())
+
+    def start_background_tasks(self) -> None:
+        if self.ingestion_worker is not None and not self.ingestion_worker.leader:
+            # Follow the snapshot until this process wins the drain lock and is promoted.
+            self.rag_pipeline.writer = False
+        self.rag_pipeline.start_background_tasks()
+        if self.ingestion_worker is not None:
+            self.ingestion_worker.start()
+
+    def stop_background_tasks(self) -> None:
+        if self.ingestion_worker is not None:
+            self.ingestion_worker.stop()
+        self.rag_pipeline.stop_background_tasks()
+
+    def prepare_fork(self) -> None:
+        """Quiesce the parent before workers are forked from it.
+
+        Background threads are stopped, since a lock held by one of them at
+        fork time stays locked forever in the child, and the heap is frozen
+        so the workers' garbage collector does not write to (and thereby
+        copy) the pages holding the preloaded objects.
+        """
+
+        self.stop_background_tasks()
+        gc.collect()
+        gc.freeze()
+
+    def after_fork(self) -> None:
+        """Per-worker start-up after :meth:`prepare_fork`: restart background threads, run the models once."""
+
+        self._ready.clear()
+        self.start_background_tasks()
+        self.warm_up(run_models=True)
+
+
+def build_llm_client(config: PlatformConfig) -> BaseLLMClient:
+    """Configured provider (or router over ``LLM_PROVIDERS``), rate limited and cached; dummy without a token."""
+
+    configure_transport(config.llm_transport)
+    provider = os.getenv("LLM_PROVIDER", "openai")
+    routed_providers = [name.strip() for name in os.getenv("LLM_PROVIDERS", "").split(",") if name.strip()]
+    token = getattr(config.llm_tokens, provider, None)
+    try:
+        if routed_providers:
+            llm_client = create_routing_client(
+                routed_providers,
+                asdict(config.llm_tokens),
+                wrap=lambda client: rate_limited(client, config.llm_rate_limits),
+            )
+        else:
+            llm_client = rate_limited(create_client(provider, token=token), config.llm_rate_limits)
+            # If token missing the concrete client will raise when invoked.
+            # Replace with dummy proactively to keep API responsive.
+            if not token:
+                llm_client = DummyLLMClient(token=None)
+    except Exception:  # pragma: no cover - fallback path
+        llm_client = DummyLLMClient(token=None)
+    if config.llm_cache.enabled and not isinstance(llm_client, DummyLLMClient):
+        llm_client = CachingLLMClient(
+            llm_client,
+            path=config.llm_cache.path,
+            max_entries=config.llm_cache.max_entries,
+            ttl=config.llm_cache.ttl,
+            max_temperature=config.llm_cache.max_temperature,
+        )
+    return llm_client
+
+
+def build_services(config: Optional[PlatformConfig] = None) -> PlatformServices:
+    """Construct every subsystem; models still load lazily unless :meth:`PlatformServices.warm_up` runs."""
+
+    config = config or PlatformConfig()
+    llm_client = build_llm_client(config)
+    # With the queue, the pipeline writes only once its process drains the queue (``on_leader``).
+    rag_pipeline = AgenticRAGPipeline(config=config, llm_client=llm_client, writer=not config.ingestion.queue)
+    ingestion_manager = DataIngestionManager(config=config.data_sources, sink=rag_pipeline)
+    ingestion_queue = ingestion_worker = None
+    if config.ingestion.queue:
+        ingestion_queue = IngestionJobQueue(
+            path=config.ingestion.queue_path,
+            max_attempts=config.ingestion.max_attempts,
+            lease_seconds=config.ingestion.lease_seconds,
+            retry_backoff=config.ingestion.retry_backoff,
+        )
+        ingestion_worker = IngestionWorker(
+            queue=ingestion_queue,
+            manager=ingestion_manager,
+            workers=config.ingestion.workers,
+            batch_size=config.ingestion.batch_jobs,
+            poll_interval=config.ingestion.poll_interval,
+            on_leader=rag_pipeline.promote,
+            on_indexed=rag_pipeline.save_snapshot,
+        )
+        # Jobs left queued or leased by a previous process are resumed by whichever process drains.
+        ingestion_worker.start()
+    return PlatformServices(
+        config=config,
+        llm_client=llm_client,
+        rag_pipeline=rag_pipeline,
+        ingestion_manager=ingestion_manager,
+        backtest_manager=QuantBacktestManager(platform_config=config.backtest),
+        research_coordinator=ResearchCoordinator(
+            notes_store=HumanNotesStore(path=config.research.notes_db_path),
+            notes_top_k=config.research.notes_top_k,
+            tool_timeout=config.research.tool_timeout,
+            cache_ttl=config.research.cache_ttl,
+        ),
+        frontend_planner=FrontendArchitecturePlanner(),
+        virtual_sandbox=VirtualLoginSandbox(),
+        architecture_optimiser=ArchitectureOptimiser(frameworks=["FastAPI", "Ray", "Airflow"]),
+        hardware_adapter=HardwareAdapter(profile=config.hardware),
+        ingestion_queue=ingestion_queue,
+        ingestion_worker=ingestion_worker,
+    )
+
+
+__all__ = ["PlatformServices", "WARMUP_MODES", "build_llm_client", "build_services"]
@@ -1,4 +1,18 @@
 """Virtual container layer exports."""
-from .sandbox import VirtualLoginSandbox, LoginTask
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .sandbox import VirtualLoginSandbox, LoginTask
+
+_EXPORTS = {
+    "VirtualLoginSandbox": ".sandbox",
+    "LoginTask": ".sandbox",
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
 
 __all__ = ["VirtualLoginSandbox", "LoginTask"]
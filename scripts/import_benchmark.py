@@ -0,0 +1,67 @@
+"""Measure cold import time of the platform packages and enforce a budget.
+
+Each module is imported in a fresh interpreter (``python -X importtime``)
+so caches from earlier imports do not hide regressions; the best of
+``--repeat`` runs is compared with its budget and the script exits
+non-zero when any module is over budget. Budgets cover the package's own
+import cost on top of interpreter start-up, so keep heavy dependencies
+(pandas, scipy, torch, qdrant-client) behind first use.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict
+
+# Milliseconds of cumulative import time, per module.
+IMPORT_BUDGETS_MS: Dict[str, float] = {
+    "quant_platform": 30.0,
+    "quant_platform.config": 30.0,
+    "quant_platform.hardware": 30.0,
+    "quant_platform.rag": 30.0,
+    "quant_platform.llm": 30.0,
+    "quant_platform.hardware.adapter": 30.0,
+    # numpy, requests and the retrieval stack; models and Qdrant load on first use.
+    "quant_platform.rag.agentic": 250.0,
+}
+
+
+def import_time_ms(module: str) -> float:
+    """Cumulative import time of ``module`` in a fresh interpreter."""
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    # Lines look like "import time:  self [us] | cumulative | name"; the top-level entry is the module itself.
+    for line in completed.stderr.splitlines():
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000.0
+    raise RuntimeError(f"no import time reported for {module}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="runs per module; the best one is reported")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget, e.g. on slow CI hosts")
+    args = parser.parse_args()
+    failed = False
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        best = min(import_time_ms(module) for _ in range(max(1, args.repeat)))
+        limit = budget * args.scale
+        status = "ok" if best <= limit else "OVER BUDGET"
+        failed |= best > limit
+        print(f"{module:<34} {best:8.1f} ms  (budget {limit:.0f} ms)  {status}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
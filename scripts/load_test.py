@@ -0,0 +1,119 @@
+"""Concurrent load test of ``/recommend``, e.g. to compare the Flask and ASGI serving modes.
+
+    gunicorn -c gunicorn.conf.py -b 127.0.0.1:5000 app:app
+    uvicorn asgi:app --port 8000
+    python scripts/load_test.py --target flask=http://127.0.0.1:5000 --target asgi=http://127.0.0.1:8000
+
+Each target receives ``--requests`` requests from ``--concurrency``
+concurrent clients; throughput, latency percentiles and errors are
+reported per target. Requires ``httpx``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from typing import Dict, List, Tuple
+
+import httpx
+
+DEFAULT_QUERIES = [
+    "如何基于缠论构建趋势追踪策略？",
+    "沪深300 的动量因子在震荡市中如何调整仓位？",
+    "中证500 出现盘整背驰时如何设置止损？",
+]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run_target(url: str, args: argparse.Namespace) -> Dict[str, float]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    counter = itertools.count()
+    queries = itertools.cycle(args.query or DEFAULT_QUERIES)
+    # Distinct session ids keep the answer cache from serving repeated questions.
+    payload = {"rounds": args.rounds, "top_k": args.top_k}
+
+    async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+
+        async def one(index: int) -> None:
+            body = dict(payload, query=next(queries), session_id=f"load-{index}")
+            start = time.perf_counter()
+            try:
+                response = await client.post(args.path, json=body)
+                if response.status_code != 200:
+                    errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+                    return
+            except httpx.HTTPError as exc:
+                errors[type(exc).__name__] = errors.get(type(exc).__name__, 0) + 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+        async def worker() -> None:
+            while True:
+                index = next(counter)
+                if index >= args.requests:
+                    return
+                await one(index)
+
+        await asyncio.gather(*(one(-1 - i) for i in range(min(args.concurrency, 4))))  # warm connections
+        latencies.clear()
+        errors.clear()
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+    return {
+        "requests": args.requests,
+        "ok": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 2),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "max_ms": round(max(latencies, default=float("nan")) * 1000, 1),
+    }
+
+
+def parse_targets(values: List[str]) -> List[Tuple[str, str]]:
+    targets = []
+    for value in values:
+        name, _, url = value.partition("=")
+        targets.append((name, url) if url else (value, value))
+    return targets
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", action="append", default=[], help="name=base_url, repeatable")
+    parser.add_argument("--path", default="/recommend")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--query", action="append", help="question to send (repeatable; cycled)")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+    targets = parse_targets(args.target or ["flask=http://127.0.0.1:5000", "asgi=http://127.0.0.1:8000"])
+    results = {name: asyncio.run(run_target(url, args)) for name, url in targets}
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    columns = ["ok", "errors", "seconds", "throughput_rps", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+    print(f"{'target':<10}" + "".join(f"{column:>16}" for column in columns))
+    for name, result in results.items():
+        cells = [str(result[column] if column != "errors" else sum(result["errors"].values())) for column in columns]
+        print(f"{name:<10}" + "".join(f"{cell:>16}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
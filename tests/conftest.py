@@ -0,0 +1,14 @@
+import numpy as np
+import pytest
+
+
+class HashEmbeddings:
+    """Deterministic two-dimensional embeddings, so retrieval tests need no model."""
+
+    def encode(self, texts):
+        return np.asarray([[len(text) % 7 + 1.0, sum(map(ord, text)) % 11 + 1.0] for text in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def embeddings():
+    return HashEmbeddings()
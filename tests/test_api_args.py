@@ -0,0 +1,22 @@
+import pytest
+
+from quant_platform.api_args import int_arg, recommend_args
+
+
+def test_int_arg_defaults_and_clamps():
+    assert int_arg({}, "limit", 50, 500) == 50
+    assert int_arg({"limit": "9999"}, "limit", 50, 500) == 500
+    assert int_arg({"offset": "-3"}, "offset", 0) == 0
+    with pytest.raises(ValueError, match="offset must be an integer"):
+        int_arg({"offset": "abc"}, "offset", 0)
+
+
+def test_recommend_args_parses_body_and_rejects_malformed_values():
+    rounds, top_k, filters = recommend_args({"rounds": "3", "filters": {"symbol": "SH000001"}})
+    assert (rounds, top_k) == (3, 5)
+    assert filters.equals == (("symbol", "SH000001"),)
+    assert recommend_args({})[2] is None
+    with pytest.raises(ValueError, match="top_k must be an integer"):
+        recommend_args({"top_k": None})
+    with pytest.raises(ValueError, match="filters must be an object"):
+        recommend_args({"filters": ["symbol"]})
@@ -0,0 +1,49 @@
+from quant_platform.rag.context import ContextPacker, fit_sentence
+from quant_platform.rag.chunking import DocumentChunker
+
+
+def test_unpunctuated_passage_is_cut_not_dropped():
+    packer = ContextPacker(budget_tokens=1000, max_passage_tokens=100)
+
+    packed = packer.pack("上证", [{"text": "上证指数" * 500}])
+
+    assert packed.passages == 1
+    assert 0 < packed.tokens <= 100
+    assert packed.truncated
+    assert packed.text.startswith("上证指数")
+
+
+def test_clause_only_passage_keeps_relevant_clauses():
+    packer = ContextPacker(budget_tokens=1000, max_passage_tokens=100)
+    text = "上证指数走势分析，" * 300 + "中证500 的盘整背驰需要设置止损，"
+
+    packed = packer.pack("中证500 止损", [{"text": text}])
+
+    assert packed.passages == 1
+    assert 0 < packed.tokens <= 100
+    assert "中证500 的盘整背驰需要设置止损" in packed.text
+
+
+def test_long_top_document_stays_ahead_of_later_ones():
+    packer = ContextPacker(budget_tokens=150, max_passage_tokens=100)
+
+    packed = packer.pack("上证", [{"text": "上证指数" * 500}, {"text": "其他材料。"}])
+
+    assert packed.text.startswith("上证指数")
+
+
+def test_fit_sentence_pieces_respect_limit():
+    counter = len
+    pieces = list(fit_sentence("甲乙丙丁" * 100, 400, 30, counter))
+
+    assert "".join(piece for piece, _ in pieces) == "甲乙丙丁" * 100
+    assert all(tokens <= 30 for _, tokens in pieces)
+
+
+def test_chunker_still_splits_long_sentences():
+    chunker = DocumentChunker(chunk_tokens=50, overlap_tokens=0)
+
+    chunks = list(chunker.chunk([{"text": "上证指数" * 200, "source": "t"}]))
+
+    assert len(chunks) > 1
+    assert all(chunker.token_counter(chunk["text"]) <= 50 for chunk in chunks)
@@ -0,0 +1,44 @@
+import pytest
+
+from quant_platform.rag.filters import MetadataFilter, PayloadIndex
+
+
+def test_from_dict_parses_equality_membership_and_time_range():
+    flt = MetadataFilter.from_dict({"symbol": "SH1", "source": ["snowball", "a-share-index"], "timestamp": {"gte": 1}})
+
+    assert (flt.equals, flt.any_of, flt.since, flt.until) == (
+        (("symbol", "SH1"),),
+        (("source", ("snowball", "a-share-index")),),
+        1,
+        None,
+    )
+    assert flt.matches({"symbol": "SH1", "source": "snowball", "timestamp": 2})
+    assert not flt.matches({"symbol": "SH1", "source": "snowball", "timestamp": 0})
+    assert MetadataFilter.from_dict(None) is None
+
+
+@pytest.mark.parametrize(
+    "spec, message",
+    [
+        (["symbol"], "filters must be an object"),
+        ({"timestamp": {"gte": "yesterday"}}, "timestamp.gte must be a number"),
+        ({"timestamp": {"lte": True}}, "timestamp.lte must be a number"),
+        ({"timestamp": {"gt": 1}}, "supports gte and lte"),
+        ({"symbol": {"a": 1}}, "symbol must be a string, number, boolean or null"),
+        ({"symbol": [["x"]]}, "symbol must be a string, number, boolean or null"),
+    ],
+)
+def test_from_dict_rejects_malformed_specs(spec, message):
+    with pytest.raises(ValueError, match=message):
+        MetadataFilter.from_dict(spec)
+
+
+def test_payload_index_does_not_cache_masks_for_absent_values():
+    index = PayloadIndex()
+    index.add([{"symbol": "SH1"}, {"symbol": "SH2"}, {"symbol": "SH1"}])
+
+    assert index.candidates(MetadataFilter.from_dict({"symbol": "SH1"})).tolist() == [0, 2]
+    for missing in range(100):
+        assert not len(index.candidates(MetadataFilter.from_dict({"symbol": f"missing{missing}"})))
+    assert index.candidates(MetadataFilter.from_dict({"symbol": ["SH2", "missing0"]})).tolist() == [1]
+    assert len(index._bitmaps) == 2
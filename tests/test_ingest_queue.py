@@ -0,0 +1,165 @@
+import multiprocessing
+import time
+from functools import partial
+
+from quant_platform.ingestion.queue import IngestionJobQueue, IngestionWorker
+from quant_platform.rag.local_store import LocalVectorStore
+from quant_platform.rag.retriever import HybridRetriever
+
+
+class FlakyStore(LocalVectorStore):
+    """Fails the ``fail_on``-th upsert once, after earlier batches went through."""
+
+    def __init__(self, fail_on):
+        super().__init__()
+        self.fail_on = fail_on
+        self.upserts = 0
+
+    def upsert(self, embeddings, payloads):
+        self.upserts += 1
+        if self.upserts == self.fail_on:
+            raise RuntimeError("vector store unavailable")
+        super().upsert(embeddings, payloads)
+
+
+class Manager:
+    """Stands in for DataIngestionManager: deterministic documents, indexed in batches of two."""
+
+    def __init__(self, retriever=None, failing_symbols=()):
+        self.retriever = retriever
+        self.failing_symbols = set(failing_symbols)
+
+    def collect(self, index_symbols):
+        if self.failing_symbols & set(index_symbols):
+            raise RuntimeError("source down")
+        return [{"source": "a-share-index", "symbol": symbol, "text": f"指数 {symbol} 快照"} for symbol in index_symbols]
+
+    def index(self, documents):
+        if self.retriever is not None:
+            for start in range(0, len(documents), 2):
+                self.retriever.index(documents[start : start + 2])
+
+
+def _queue(tmp_path, **kwargs):
+    kwargs.setdefault("retry_backoff", 0)
+    return IngestionJobQueue(path=str(tmp_path / "queue.db"), **kwargs)
+
+
+def _claimer(path, results):
+    queue = IngestionJobQueue(path=path)
+    claimed = []
+    while True:
+        jobs = queue.claim(3)
+        if not jobs:
+            break
+        claimed.extend(job.id for job in jobs)
+    results.put(claimed)
+
+
+def test_retry_after_partial_index_failure_does_not_duplicate_documents(tmp_path, embeddings):
+    queue = _queue(tmp_path)
+    retriever = HybridRetriever(vector_store=FlakyStore(fail_on=2), embedding_service=embeddings)
+    worker = IngestionWorker(queue=queue, manager=Manager(retriever), batch_size=4)
+    job_ids = [queue.enqueue({"index_symbols": [f"SH{idx}", f"SZ{idx}"]}) for idx in range(2)]
+
+    assert worker.run_once() == 2
+    assert [queue.get(job_id)["stage"] for job_id in job_ids] == ["retrying"] * 2
+    assert len(retriever.vector_store) == 2
+
+    assert worker.drain() == 2
+    assert [(job["status"], job["attempts"], job["documents"]) for job in map(queue.get, job_ids)] == [("done", 2, 2)] * 2
+    assert len(retriever.vector_store) == 4
+    assert len(retriever.sparse_search(["快照"], limit=10)[0]) == 4
+
+
+def test_failed_fetch_backs_off_and_fails_after_max_attempts(tmp_path):
+    queue = _queue(tmp_path, max_attempts=2, retry_backoff=0.2)
+    worker = IngestionWorker(queue=queue, manager=Manager(failing_symbols={"BAD"}))
+    bad = queue.enqueue({"index_symbols": ["BAD"]})
+    good = queue.enqueue({"index_symbols": ["SH1"]})
+
+    assert worker.run_once() == 2
+    assert queue.get(good)["status"] == "done"
+    assert (queue.get(bad)["status"], queue.get(bad)["stage"]) == ("queued", "retrying")
+    assert queue.claim(10) == []
+
+    time.sleep(0.25)
+    assert worker.run_once() == 1
+    job = queue.get(bad)
+    assert (job["status"], job["attempts"]) == ("failed", 2)
+    assert "source down" in job["error"]
+    assert queue.stats()["jobs"] == {"queued": 0, "running": 0, "done": 1, "failed": 1}
+
+
+def test_expired_lease_is_claimed_again_until_attempts_run_out(tmp_path):
+    queue = _queue(tmp_path, max_attempts=2, lease_seconds=0.1)
+    job_id = queue.enqueue({"index_symbols": ["SH1"]})
+
+    assert [job.id for job in queue.claim(10)] == [job_id]
+    assert queue.claim(10) == []
+    time.sleep(0.15)
+    assert [(job.id, job.attempts) for job in queue.claim(10)] == [(job_id, 2)]
+
+    time.sleep(0.15)
+    assert queue.claim(10) == []
+    assert (queue.get(job_id)["status"], queue.get(job_id)["error"]) == ("failed", "lease expired")
+
+
+def test_set_stage_renews_the_lease(tmp_path):
+    queue = _queue(tmp_path, lease_seconds=0.2)
+    job_id = queue.enqueue({"index_symbols": ["SH1"]})
+    queue.claim(1)
+
+    time.sleep(0.12)
+    queue.set_stage([job_id], "indexing", {job_id: 3})
+    time.sleep(0.12)
+
+    assert queue.claim(1) == []
+    assert (queue.get(job_id)["stage"], queue.get(job_id)["documents"]) == ("indexing", 3)
+
+
+def test_concurrent_processes_claim_each_job_once(tmp_path):
+    queue = _queue(tmp_path)
+    job_ids = {queue.enqueue({"index_symbols": [str(idx)]}) for idx in range(120)}
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    processes = [context.Process(target=_claimer, args=(queue.path, results)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    claimed = [job_id for _ in processes for job_id in results.get(timeout=60)]
+    for process in processes:
+        process.join(10)
+
+    assert len(claimed) == len(set(claimed)) == 120
+    assert set(claimed) == job_ids
+
+
+def test_only_the_process_holding_the_drain_lock_drains_the_queue(tmp_path):
+    promoted = []
+
+    def worker(name):
+        on_leader = partial(promoted.append, name)
+        return IngestionWorker(queue=_queue(tmp_path), manager=Manager(), poll_interval=0.05, on_leader=on_leader)
+
+    first, second = worker("first"), worker("second")
+    first.start()
+    try:
+        job_id = first.queue.enqueue({"index_symbols": ["SH1"]})
+        for _ in range(100):
+            if first.queue.get(job_id)["status"] == "done":
+                break
+            time.sleep(0.02)
+        second.start()
+        time.sleep(0.2)
+        assert (first.leader, second.leader, promoted) == (True, False, ["first"])
+        assert first.queue.get(job_id)["status"] == "done"
+
+        first.stop()
+        for _ in range(100):
+            if second.leader:
+                break
+            time.sleep(0.02)
+        assert promoted == ["first", "second"]
+    finally:
+        first.stop()
+        second.stop()
@@ -0,0 +1,56 @@
+import asyncio
+import threading
+import time
+
+from quant_platform.llm import BaseLLMClient, CachingLLMClient
+
+
+class SlowClient(BaseLLMClient):
+    provider = "slow"
+
+    def __init__(self):
+        super().__init__(token=None)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, **kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(0.1)
+        return f"answer to {prompt}"
+
+    async def agenerate(self, prompt, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.1)
+        return f"answer to {prompt}"
+
+
+def test_concurrent_identical_calls_share_one_upstream_request():
+    inner = SlowClient()
+    client = CachingLLMClient(inner, path=None)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.generate("上证指数 走势"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["answer to 上证指数 走势"] * 8
+    assert inner.calls == 1
+    stats = client.stats()
+    assert (stats["misses"], stats["coalesced"]) == (1, 7)
+    assert client.generate("上证指数  走势") == "answer to 上证指数 走势"
+    assert client.stats()["memory_hits"] == 1
+
+
+def test_concurrent_identical_coroutines_share_one_upstream_request():
+    inner = SlowClient()
+    client = CachingLLMClient(inner, path=None)
+
+    async def main():
+        return await asyncio.gather(*(client.agenerate("沪深300 估值") for _ in range(5)), client.agenerate("中证500"))
+
+    results = asyncio.run(main())
+    assert results == ["answer to 沪深300 估值"] * 5 + ["answer to 中证500"]
+    assert inner.calls == 2
+    assert client.stats()["coalesced"] == 4
@@ -0,0 +1,56 @@
+import re
+
+import pytest
+
+from quant_platform.metrics import CONTENT_TYPE, MetricsRegistry, render_metrics
+from quant_platform.rag.local_store import LocalVectorStore
+from quant_platform.rag.retriever import HybridRetriever
+
+_SAMPLE = re.compile(r'^[a-z_]+(\{[a-z_]+="(?:[^"\\]|\\.)*"(,[a-z_]+="(?:[^"\\]|\\.)*")*\})? -?[0-9.e+-]+$')
+
+
+def _value(exposition, sample):
+    for line in exposition.splitlines():
+        if line.startswith(sample + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_registry_renders_the_prometheus_text_format():
+    registry = MetricsRegistry()
+    events = registry.counter("demo_events_total", "Events\nby kind.", ("kind",))
+    events.labels('say "hi"').inc(2)
+    latency = registry.histogram("demo_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        latency.labels("fetch").observe(value)
+
+    assert registry.render().splitlines() == [
+        "# HELP demo_events_total Events\\nby kind.",
+        "# TYPE demo_events_total counter",
+        'demo_events_total{kind="say \\"hi\\""} 2',
+        "# HELP demo_seconds Latency.",
+        "# TYPE demo_seconds histogram",
+        'demo_seconds_bucket{stage="fetch",le="0.1"} 1',
+        'demo_seconds_bucket{stage="fetch",le="1"} 2',
+        'demo_seconds_bucket{stage="fetch",le="+Inf"} 3',
+        'demo_seconds_sum{stage="fetch"} 5.55',
+        'demo_seconds_count{stage="fetch"} 3',
+    ]
+    assert registry.counter("demo_events_total", "Events by kind.", ("kind",)) is events
+    with pytest.raises(ValueError, match="different type or labels"):
+        registry.histogram("demo_events_total", "Events by kind.", ("kind",))
+
+
+def test_metrics_exposition_counts_instrumented_stages(embeddings):
+    before = render_metrics()
+    retriever = HybridRetriever(vector_store=LocalVectorStore(), embedding_service=embeddings)
+    retriever.index([{"text": "上证指数 盘整背驰", "source": "test"}])
+    retriever.retrieve("盘整背驰", top_k=1)
+    after = render_metrics()
+
+    assert CONTENT_TYPE.startswith("text/plain; version=0.0.4")
+    for stage in ("bm25_score", "memory_index_search", "memory_index_upsert"):
+        sample = f'quant_platform_stage_seconds_count{{stage="{stage}"}}'
+        assert _value(after, sample) == _value(before, sample) + 1
+    for line in after.splitlines():
+        assert line.startswith("# ") or _SAMPLE.match(line), line
@@ -0,0 +1,33 @@
+import threading
+
+from quant_platform.research import HumanNotesStore, ResearchCoordinator
+
+
+def test_two_character_query_matches_instead_of_newest(tmp_path):
+    store = HumanNotesStore(path=str(tmp_path / "notes.db"))
+    store.add_many(["上证指数放量突破", "创业板缩量回调", "白酒板块估值修复"])
+
+    assert store.search("上证", top_k=2) == ["上证指数放量突破"]
+    assert store.search("上证 板块", top_k=5)[0] in {"上证指数放量突破", "白酒板块估值修复"}
+    assert "创业板缩量回调" not in store.search("上证 板块", top_k=5)
+
+
+def test_like_wildcards_in_short_terms_are_literal(tmp_path):
+    store = HumanNotesStore(path=str(tmp_path / "notes.db"))
+    store.add_many(["a_b 因子", "axb 因子"])
+
+    assert store.search("a_", top_k=5) == ["a_b 因子"]
+
+
+def test_default_coordinator_store_is_in_memory_and_shared_across_threads(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    coordinator = ResearchCoordinator(tools=[])
+    coordinator.add_human_insight("缠论盘整背驰需要设置止损")
+
+    found = []
+    thread = threading.Thread(target=lambda: found.extend(coordinator.notes_store.search("止损")))
+    thread.start()
+    thread.join()
+
+    assert found == ["缠论盘整背驰需要设置止损"]
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from quant_platform.rag.quantized_store import QuantizedVectorStore
+
+
+def _vectors(count, dim=16, seed=0):
+    return np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+
+
+def _payloads(count):
+    return [{"text": f"研报 {idx}", "source": "test"} for idx in range(count)]
+
+
+def test_reingesting_the_same_documents_does_not_append_duplicates(tmp_path):
+    store = QuantizedVectorStore(path=str(tmp_path / "index"))
+    vectors = _vectors(10)
+    store.upsert(vectors, _payloads(10))
+    store.upsert(vectors[:5], _payloads(5))
+    store.upsert(np.vstack([vectors[:2], vectors[:2]]), [{"text": "新文档"}, {"text": "新文档"}])
+
+    assert len(store) == 11
+    assert len(QuantizedVectorStore(path=str(tmp_path / "index"))) == 11
+    hits = store.search(vectors[3], limit=3)
+    assert len({hit["text"] for hit in hits}) == 3
+
+
+def test_rescoring_is_opt_in_and_costs_two_bytes_per_dimension(tmp_path):
+    plain = QuantizedVectorStore(path=str(tmp_path / "plain"))
+    rescored = QuantizedVectorStore(path=str(tmp_path / "rescored"), rescore=True)
+    for store in (plain, rescored):
+        store.upsert(_vectors(10), _payloads(10))
+
+    assert not (tmp_path / "plain" / "vectors.f16").exists()
+    assert (tmp_path / "rescored" / "vectors.f16").stat().st_size == rescored._capacity * 2 * 16
+    assert plain.search(_vectors(10)[4], limit=1)[0]["text"] == "研报 4"
+    assert rescored.search(_vectors(10)[4], limit=1)[0]["text"] == "研报 4"
+    with pytest.raises(ValueError, match="without float16 originals"):
+        QuantizedVectorStore(path=str(tmp_path / "plain"), rescore=True)
+
+
+def test_items_slices_like_the_in_memory_store(tmp_path):
+    store = QuantizedVectorStore(path=str(tmp_path / "index"), rescore=True)
+    vectors = _vectors(6)
+    store.upsert(vectors, _payloads(6))
+
+    sliced, payloads = store.items(2, 4)
+    assert [payload["text"] for payload in payloads] == ["研报 2", "研报 3"]
+    normalised = vectors[2:4] / np.linalg.norm(vectors[2:4], axis=1, keepdims=True)
+    np.testing.assert_allclose(sliced, normalised, atol=1e-3)
+    assert len(store.items(4)[1]) == 2
+    assert store.items(6)[0].shape == (0, 16)
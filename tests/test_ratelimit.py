@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from quant_platform.config import PlatformConfig
+from quant_platform.llm import BATCH_PRIORITY, INTERACTIVE_PRIORITY, DummyLLMClient
+from quant_platform.llm.ratelimit import ProviderRateLimiter, RateLimitedLLMClient
+from quant_platform.metrics import render_metrics
+from quant_platform.rag import AgenticRAGPipeline
+
+
+class RecordingClient(DummyLLMClient):
+    def __init__(self):
+        super().__init__(token=None)
+        self.priorities = []
+
+    def generate(self, prompt, **kwargs):
+        self.priorities.append(kwargs.get("priority"))
+        return super().generate(prompt, **kwargs)
+
+    def stream(self, prompt, **kwargs):
+        self.priorities.append(kwargs.get("priority"))
+        yield super().generate(prompt, **kwargs)
+
+
+def test_interactive_calls_are_admitted_before_queued_batch_calls():
+    limiter = ProviderRateLimiter(tokens_per_minute=600, provider="priority-test")
+    limiter.acquire(600)
+    admitted = []
+
+    def call(priority):
+        limiter.acquire(1, priority=priority)
+        admitted.append(priority)
+
+    batch = threading.Thread(target=call, args=(BATCH_PRIORITY,))
+    batch.start()
+    time.sleep(0.02)
+    interactive = threading.Thread(target=call, args=(INTERACTIVE_PRIORITY,))
+    interactive.start()
+    batch.join()
+    interactive.join()
+
+    assert admitted == [INTERACTIVE_PRIORITY, BATCH_PRIORITY]
+    exposition = render_metrics()
+    assert 'quant_platform_llm_queue_seconds_count{provider="priority-test",priority="interactive"} 2' in exposition
+    assert 'quant_platform_llm_queue_seconds_count{provider="priority-test",priority="batch"} 1' in exposition
+
+
+def test_pipeline_forwards_the_callers_priority_to_the_llm():
+    client = RecordingClient()
+    pipeline = AgenticRAGPipeline(config=PlatformConfig(), llm_client=client, answer_cache=None)
+    pipeline.ingest([{"text": "缠论 中枢 背驰"}])
+
+    pipeline.run("缠论", rounds=1, priority=INTERACTIVE_PRIORITY)
+    assert client.priorities == [INTERACTIVE_PRIORITY] * 3
+    client.priorities.clear()
+    list(pipeline.run_stream("缠论", rounds=1))
+    assert client.priorities == [BATCH_PRIORITY] * 3
+
+
+class InterruptingCondition(threading.Condition):
+    def wait(self, timeout=None):
+        raise KeyboardInterrupt
+
+
+def test_interrupted_waiter_leaves_the_queue():
+    limiter = ProviderRateLimiter(tokens_per_minute=600)
+    limiter.acquire(600)
+    limiter._condition = InterruptingCondition()
+
+    with pytest.raises(KeyboardInterrupt):
+        limiter.acquire(1)
+    assert limiter.metrics()["queue_depth"] == 0
+
+
+def test_abandoned_stream_returns_its_unused_token_estimate():
+    class ChunkedClient(DummyLLMClient):
+        def stream(self, prompt, **kwargs):
+            for _ in range(100):
+                yield "chunk"
+
+    limiter = ProviderRateLimiter(tokens_per_minute=6000)
+    client = RateLimitedLLMClient(ChunkedClient(token=None), limiter, default_completion_tokens=2000)
+    stream = client.stream("prompt")
+    assert next(stream) == "chunk"
+    assert limiter._tokens._level < 6000 - 2000
+
+    stream.close()
+    assert limiter._tokens._level > 6000 - 10
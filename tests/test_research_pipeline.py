@@ -0,0 +1,61 @@
+import threading
+
+from quant_platform.research import HumanNotesStore, ResearchCoordinator
+
+
+class StaticTool:
+    def __init__(self, title):
+        self.title = title
+        self.calls = 0
+
+    def search(self, query):
+        self.calls += 1
+        return [{"title": f"{self.title}: {query}"}]
+
+
+class HangingTool:
+    name = "hanging"
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = 0
+
+    def search(self, query):
+        self.calls += 1
+        self.release.wait(5)
+        return [{"title": "late"}]
+
+
+def _coordinator(*tools, **kwargs):
+    return ResearchCoordinator(tools=tools, notes_store=HumanNotesStore(path=":memory:"), **kwargs)
+
+
+def test_tools_of_the_same_class_keep_separate_stats_and_cache():
+    first, second = StaticTool("first"), StaticTool("second")
+    coordinator = _coordinator(first, second, tool_timeouts={"StaticTool#2": 1.0})
+
+    report = coordinator.compile_report("动量")
+    cached = coordinator.compile_report("动量")
+
+    assert [hit["title"] for hit in report["auto_research"]] == ["first: 动量", "second: 动量"]
+    assert sorted(report["tool_stats"]) == ["StaticTool", "StaticTool#2"]
+    assert cached["auto_research"] == report["auto_research"]
+    assert {stats["status"] for stats in cached["tool_stats"].values()} == {"cached"}
+    assert (first.calls, second.calls) == (1, 1)
+
+
+def test_hung_tool_is_reported_busy_instead_of_taking_more_threads():
+    hanging, fast = HangingTool(), StaticTool("fast")
+    coordinator = _coordinator(hanging, fast, tool_timeout=0.05, cache_ttl=0)
+    try:
+        assert coordinator.compile_report("q1")["tool_stats"]["hanging"]["status"] == "timeout"
+        stats = coordinator.compile_report("q2")["tool_stats"]
+        assert (stats["hanging"]["status"], stats["StaticTool"]["status"]) == ("busy", "ok")
+        assert hanging.calls == 1
+
+        hanging.release.set()
+        coordinator._overdue["hanging"].result(timeout=5)
+        assert coordinator.compile_report("q3")["tool_stats"]["hanging"]["status"] == "ok"
+        assert hanging.calls == 2
+    finally:
+        hanging.release.set()
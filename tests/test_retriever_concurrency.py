@@ -0,0 +1,52 @@
+import threading
+
+import pytest
+
+from quant_platform.rag import bm25
+from quant_platform.rag.filters import MetadataFilter
+from quant_platform.rag.local_store import LocalVectorStore
+from quant_platform.rag.retriever import HybridRetriever
+
+
+@pytest.fixture(params=["scipy", "numpy"])
+def retriever(request, monkeypatch, embeddings):
+    if request.param == "numpy":
+        monkeypatch.setattr(bm25, "_SPARSE", None)
+    return HybridRetriever(vector_store=LocalVectorStore(), embedding_service=embeddings)
+
+
+def test_queries_during_ingestion_never_see_half_published_documents(retriever):
+    batches = [
+        [{"text": f"上证指数 第{batch}批 文档{idx}", "symbol": f"S{idx % 3}"} for idx in range(20)]
+        for batch in range(60)
+    ]
+    errors = []
+    done = threading.Event()
+
+    def ingest():
+        try:
+            for batch in batches:
+                retriever.index(batch)
+        finally:
+            done.set()
+
+    def query():
+        flt = MetadataFilter.from_dict({"symbol": "S1"})
+        while not done.is_set():
+            try:
+                for hits in retriever.sparse_search(["上证指数 文档"], limit=5) + retriever.sparse_search(
+                    ["上证指数"], limit=5, filters=flt
+                ):
+                    assert all(hit["text"].startswith("上证指数") for hit in hits)
+            except Exception as exc:  # collected so the failure is reported from the main thread
+                errors.append(exc)
+                return
+
+    threads = [threading.Thread(target=ingest)] + [threading.Thread(target=query) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(retriever.sparse_search(["文档"], limit=2000)[0]) == 60 * 20
@@ -0,0 +1,144 @@
+import asyncio
+import time
+
+import pytest
+
+from quant_platform.llm.base import BaseLLMClient
+from quant_platform.llm.router import RoutingLLMClient
+from quant_platform.llm.transport import LLMRequestError
+
+
+class FakeProvider(BaseLLMClient):
+    def __init__(self, name, delay=0.0, fail=False):
+        super().__init__(token=None, model=name)
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = 0
+
+    def _answer(self):
+        if self.fail:
+            raise RuntimeError(f"{self.name} is down")
+        return f"answer from {self.name}"
+
+    def generate(self, prompt, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self._answer()
+
+    async def agenerate(self, prompt, **kwargs):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return self._answer()
+
+
+def _router(*providers, **kwargs):
+    return RoutingLLMClient({provider.name: provider for provider in providers}, **kwargs)
+
+
+def _prime(router, name, latency, samples=5):
+    for _ in range(samples):
+        router.stats[name].record(latency, True)
+
+
+def test_circuit_opens_after_failures_and_half_opens_after_cooldown():
+    solo = FakeProvider("solo", fail=True)
+    router = _router(solo, failure_threshold=2, reset_timeout=0.2)
+
+    for _ in range(2):
+        with pytest.raises(LLMRequestError, match="all providers failed"):
+            router.generate("q")
+    assert router.health()["solo"]["state"] == "open"
+    with pytest.raises(LLMRequestError, match="no healthy provider"):
+        router.generate("q")
+    assert solo.calls == 2
+
+    time.sleep(0.25)
+    assert router.health()["solo"]["state"] == "half-open"
+    solo.fail = False
+    assert router.generate("q") == "answer from solo"
+    assert solo.calls == 3
+    assert router.health()["solo"]["state"] == "closed"
+
+
+def test_failed_half_open_trial_reopens_the_circuit():
+    solo = FakeProvider("solo", fail=True)
+    router = _router(solo, failure_threshold=1, reset_timeout=0.1)
+    with pytest.raises(LLMRequestError):
+        router.generate("q")
+
+    time.sleep(0.15)
+    with pytest.raises(LLMRequestError, match="all providers failed"):
+        router.generate("q")
+    assert router.health()["solo"]["state"] == "open"
+    with pytest.raises(LLMRequestError, match="no healthy provider"):
+        router.generate("q")
+    assert solo.calls == 2
+
+
+def test_open_circuit_is_skipped_in_favour_of_other_providers():
+    flaky, backup = FakeProvider("flaky", fail=True), FakeProvider("backup", delay=0.01)
+    router = _router(flaky, backup, failure_threshold=1, reset_timeout=60)
+    router.generate("q")
+
+    assert [router.generate("q") for _ in range(3)] == ["answer from backup"] * 3
+    assert flaky.calls == 1
+    assert router.health()["flaky"]["state"] == "open"
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_hedge_fires_after_the_percentile_delay_and_first_success_wins(mode):
+    slow, fast = FakeProvider("slow", delay=1.0), FakeProvider("fast", delay=0.01)
+    router = _router(slow, fast, hedge_percentile=0.95, min_hedge_delay=0.01)
+    _prime(router, "slow", 0.2)
+    _prime(router, "fast", 0.3)
+
+    started = time.perf_counter()
+    answer = router.generate("q") if mode == "sync" else asyncio.run(router.agenerate("q"))
+    elapsed = time.perf_counter() - started
+
+    assert answer == "answer from fast"
+    assert 0.2 <= elapsed < 0.9
+    assert (slow.calls, fast.calls) == (1, 1)
+    if mode == "async":
+        assert slow.cancelled == 1
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_no_hedge_when_the_primary_answers_in_time(mode):
+    primary, spare = FakeProvider("primary", delay=0.01), FakeProvider("spare")
+    router = _router(primary, spare)
+    _prime(router, "primary", 0.2)
+    _prime(router, "spare", 0.3)
+
+    answer = router.generate("q") if mode == "sync" else asyncio.run(router.agenerate("q"))
+
+    assert answer == "answer from primary"
+    assert spare.calls == 0
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_failure_fails_over_to_the_next_provider(mode):
+    broken, healthy = FakeProvider("broken", fail=True), FakeProvider("healthy")
+    router = _router(broken, healthy)
+    _prime(router, "healthy", 0.5)
+
+    answer = router.generate("q") if mode == "sync" else asyncio.run(router.agenerate("q"))
+
+    assert answer == "answer from healthy"
+    assert broken.calls == 1
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_all_providers_failing_raises(mode):
+    router = _router(FakeProvider("a", fail=True), FakeProvider("b", fail=True), failure_threshold=1)
+
+    with pytest.raises(LLMRequestError, match="all providers failed"):
+        router.generate("q") if mode == "sync" else asyncio.run(router.agenerate("q"))
+    with pytest.raises(LLMRequestError, match="no healthy provider"):
+        router.generate("q") if mode == "sync" else asyncio.run(router.agenerate("q"))
@@ -0,0 +1,49 @@
+from quant_platform.config import PlatformConfig
+from quant_platform.llm import DummyLLMClient
+from quant_platform.rag import AgenticRAGPipeline
+from quant_platform.rag.local_store import LocalVectorStore
+from quant_platform.rag.retriever import HybridRetriever
+from quant_platform.rag.semantic_cache import SemanticAnswerCache
+
+
+def _pipeline(embeddings):
+    return AgenticRAGPipeline(
+        config=PlatformConfig(),
+        llm_client=DummyLLMClient(token=None),
+        retriever=HybridRetriever(vector_store=LocalVectorStore(), embedding_service=embeddings),
+        # Similarity-based invalidation is off so only shared sources drop answers.
+        answer_cache=SemanticAnswerCache(embedding_service=embeddings, invalidate_threshold=2.0),
+    )
+
+
+def test_ingesting_a_cached_answers_source_invalidates_it(embeddings):
+    pipeline = _pipeline(embeddings)
+    pipeline.ingest([{"text": "上证指数 盘整背驰", "source": "snowball", "symbol": "SH000001"}])
+
+    assert "cache" not in pipeline.run("上证指数走势", rounds=1)
+    assert pipeline.run("上证指数走势", rounds=1)["cache"]["hit"]
+
+    pipeline.ingest([{"text": "创业板指 放量突破", "source": "snowball", "symbol": "SZ399006"}])
+    assert pipeline.run("上证指数走势", rounds=1)["cache"]["hit"]
+
+    pipeline.ingest([{"text": "上证指数 三买确认", "source": "snowball", "symbol": "SH000001"}])
+    assert "cache" not in pipeline.run("上证指数走势", rounds=1)
+    assert pipeline.answer_cache.stats()["invalidated"] == 1
+
+
+def test_invalidation_reuses_the_retrievers_embeddings(embeddings):
+    class CountingEmbeddings:
+        calls = 0
+
+        def encode(self, texts):
+            CountingEmbeddings.calls += 1
+            return embeddings.encode(texts)
+
+    pipeline = _pipeline(CountingEmbeddings())
+    pipeline.ingest([{"text": "上证指数 盘整背驰", "source": "snowball", "symbol": "SH000001"}])
+    pipeline.run("上证指数走势", rounds=1)
+
+    before = CountingEmbeddings.calls
+    pipeline.ingest([{"text": "上证指数 三买确认", "source": "snowball", "symbol": "SH000001"}])
+    assert CountingEmbeddings.calls == before + 1
+    assert pipeline.answer_cache.stats()["invalidated"] == 1
@@ -0,0 +1,100 @@
+import multiprocessing
+import threading
+
+import numpy as np
+import pytest
+
+from quant_platform.rag.sharded import ShardedRetriever, _Shard
+
+
+class KeywordEmbeddings:
+    def encode(self, texts):
+        vectors = np.zeros((len(texts), 64), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.split():
+                vectors[row, int(word[1:]) % 64] += 1.0
+        return vectors
+
+
+def _search_reply(text):
+    return "ok", ([[{"text": text, "score": 1.0}]], [[]])
+
+
+@pytest.fixture
+def fake_shard():
+    """A coordinator with one shard whose worker end of the pipe is driven by the test."""
+
+    coordinator = ShardedRetriever(embedding_service=KeywordEmbeddings(), shards=0, start_method="fork")
+    parent, worker = multiprocessing.Pipe()
+    coordinator._workers[0] = _Shard(shard_id=0, process=None, conn=parent)
+    coordinator._ring.add(0)
+    yield coordinator, worker
+    worker.close()
+
+
+def test_searches_overlap_and_replies_are_matched_by_request_id(fake_shard):
+    coordinator, worker = fake_shard
+    results = {}
+    threads = [
+        threading.Thread(target=lambda query=query: results.setdefault(query, coordinator.retrieve(query)))
+        for query in ("w1", "w2")
+    ]
+    for thread in threads:
+        thread.start()
+    requests = [worker.recv() for _ in threads]
+
+    # Both searches reached the shard before either was answered, and the lock is free meanwhile.
+    assert coordinator._lock.acquire(timeout=1)
+    coordinator._lock.release()
+    for request_id, op, args in reversed(requests):
+        assert op == "search"
+        worker.send((request_id, *_search_reply(f"hit for {args[0][0]}")))
+    for thread in threads:
+        thread.join(5)
+
+    assert results == {"w1": [{"text": "hit for w1", "score": 1.0}], "w2": [{"text": "hit for w2", "score": 1.0}]}
+
+
+def test_pending_requests_fail_when_the_worker_exits(fake_shard):
+    coordinator, worker = fake_shard
+    errors = []
+
+    def search():
+        try:
+            coordinator.retrieve("w1")
+        except RuntimeError as exc:
+            errors.append(str(exc))
+
+    thread = threading.Thread(target=search)
+    thread.start()
+    worker.recv()
+    worker.close()
+    thread.join(5)
+
+    assert errors == ["shard 0: worker exited"]
+
+
+def test_concurrent_queries_and_ingest_across_worker_processes():
+    coordinator = ShardedRetriever(embedding_service=KeywordEmbeddings(), shards=3, start_method="fork")
+    try:
+        coordinator.index([{"text": f"w{idx} w{idx}", "n": idx} for idx in range(40)])
+        failures = []
+
+        def query(idx):
+            for _ in range(10):
+                hits = coordinator.retrieve(f"w{idx}", top_k=1)
+                if hits[0]["text"] != f"w{idx} w{idx}":
+                    failures.append((idx, hits))
+
+        threads = [threading.Thread(target=query, args=(idx,)) for idx in range(8)]
+        threads.append(threading.Thread(target=coordinator.index, args=([{"text": "w50 w51"}],)))
+        for thread in threads:
+            thread.start()
+        coordinator.add_shard()
+        for thread in threads:
+            thread.join(30)
+
+        assert failures == []
+        assert coordinator.stats()["documents"] == 41
+    finally:
+        coordinator.close()
@@ -0,0 +1,150 @@
+import json
+import multiprocessing
+
+import pytest
+
+from quant_platform.config import PlatformConfig
+from quant_platform.llm import DummyLLMClient
+from quant_platform.rag import AgenticRAGPipeline
+from quant_platform.rag.local_store import LocalVectorStore
+from quant_platform.rag.retriever import HybridRetriever
+from quant_platform.rag.snapshot import RetrieverSnapshot
+
+fcntl = pytest.importorskip("fcntl")
+
+
+def _retriever(embeddings):
+    return HybridRetriever(vector_store=LocalVectorStore(), embedding_service=embeddings)
+
+
+def _writer(path, writer, rounds, embeddings):
+    retriever = _retriever(embeddings)
+    snapshot = RetrieverSnapshot(path=path, max_segments=4)
+    for round_ in range(rounds):
+        retriever.index([{"text": f"writer{writer} round{round_} doc{idx}", "writer": writer} for idx in range(3)])
+        snapshot.save(retriever)
+
+
+def _reader(path, rounds, failures, embeddings):
+    for _ in range(rounds):
+        try:
+            RetrieverSnapshot(path=path).load(_retriever(embeddings))
+        except Exception as exc:
+            failures.put(repr(exc))
+
+
+def test_workers_sharing_a_directory_leave_one_consistent_snapshot(tmp_path, embeddings):
+    path = str(tmp_path / "snapshot")
+    context = multiprocessing.get_context("fork")
+    failures = context.Queue()
+    processes = [context.Process(target=_writer, args=(path, writer, 12, embeddings)) for writer in range(4)]
+    processes.append(context.Process(target=_reader, args=(path, 40, failures, embeddings)))
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+
+    assert [process.exitcode for process in processes] == [0] * len(processes)
+    assert failures.empty()
+    manifest = json.loads((tmp_path / "snapshot" / "manifest.json").read_text())
+    on_disk = sorted(entry.name for entry in (tmp_path / "snapshot").iterdir() if entry.name.startswith("segment-"))
+    assert on_disk == sorted(manifest["segments"])
+    restored = _retriever(embeddings)
+    assert RetrieverSnapshot(path=path).load(restored) == manifest["count"] == 4 * 12 * 3
+    payloads = restored.export_state()["payloads"]
+    assert {payload["writer"] for payload in payloads} == {0, 1, 2, 3}
+    assert len({payload["text"] for payload in payloads}) == 4 * 12 * 3
+
+
+def test_divergent_writers_keep_each_others_documents(tmp_path, embeddings):
+    path = str(tmp_path / "snapshot")
+    first, second = _retriever(embeddings), _retriever(embeddings)
+    first_snapshot, second_snapshot = RetrieverSnapshot(path=path), RetrieverSnapshot(path=path)
+    first.index([{"text": "first doc0"}])
+    first_snapshot.save(first)
+    second.index([{"text": "second alpha"}, {"text": "second beta"}])
+    second_snapshot.save(second)
+
+    first.index([{"text": "first doc1"}])
+    first_snapshot.save(first)
+
+    restored = _retriever(embeddings)
+    assert RetrieverSnapshot(path=path).load(restored) == 4
+    texts = sorted(payload["text"] for payload in restored.export_state()["payloads"])
+    assert texts == ["first doc0", "first doc1", "second alpha", "second beta"]
+    assert first_snapshot.stats()["segments"] == 1
+    # The writer that absorbed the other's documents serves them from both indexes.
+    assert len(first) == len(first.vector_store) == 4
+    assert [hit["text"] for hit in first.sparse_search(["beta"], limit=1)[0]] == ["second beta"]
+
+
+def test_writer_with_nothing_new_does_not_rewrite_anothers_snapshot(tmp_path, embeddings):
+    path = str(tmp_path / "snapshot")
+    first, second = _retriever(embeddings), _retriever(embeddings)
+    first.index([{"text": "doc0"}, {"text": "doc1"}])
+    RetrieverSnapshot(path=path).save(first)
+    second.index([{"text": "doc1"}])
+
+    assert not RetrieverSnapshot(path=path).save(second)
+    assert len(second) == 2
+
+
+def _pipeline(path, embeddings, writer):
+    return AgenticRAGPipeline(
+        config=PlatformConfig(),
+        llm_client=DummyLLMClient(token=None),
+        retriever=_retriever(embeddings),
+        snapshots=RetrieverSnapshot(path=path, max_segments=2),
+        writer=writer,
+    )
+
+
+def _texts(pipeline):
+    return sorted(payload["text"] for payload in pipeline.retriever.export_state()["payloads"])
+
+
+def test_follower_picks_up_appended_segments_and_reloads_rewritten_snapshots(tmp_path, embeddings):
+    path = str(tmp_path / "snapshot")
+    writer, follower = _pipeline(path, embeddings, writer=True), _pipeline(path, embeddings, writer=False)
+    try:
+        writer.ingest([{"text": "doc0"}])
+        writer.save_snapshot()
+        assert follower.refresh() == 1
+        original = follower.retriever
+
+        writer.ingest([{"text": "doc1"}])
+        writer.save_snapshot()
+        assert follower.refresh() == 1
+        assert follower.retriever is original
+        assert _texts(follower) == ["doc0", "doc1"]
+        assert follower.refresh() == 0
+
+        # The third save exceeds max_segments and rewrites the snapshot as one segment.
+        writer.ingest([{"text": "doc2"}])
+        writer.save_snapshot()
+        assert follower.refresh() == 3
+        assert follower.retriever is not original
+        assert _texts(follower) == ["doc0", "doc1", "doc2"]
+    finally:
+        writer.stop_background_tasks()
+        follower.stop_background_tasks()
+
+
+def test_promoted_follower_appends_to_the_writers_snapshot(tmp_path, embeddings):
+    path = str(tmp_path / "snapshot")
+    writer, follower = _pipeline(path, embeddings, writer=True), _pipeline(path, embeddings, writer=False)
+    try:
+        writer.ingest([{"text": "doc0"}, {"text": "doc1"}])
+        writer.save_snapshot()
+        writer.stop_background_tasks()
+
+        follower.promote()
+        assert follower.writer
+        follower.ingest([{"text": "doc2"}])
+        assert follower.save_snapshot()
+        assert follower.snapshots.stats()["segments"] == 2
+
+        restored = _retriever(embeddings)
+        assert RetrieverSnapshot(path=path).load(restored) == 3
+    finally:
+        follower.stop_background_tasks()
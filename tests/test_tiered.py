@@ -0,0 +1,65 @@
+import time
+import zlib
+
+import numpy as np
+
+from quant_platform.rag.local_store import LocalVectorStore
+from quant_platform.rag.retriever import HybridRetriever
+from quant_platform.rag.tiered import DAY, TieredRetriever
+
+
+class CharEmbeddings:
+    """Hashed character counts: texts sharing characters are close, unrelated ones still score above 0."""
+
+    def encode(self, texts):
+        vectors = np.zeros((len(texts), 256), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for char in text:
+                vectors[row, zlib.crc32(char.encode()) % 256] += 1.0
+        return vectors
+
+
+def _tiered(min_hot_score=0.5):
+    embeddings = CharEmbeddings()
+    cold = HybridRetriever(vector_store=LocalVectorStore(), embedding_service=embeddings, use_bm25=False)
+    return TieredRetriever(embedding_service=embeddings, cold=cold, min_hot_score=min_hot_score)
+
+
+def _index(tiered):
+    now = time.time()
+    tiered.index(
+        [
+            {"text": f"白酒板块估值修复第{idx}篇", "timestamp": now - idx * 60, "source": "news"}
+            for idx in range(6)
+        ]
+        + [{"text": "缠论盘整背驰的止损设置", "timestamp": now - 90 * DAY, "source": "archive"}]
+    )
+
+
+def test_only_relevant_document_in_cold_tier_is_returned_first():
+    tiered = _tiered()
+    _index(tiered)
+
+    docs = tiered.retrieve("缠论盘整背驰止损", top_k=3)
+
+    assert docs[0]["text"] == "缠论盘整背驰的止损设置"
+    assert tiered.stats()["cold_fanouts"] == 1
+
+
+def test_relevant_hot_hits_skip_the_cold_tier():
+    tiered = _tiered()
+    _index(tiered)
+
+    docs = tiered.retrieve("白酒板块估值修复", top_k=3)
+
+    assert all(doc["text"].startswith("白酒板块") for doc in docs)
+    assert tiered.stats()["cold_fanouts"] == 0
+
+
+def test_weak_hot_hits_do_not_count_towards_top_k():
+    tiered = _tiered()
+    _index(tiered)
+    hot_docs = tiered.hot.retrieve("缠论盘整背驰止损", top_k=6)
+
+    assert len(hot_docs) >= 3
+    assert tiered._relevant_hits(hot_docs) == 0
@@ -0,0 +1,28 @@
+import pytest
+
+from quant_platform.rag.tokenizer import ChineseTokenizer
+
+
+@pytest.mark.parametrize(
+    "text, tokens",
+    [
+        # Longest vocabulary match wins over its prefixes (盘整 / 背驰, 第三类 / 买点).
+        ("上证指数出现盘整背驰", ["上证指数", "出现", "盘整背驰"]),
+        ("第三类买点确认后加仓", ["第三类买点", "确认", "认后", "加仓"]),
+        ("中枢震荡中的三买", ["中枢震荡", "中的", "三买"]),
+        # Tickers keep the exchange prefix and the bare code; other ASCII is lower-cased.
+        ("SH600519 茅台 MA5", ["sh600519", "600519", "茅台", "ma5"]),
+        ("沪深300指数", ["沪深300", "指数"]),
+    ],
+)
+def test_vocabulary_words_take_the_longest_match(text, tokens):
+    assert ChineseTokenizer().tokenize(text) == tokens
+
+
+def test_unknown_runs_become_bigrams_and_extra_words_stay_whole():
+    tokenizer = ChineseTokenizer(extra_words=["白酒板块"])
+
+    assert tokenizer("白酒板块走强") == ["白酒板块", "走强"]
+    assert tokenizer("白酒走强") == ["白酒", "酒走", "走强"]
+    assert tokenizer("强") == ["强"]
+    assert tokenizer.tokenize_many(["缠论", "笔"]) == [["缠论"], ["笔"]]
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from quant_platform.config import LLMTransportConfig
+from quant_platform.llm import transport
+from quant_platform.llm.transport import AsyncHTTPTransport, HTTPTransport, LLMRequestError
+
+pytest.importorskip("httpx")
+
+OK = (200, {}, b'{"ok": true}')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.peers.append(self.client_address[1])
+        status, headers, body = self.server.responses.pop(0) if self.server.responses else OK
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.daemon_threads = True
+    httpd.responses = []
+    httpd.peers = []
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}/v1/chat"
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def jitter(monkeypatch):
+    bounds = []
+    monkeypatch.setattr(transport.random, "uniform", lambda low, high: bounds.append((low, high)) or 0.0)
+    return bounds
+
+
+def _config(**overrides):
+    values = dict(max_retries=2, backoff_base=0.01, backoff_max=1.0, http2=False, connect_timeout=2, read_timeout=5)
+    values.update(overrides)
+    return LLMTransportConfig(**values)
+
+
+def _unused_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}/v1/chat"
+
+
+def _post(config, url):
+    client = HTTPTransport(config=config)
+    try:
+        return client.post_json(url, {}, {"prompt": "hi"}, "test")
+    finally:
+        client.close()
+
+
+def _apost(config, url, calls=1):
+    async def run():
+        client = AsyncHTTPTransport(config=config)
+        try:
+            return [await client.apost_json(url, {}, {"prompt": "hi"}, "test") for _ in range(calls)]
+        finally:
+            await client.aclose()
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_429_waits_for_retry_after(server, jitter, mode):
+    server.responses = [(429, {"Retry-After": "0.3"}, b'{"error": "slow down"}'), OK]
+
+    started = time.perf_counter()
+    result = _post(_config(), server.url) if mode == "sync" else _apost(_config(), server.url)[0]
+
+    assert result == {"ok": True}
+    assert len(server.peers) == 2
+    assert time.perf_counter() - started >= 0.3
+    assert jitter == []
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_5xx_is_retried_with_full_jitter(server, jitter, mode):
+    server.responses = [(503, {}, b"busy"), (502, {}, b"bad gateway"), OK]
+
+    result = _post(_config(), server.url) if mode == "sync" else _apost(_config(), server.url)[0]
+
+    assert result == {"ok": True}
+    assert len(server.peers) == 3
+    assert jitter == [(0, 0.01), (0, 0.02)]
+
+
+def test_sync_requests_reuse_one_connection(server):
+    client = HTTPTransport(config=_config())
+    try:
+        results = [client.post_json(server.url, {}, {"n": idx}, "test") for idx in range(5)]
+    finally:
+        client.close()
+
+    assert results == [{"ok": True}] * 5
+    assert len(set(server.peers)) == 1
+
+
+def test_async_requests_reuse_one_connection(server):
+    assert _apost(_config(), server.url, calls=5) == [{"ok": True}] * 5
+    assert len(set(server.peers)) == 1
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_exhausted_retries_raise_llm_request_error(server, jitter, mode):
+    server.responses = [(503, {}, b"busy")] * 3
+
+    with pytest.raises(LLMRequestError) as excinfo:
+        _post(_config(), server.url) if mode == "sync" else _apost(_config(), server.url)
+
+    assert excinfo.value.status == 503
+    assert excinfo.value.provider == "test"
+    assert len(server.peers) == 3
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_client_errors_are_not_retried(server, mode):
+    server.responses = [(400, {}, json.dumps({"error": "bad request"}).encode())]
+
+    with pytest.raises(LLMRequestError) as excinfo:
+        _post(_config(), server.url) if mode == "sync" else _apost(_config(), server.url)
+
+    assert excinfo.value.status == 400
+    assert len(server.peers) == 1
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_connection_errors_raise_after_retries(jitter, mode):
+    url = _unused_url()
+
+    with pytest.raises(LLMRequestError) as excinfo:
+        _post(_config(), url) if mode == "sync" else _apost(_config(), url)
+
+    assert excinfo.value.status is None
+    assert len(jitter) == 2